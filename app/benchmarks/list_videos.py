@@ -0,0 +1,85 @@
+"""
+Compares the two ways of serving ``GET /videos`` against the configured database.
+
+    cd app && python -m benchmarks.list_videos --iterations 200 --limit 100
+
+``orm``: loads ``Video`` entities and validates them through ``VideoListResponse`` (the old path).
+``columns``: selects the response columns as rows and dumps them with orjson (``fetch_video_page``).
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from server.settings import Settings
+from server.storages import Video, close_db, create_db_session_pool
+from server.storages.pydantic_models import VideoListResponse
+from server.video.catalog import fetch_video_page
+
+
+async def orm_path(session: AsyncSession, limit: int) -> bytes:
+    result = await session.execute(select(Video).order_by(Video.created_at.desc()).limit(limit))
+    videos = result.scalars().all()
+    total = (await session.execute(select(func.count(Video.id)))).scalar()
+    response = VideoListResponse(videos=videos, total=total)
+    return json.dumps(response.model_dump(mode="json")).encode()
+
+
+async def columns_path(session: AsyncSession, limit: int) -> bytes:
+    videos, total = await fetch_video_page(session, limit=limit)
+    return orjson.dumps({"videos": videos, "total": total})
+
+
+async def measure(
+    name: str,
+    path: Callable[[AsyncSession, int], Awaitable[bytes]],
+    session_maker: Callable[[], AsyncSession],
+    iterations: int,
+    limit: int,
+    report: bool = True,
+) -> None:
+    timings = []
+    cpu_timings = []
+    for _ in range(iterations):
+        async with session_maker() as session:
+            started, cpu_started = time.perf_counter(), time.process_time()
+            body = await path(session, limit)
+            timings.append(time.perf_counter() - started)
+            cpu_timings.append(time.process_time() - cpu_started)
+
+    if not report:
+        return
+
+    timings.sort()
+    print(  # noqa: T201
+        f"{name:>8}: {len(body)} bytes, "
+        f"median {statistics.median(timings) * 1000:.2f} ms, "
+        f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.2f} ms, "
+        f"cpu {statistics.mean(cpu_timings) * 1000:.2f} ms/request",
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    engine, session_maker = await create_db_session_pool(Settings())
+    try:
+        for name, path in (("orm", orm_path), ("columns", columns_path)):
+            # Прогрів пулу з'єднань і кешу запитів
+            await measure(name, path, session_maker, 5, args.limit, report=False)
+            await measure(name, path, session_maker, args.iterations, args.limit)
+    finally:
+        await close_db(engine)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+"""
+Video title search.
+
+Revision ID: 3f1c2a7d9b10
+Revises: 62dc6e87a392
+Create Date: 2025-04-12 10:21:44.512306+00:00
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b10'
+down_revision: str | None = '62dc6e87a392'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        'videos',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', coalesce(title, ''))", persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index('ix_videos_search_vector', 'videos', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index(
+        'ix_videos_title_trgm',
+        'videos',
+        ['title'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_videos_title_trgm', table_name='videos', postgresql_using='gin')
+    op.drop_index('ix_videos_search_vector', table_name='videos', postgresql_using='gin')
+    op.drop_column('videos', 'search_vector')
@@ -0,0 +1,27 @@
+"""
+Indexes on blob URL columns.
+
+Revision ID: 8a4e0b6c2f51
+Revises: 3f1c2a7d9b10
+Create Date: 2025-04-14 08:02:37.190214+00:00
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4e0b6c2f51'
+down_revision: str | None = '3f1c2a7d9b10'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_videos_file_path'), 'videos', ['file_path'], unique=False)
+    op.create_index(op.f('ix_videos_thumbnail_path'), 'videos', ['thumbnail_path'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_videos_thumbnail_path'), table_name='videos')
+    op.drop_index(op.f('ix_videos_file_path'), table_name='videos')
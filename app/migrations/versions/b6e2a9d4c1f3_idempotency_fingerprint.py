@@ -0,0 +1,26 @@
+"""
+Fingerprint of the request an idempotency key was used with.
+
+Revision ID: b6e2a9d4c1f3
+Revises: f7a1d4e8b2c6
+Create Date: 2025-04-19 09:12:37.418206+00:00
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2a9d4c1f3'
+down_revision: str | None = 'f7a1d4e8b2c6'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('idempotency_fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'idempotency_fingerprint')
@@ -0,0 +1,28 @@
+"""
+Waveform peaks of videos.
+
+Revision ID: c4d7e1a9b3f2
+Revises: 8a4e0b6c2f51
+Create Date: 2025-04-15 10:21:48.502317+00:00
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7e1a9b3f2'
+down_revision: str | None = '8a4e0b6c2f51'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('waveform_path', sa.String(), nullable=True))
+    op.create_index(op.f('ix_videos_waveform_path'), 'videos', ['waveform_path'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_videos_waveform_path'), table_name='videos')
+    op.drop_column('videos', 'waveform_path')
@@ -0,0 +1,43 @@
+"""
+Notify listeners about changed and deleted videos.
+
+Revision ID: d2f8a6c41e07
+Revises: c4d7e1a9b3f2
+Create Date: 2025-04-16 09:12:05.734120+00:00
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f8a6c41e07'
+down_revision: str | None = 'c4d7e1a9b3f2'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Кеш записів відео у кожному воркері скидає запис, id якого прийшов у каналі video_changed
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_video_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('video_changed', OLD.id::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    )
+    op.execute(
+        """
+        CREATE TRIGGER videos_notify_changed
+        AFTER UPDATE OR DELETE ON videos
+        FOR EACH ROW EXECUTE FUNCTION notify_video_changed()
+        """,
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS videos_notify_changed ON videos")
+    op.execute("DROP FUNCTION IF EXISTS notify_video_changed()")
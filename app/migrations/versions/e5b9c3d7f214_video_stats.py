@@ -0,0 +1,48 @@
+"""
+Rollup table with catalog statistics.
+
+Revision ID: e5b9c3d7f214
+Revises: d2f8a6c41e07
+Create Date: 2025-04-17 11:40:26.918357+00:00
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9c3d7f214'
+down_revision: str | None = 'd2f8a6c41e07'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table('video_stats',
+    sa.Column('dimension', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('duration', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('dimension', 'key')
+    )
+    # Початкове заповнення з наявних відео, далі таблицю оновлює застосунок
+    op.execute(
+        """
+        INSERT INTO video_stats (dimension, key, count, size_bytes, duration)
+        SELECT d.dimension, d.key, count(*), sum(v.size_bytes), sum(coalesce(v.duration, 0))
+        FROM videos v
+        CROSS JOIN LATERAL (VALUES
+            ('total', ''),
+            ('status', coalesce(v.status, '')),
+            ('content_type', v.content_type),
+            ('day', to_char(v.created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD'))
+        ) AS d(dimension, key)
+        GROUP BY d.dimension, d.key
+        """,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('video_stats')
@@ -0,0 +1,44 @@
+"""
+Unique blob URL and idempotency key of videos.
+
+Revision ID: f7a1d4e8b2c6
+Revises: e5b9c3d7f214
+Create Date: 2025-04-18 08:55:13.260481+00:00
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a1d4e8b2c6'
+down_revision: str | None = 'e5b9c3d7f214'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Повторні реєстрації одного блоба могли створити дублікати. Міграція їх не видаляє: це окремий крок
+    # з архівом, який можна переглянути перед запуском (python -m server dedupe-videos)
+    duplicates = op.get_bind().execute(
+        sa.text("SELECT count(*) FROM (SELECT file_path FROM videos GROUP BY file_path HAVING count(*) > 1) d"),
+    ).scalar_one()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} blobs are registered by more than one video, the unique index can not be built. "
+            "Review them with `python -m server dedupe-videos --dry-run`, archive them with "
+            "`python -m server dedupe-videos` and run the migration again",
+        )
+
+    op.drop_index(op.f('ix_videos_file_path'), table_name='videos')
+    op.create_index(op.f('ix_videos_file_path'), 'videos', ['file_path'], unique=True)
+    op.add_column('videos', sa.Column('idempotency_key', sa.String(), nullable=True))
+    op.create_index(op.f('ix_videos_idempotency_key'), 'videos', ['idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_videos_idempotency_key'), table_name='videos')
+    op.drop_column('videos', 'idempotency_key')
+    op.drop_index(op.f('ix_videos_file_path'), table_name='videos')
+    op.create_index(op.f('ix_videos_file_path'), 'videos', ['file_path'], unique=False)
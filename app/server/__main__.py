@@ -1,27 +1,196 @@
-from fastapi import FastAPI
-import uvicorn
+import argparse
+import asyncio
+import logging
+import pathlib
+from datetime import UTC, datetime, timedelta
 
-from server.endpoints.base import router
+from server.dependencies import get_storage_backend
+from server.launcher import run_server
+from server.maintenance.blob_gc import collect_orphan_blobs
+from server.maintenance.dedupe import dedupe_videos
+from server.maintenance.reprocess import MISSING_CONDITIONS, ReprocessFilter, count_videos, reprocess_videos
 from server.settings import Settings
-from server.storages import create_db_session_pool
-from fastapi.middleware.cors import CORSMiddleware
-app = FastAPI()
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(router)
-
-@app.on_event("startup")
-async def startup_db_client():
-    settings = Settings()
+from server.storages import close_db, create_db_session_pool
+from server.video.base import PROCESSING_STAGES
+from server.video.stats import reconcile_video_stats
+
+
+async def run_blob_gc(settings: Settings, args: argparse.Namespace) -> None:
     engine, db_session = await create_db_session_pool(settings)
-    app.state.db_session = db_session
+    backend = get_storage_backend()
+    try:
+        report = await collect_orphan_blobs(
+            db_session,
+            backend,
+            grace_period=timedelta(hours=args.grace_hours),
+            dry_run=args.dry_run,
+            prefix=args.prefix,
+            batch_size=args.batch_size,
+            deletes_per_second=args.rate,
+        )
+    finally:
+        await backend.close()
+        await close_db(engine)
+
+    if args.dry_run:
+        for blob in report.orphans:
+            print(f"{blob.uploaded_at:%Y-%m-%d %H:%M}  {blob.size:>12}  {blob.url}")  # noqa: T201
+    print(report.summary())  # noqa: T201
+
+
+def _timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    # Дати без часового поясу вважаємо UTC
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+async def run_reprocess(settings: Settings, args: argparse.Namespace) -> None:
+    filters = ReprocessFilter(
+        statuses=args.status,
+        created_after=args.created_after,
+        created_before=args.created_before,
+        missing=args.missing,
+    )
+    stages = [stage for stage in PROCESSING_STAGES if stage in args.stages]
+
+    engine, db_session = await create_db_session_pool(settings)
+    try:
+        if args.dry_run:
+            async with db_session() as session:
+                print(f"{await count_videos(session, filters)} videos match")  # noqa: T201
+            return
+        try:
+            checkpoint = await reprocess_videos(
+                db_session,
+                filters,
+                stages,
+                checkpoint_path=args.checkpoint,
+                concurrency=args.concurrency or settings.processing_concurrency,
+                page_size=args.batch_size,
+                restart=args.restart,
+            )
+        except ValueError as e:
+            raise SystemExit(str(e))
+    finally:
+        await get_storage_backend().close()
+        await close_db(engine)
+
+    print(f"processed {checkpoint.processed}, failed {checkpoint.failed}, last video id {checkpoint.last_id}")  # noqa: T201
+    if checkpoint.failed_ids:
+        print(f"failed video ids: {' '.join(map(str, checkpoint.failed_ids))}")  # noqa: T201
+
+
+async def run_stats_reconcile(settings: Settings) -> None:
+    engine, db_session = await create_db_session_pool(settings)
+    try:
+        async with db_session() as session:
+            corrected = await reconcile_video_stats(session)
+    finally:
+        await close_db(engine)
+    print(f"corrected {corrected} video stats rows")  # noqa: T201
+
+
+async def run_dedupe(settings: Settings, args: argparse.Namespace) -> None:
+    engine, db_session = await create_db_session_pool(settings)
+    try:
+        async with db_session() as session:
+            report = await dedupe_videos(session, dry_run=args.dry_run)
+    finally:
+        await close_db(engine)
+
+    print(report.summary())  # noqa: T201
+    for video_id, kept_id in report.duplicates:
+        print(f"video {video_id} duplicates {kept_id}")  # noqa: T201
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m server")
+    commands = parser.add_subparsers(dest="command")
+
+    serve = commands.add_parser("serve", help="Run the API server (default)")
+    serve.add_argument("--workers", type=int, default=None, help="Number of worker processes, CPU count by default")
+    serve.add_argument("--host", default=None)
+    serve.add_argument("--port", type=int, default=None)
+
+    gc = commands.add_parser("gc", help="Delete blobs not referenced by any video")
+    gc.add_argument("--dry-run", action="store_true", help="Only report orphan blobs, do not delete them")
+    gc.add_argument("--grace-hours", type=float, default=24, help="Keep orphans younger than this (default: 24)")
+    gc.add_argument("--prefix", default=None, help="Only scan blobs under this pathname prefix")
+    gc.add_argument("--batch-size", type=int, default=100, help="URLs per delete call (default: 100)")
+    gc.add_argument("--rate", type=float, default=2, help="Max delete calls per second (default: 2)")
+
+    reprocess = commands.add_parser("reprocess", help="Run processing stages again over existing videos")
+    reprocess.add_argument("--status", action="append", default=[], help="Only videos with this status (repeatable)")
+    reprocess.add_argument(
+        "--created-after",
+        type=_timestamp,
+        default=None,
+        help="ISO date or datetime, UTC by default",
+    )
+    reprocess.add_argument(
+        "--created-before",
+        type=_timestamp,
+        default=None,
+        help="ISO date or datetime, UTC by default",
+    )
+    reprocess.add_argument(
+        "--missing",
+        action="append",
+        default=[],
+        choices=sorted(MISSING_CONDITIONS),
+        help="Only videos without this field (repeatable, any of them matches)",
+    )
+    reprocess.add_argument(
+        "--stages",
+        nargs="+",
+        default=list(PROCESSING_STAGES),
+        choices=PROCESSING_STAGES,
+        help="Stages to run (default: all)",
+    )
+    reprocess.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Videos processed at once, PROCESSING_CONCURRENCY by default",
+    )
+    reprocess.add_argument("--batch-size", type=int, default=100, help="Videos per page and checkpoint (default: 100)")
+    reprocess.add_argument(
+        "--checkpoint",
+        type=pathlib.Path,
+        default=pathlib.Path("reprocess-checkpoint.json"),
+        help="Progress file used to resume an interrupted run",
+    )
+    reprocess.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    reprocess.add_argument("--dry-run", action="store_true", help="Only count matching videos")
+
+    commands.add_parser("reconcile-stats", help="Recompute the catalog statistics rollup from the videos table")
+
+    dedupe = commands.add_parser(
+        "dedupe-videos",
+        help="Archive and delete videos registered more than once for the same blob",
+    )
+    dedupe.add_argument("--dry-run", action="store_true", help="Only list the duplicates")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    settings = Settings()
+
+    if args.command in (None, "serve"):
+        run_server(
+            settings,
+            workers=getattr(args, "workers", None),
+            host=getattr(args, "host", None),
+            port=getattr(args, "port", None),
+        )
+    elif args.command == "gc":
+        asyncio.run(run_blob_gc(settings, args))
+    elif args.command == "reprocess":
+        asyncio.run(run_reprocess(settings, args))
+    elif args.command == "reconcile-stats":
+        asyncio.run(run_stats_reconcile(settings))
+    elif args.command == "dedupe-videos":
+        asyncio.run(run_dedupe(settings, args))
+
 
 if __name__ == "__main__":
-    uvicorn.run("server.__main__:app", host="0.0.0.0", port=8000)  # noqa: S104
\ No newline at end of file
+    main()
@@ -0,0 +1,133 @@
+import asyncio
+import contextlib
+import logging
+
+from fastapi import FastAPI
+
+from server.dependencies import get_settings, get_storage_backend, get_video_cache
+from server.diagnostics.base import ActivityMiddleware, LoopMonitor
+from server.endpoints.base import router
+from server.storages import close_db, create_db_session_pool
+from server.storages.replica import WRITE_POSITION_HEADER, ReplicaLagMonitor
+from server.video.cache import VideoChangeListener
+from server.video.stats import run_stats_reconciliation
+from fastapi.middleware.cors import CORSMiddleware
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI()
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=[WRITE_POSITION_HEADER],
+)
+
+app.add_middleware(ActivityMiddleware)
+
+app.include_router(router)
+app.state.loop_monitor = None
+app.state.db_replica_engine = None
+app.state.db_replica_session = None
+app.state.replica_monitor = None
+app.state.video_change_listener = None
+app.state.stats_reconciliation = None
+
+@app.on_event("startup")
+async def startup_db_client():
+    settings = get_settings()
+    engine, db_session = await create_db_session_pool(settings)
+    app.state.db_engine = engine
+    app.state.db_session = db_session
+
+
+@app.on_event("startup")
+async def startup_db_replica():
+    settings = get_settings()
+    replica_dsn = settings.psql_replica_dsn()
+    if replica_dsn is None:
+        return
+    engine, db_session = await create_db_session_pool(settings, replica_dsn, settings.db_replica_pool_size())
+    app.state.db_replica_engine = engine
+    app.state.db_replica_session = db_session
+    app.state.replica_monitor = ReplicaLagMonitor(
+        engine,
+        interval=settings.replica_lag_check_interval,
+        max_lag=settings.replica_max_lag,
+    )
+    app.state.replica_monitor.start()
+
+
+@app.on_event("startup")
+async def startup_stats_reconciliation():
+    settings = get_settings()
+    if settings.stats_reconcile_interval > 0:
+        app.state.stats_reconciliation = asyncio.create_task(
+            run_stats_reconciliation(app.state.db_session, settings.stats_reconcile_interval),
+            name="video-stats-reconciliation",
+        )
+
+
+@app.on_event("startup")
+async def startup_video_cache():
+    settings = get_settings()
+    if settings.video_cache_size <= 0:
+        return
+    if settings.pgbouncer:
+        # LISTEN потребує сесійного з'єднання, у режимі транзакцій PgBouncer сповіщення не доходять
+        logger.warning("Video cache is disabled: change notifications do not work through PgBouncer")
+        return
+    app.state.video_change_listener = VideoChangeListener(settings, get_video_cache())
+    app.state.video_change_listener.start()
+
+
+@app.on_event("startup")
+async def startup_loop_monitor():
+    settings = get_settings()
+    if settings.loop_monitor_enabled:
+        app.state.loop_monitor = LoopMonitor(
+            interval=settings.loop_monitor_interval,
+            block_threshold=settings.loop_block_threshold_ms / 1000,
+        )
+        app.state.loop_monitor.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_stats_reconciliation():
+    if app.state.stats_reconciliation is not None:
+        app.state.stats_reconciliation.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await app.state.stats_reconciliation
+
+
+@app.on_event("shutdown")
+async def shutdown_video_cache():
+    if app.state.video_change_listener is not None:
+        await app.state.video_change_listener.stop()
+
+
+@app.on_event("shutdown")
+async def shutdown_loop_monitor():
+    if app.state.loop_monitor is not None:
+        await app.state.loop_monitor.stop()
+
+
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    await close_db(app.state.db_engine)
+
+
+@app.on_event("shutdown")
+async def shutdown_db_replica():
+    if app.state.replica_monitor is not None:
+        await app.state.replica_monitor.stop()
+    if app.state.db_replica_engine is not None:
+        await close_db(app.state.db_replica_engine)
+
+
+@app.on_event("shutdown")
+async def shutdown_storage_backend():
+    await get_storage_backend().close()
@@ -1,6 +1,12 @@
 from functools import lru_cache
 
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
 from server.settings import Settings
+from server.storage_backends import StorageBackend, create_storage_backend
+from server.storages.replica import WRITE_POSITION_HEADER, choose_read_session
+from server.video.cache import VideoCache
 
 
 @lru_cache
@@ -9,5 +15,27 @@ def get_settings() -> Settings:
     return Settings()
 
 
+@lru_cache
+def get_storage_backend() -> StorageBackend:
+    """Функція для отримання сховища файлів, обраного в налаштуваннях"""
+    return create_storage_backend(get_settings())
+
+
+@lru_cache
+def get_video_cache() -> VideoCache:
+    """Функція для отримання кешу записів відео поточного процесу"""
+    settings = get_settings()
+    # Читання з репліки може відставати від сповіщень основного сервера на допустиме відставання репліки
+    stale_window = settings.replica_max_lag if settings.psql_replica_host else 0.0
+    return VideoCache(max_size=settings.video_cache_size, stale_window=stale_window)
 
 
+def get_read_session(request: Request) -> async_sessionmaker[AsyncSession]:
+    """Фабрика сесій для запитів лише на читання: репліка, якщо вона доступна і вже має останній запис клієнта"""
+    state = request.app.state
+    return choose_read_session(
+        state.db_session,
+        state.db_replica_session,
+        state.replica_monitor,
+        request.headers.get(WRITE_POSITION_HEADER),
+    )
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import statistics
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from server.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Що зараз виконує задача: маршрут запиту або фонове завдання. Потрапляє в логи про блокування циклу
+current_activity: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_activity", default=None)
+
+LOOP_LAG = Gauge("event_loop_lag_seconds", "Event loop scheduling lag over the recent window", ["quantile"])
+LOOP_BLOCKS = Counter("event_loop_blocks_total", "Callbacks that blocked the event loop longer than the threshold")
+
+LAG_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class ActivityMiddleware:
+    """Records ``METHOD /path`` of every HTTP request in ``current_activity``"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = current_activity.set(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_activity.reset(token)
+
+
+def _task_activity(task: asyncio.Task[Any] | None) -> str | None:
+    if task is None:
+        return None
+    get_context = getattr(task, "get_context", None)  # Task.get_context() з'явився в Python 3.12
+    if get_context is None:
+        return task.get_name()
+    return get_context().get(current_activity) or task.get_name()
+
+
+class LoopMonitor:
+    """
+    Measures event loop lag and reports callbacks that block the loop.
+
+    A sampler task sleeps for ``interval`` and records how late it wakes up. A watchdog thread watches
+    the sampler's heartbeat; when it is older than ``block_threshold`` the loop is stuck in a callback,
+    so the watchdog logs the loop thread's stack and the route or job of the running task.
+    """
+
+    def __init__(self, interval: float = 0.05, block_threshold: float = 0.1, window: int = 2000) -> None:
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self._samples: deque[float] = deque(maxlen=window)
+        self._heartbeat = time.monotonic()
+        self._blocks = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._sampler: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._sampler = self._loop.create_task(self._sample(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.cancel()
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+
+    async def _sample(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self._samples.append(max(now - expected, 0.0))
+
+    def _watch(self) -> None:
+        reported_heartbeat = None
+        while not self._stopped.wait(self.block_threshold / 2):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled < self.block_threshold or heartbeat == reported_heartbeat:
+                continue
+
+            # Один звіт на кожне блокування
+            reported_heartbeat = heartbeat
+            self._blocks += 1
+            LOOP_BLOCKS.inc()
+
+            frame = sys._current_frames().get(self._loop_thread_id)  # noqa: SLF001
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>\n"
+            activity = _task_activity(asyncio.current_task(self._loop)) if self._loop is not None else None
+            logger.warning(
+                "Event loop blocked for more than %.0f ms, activity: %s\n%s",
+                stalled * 1000,
+                activity or "<unknown>",
+                stack,
+            )
+
+    def snapshot(self) -> dict[str, Any]:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0, "blocked_callbacks": self._blocks}
+
+        def quantile(q: float) -> float:
+            return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+        for q in LAG_QUANTILES:
+            LOOP_LAG.set(quantile(q), quantile=str(q))
+
+        return {
+            "samples": len(samples),
+            "interval_ms": self.interval * 1000,
+            "lag_ms": {
+                "mean": statistics.fmean(samples) * 1000,
+                **{f"p{round(q * 100)}": quantile(q) * 1000 for q in LAG_QUANTILES},
+                "max": samples[-1] * 1000,
+            },
+            "blocked_callbacks": self._blocks,
+            "block_threshold_ms": self.block_threshold * 1000,
+        }
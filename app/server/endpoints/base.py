@@ -1,29 +1,52 @@
+import hashlib
 import json
 import logging
 import traceback
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from fastapi import APIRouter, Request, HTTPException, UploadFile, File, Form, BackgroundTasks, Query, Path
-from pydantic import BaseModel
-from sqlalchemy import select, func
+from fastapi import APIRouter, Request, HTTPException, UploadFile, File, Form, BackgroundTasks, Header, Query, Path
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import delete, select
 
+from server.dependencies import get_read_session, get_video_cache
 from server.storages import Video, VideoProcessingJob
-from server.storages.pydantic_models import VideoListResponse, VideoCreate, VideoUploadResponse, VideoProcessingStatus
+from server.storages.pydantic_models import (
+    VideoBatchUploadResponse,
+    VideoCreate,
+    VideoListResponse,
+    VideoProcessingStatus,
+    VideoStatsResponse,
+    VideoUploadResponse,
+)
+from server.storages.replica import current_write_position, remember_write
+from server.streaming.base import drop_from_stream_cache
+from server.video.catalog import ExportFormat, fetch_video_page, iter_video_export
+from server.video.stats import adjust_video_stats, fetch_video_stats
 from server.vercel_bob.base import VercelBlobService
 from server.video.base import (
+    VideoRegistration,
     upload_video_to_storage,
     create_video,
+    create_videos,
     process_video,
+    process_videos,
     get_video_by_id,
 )
 
 # from .direct_upload import router as direct_upload
+from .diagnostics import router as diagnostics_router
+from .files import router as files_router
+from .stream import router as stream_router
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 # router.include_router(direct_upload)
+router.include_router(diagnostics_router)
+router.include_router(files_router)
+router.include_router(stream_router)
 class VideoUploadedRequest(BaseModel):
     blobUrl: str
     blobSize: Optional[int] = None
@@ -32,11 +55,53 @@ class VideoUploadedRequest(BaseModel):
     title: Optional[str] = None
 
 
+class VideoBatchRegisterRequest(BaseModel):
+    videos: list[VideoUploadedRequest] = Field(..., min_length=1, max_length=1000)
+
+
+def _blob_file_info(video_data: VideoUploadedRequest) -> dict[str, Any]:
+    """Створює файлову інформацію з даних blob"""
+    return {
+        "url": video_data.blobUrl,
+        "pathname": video_data.blobPathname or "",
+        "content_type": "video/mp4",  # За замовчуванням або визначте за розширенням
+        "size_bytes": video_data.blobSize or 0,
+    }
+
+
+def _request_fingerprint(payload: BaseModel) -> str:
+    """Хеш тіла запиту, з яким зберігається ключ ідемпотентності"""
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+def _default_title() -> str:
+    return f"Відео {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+
+
+def _registration_response(registration: VideoRegistration) -> VideoUploadResponse:
+    return VideoUploadResponse(
+        id=registration.id,
+        title=registration.title,
+        job_id=registration.job_id,
+        message="Video registration successful" if registration.created else "Video already registered",
+    )
+
+
+IDEMPOTENCY_KEY_HEADER = Header(
+    None,
+    alias="Idempotency-Key",
+    max_length=255,
+    description="Repeating a request with the same key returns the original registration",
+)
+
+
 @router.post("/videos/register", response_model=VideoUploadResponse, status_code=202)
 async def register_blob_video(
         request: Request,
+        response: Response,
         background_tasks: BackgroundTasks,
         video_data: VideoUploadedRequest,
+        idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
 ):
     """
     Registers video that was already uploaded to Vercel Blob Storage
@@ -46,30 +111,37 @@ async def register_blob_video(
     - **title**: Video title (optional, will be used or generated)
     - **blobSize**: Size of the video in bytes (optional)
     - **blobPathname**: Pathname in the storage (optional)
+    - **Idempotency-Key** header: Optional key identifying this registration
 
-    Returns the ID and title of the created video.
+    Registration is idempotent: repeating it for the same blob URL or with the same `Idempotency-Key`
+    returns the already registered video (status 200) and does not start processing again.
+    Reusing an `Idempotency-Key` with a different request body is rejected with 422.
+
+    Returns the ID and title of the video and the ID of its processing job.
     """
     logger.info("Received blob video registration request: %s", video_data.blobUrl)
 
     try:
         async with request.app.state.db_session() as session:
-            # Створюємо файлову інформацію з даних blob
-            file_info = {
-                "url": video_data.blobUrl,
-                "pathname": video_data.blobPathname or "",
-                "content_type": "video/mp4",  # За замовчуванням або визначте за розширенням
-                "size_bytes": video_data.blobSize or 0,
-            }
+            file_info = _blob_file_info(video_data)
 
-            title = video_data.title or f"Відео {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+            title = video_data.title or _default_title()
 
             logger.info("Creating model for validation")
             validated_data = VideoCreate(title=title)
 
             try:
                 logger.info("Creating database record")
-                new_video = await create_video(session, validated_data, file_info)
-                logger.info("Record created with ID: %s", new_video.id)
+                registration = await create_video(
+                    session,
+                    validated_data,
+                    file_info,
+                    idempotency_key,
+                    _request_fingerprint(video_data),
+                )
+                logger.info("Record created with ID: %s", registration.id)
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.error("Error creating database record: %s", str(e))
                 logger.error(traceback.format_exc())
@@ -78,15 +150,19 @@ async def register_blob_video(
                     detail=f"Failed to create video record: {e!s}",
                 )
 
-            logger.info("Adding task to process video with ID: %s", new_video.id)
-            background_tasks.add_task(process_video, session, new_video.id)
+            if registration.created:
+                logger.info("Adding task to process video with ID: %s", registration.id)
+                background_tasks.add_task(process_video, session, registration.id)
+            else:
+                logger.info("Video %s is already registered, not processing it again", registration.id)
+                response.status_code = 200
 
-        logger.info("Returning successful response for video with ID: %s", new_video.id)
-        return VideoUploadResponse(
-            id=new_video.id,
-            title=new_video.title,
-            message="Video registration successful",
-        )
+            remember_write(response, await current_write_position(session, request.app.state.db_replica_session))
+
+        logger.info("Returning successful response for video with ID: %s", registration.id)
+        return _registration_response(registration)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Unexpected error processing request: %s", str(e))
         logger.error(traceback.format_exc())
@@ -95,43 +171,130 @@ async def register_blob_video(
             detail=f"Unexpected error: {e!s}",
         )
 
+@router.post("/videos/register/batch", response_model=VideoBatchUploadResponse, status_code=202)
+async def register_blob_videos_batch(
+        request: Request,
+        response: Response,
+        background_tasks: BackgroundTasks,
+        batch: VideoBatchRegisterRequest,
+        idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
+):
+    """
+    Registers many videos that were already uploaded to Blob Storage in one request.
+
+    - **videos**: List of blob descriptors, each with the same fields as `/videos/register`
+    - **Idempotency-Key** header: Optional key identifying this batch
+
+    All videos and processing jobs are inserted in a single transaction and the jobs are
+    enqueued together. Videos that are already registered (same blob URL, or the same batch
+    retried with the same `Idempotency-Key`) are returned as they are and not processed again;
+    if that is the case for every video, the status is 200 instead of 202. Reusing an `Idempotency-Key`
+    with a different batch is rejected with 422.
+    Returns the IDs and titles of the videos and their processing jobs in request order.
+    """
+    logger.info("Received batch blob video registration request for %s videos", len(batch.videos))
+
+    try:
+        items = [
+            (VideoCreate(title=video_data.title or _default_title()), _blob_file_info(video_data))
+            for video_data in batch.videos
+        ]
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+    try:
+        async with request.app.state.db_session() as session:
+            registrations = await create_videos(session, items, idempotency_key, _request_fingerprint(batch))
+            write_position = await current_write_position(session, request.app.state.db_replica_session)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error creating database records: %s", str(e))
+        logger.error(traceback.format_exc())
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to create video records: {e!s}",
+        )
+
+    created_ids = [registration.id for registration in registrations if registration.created]
+    if created_ids:
+        background_tasks.add_task(process_videos, request.app.state.db_session, created_ids)
+    else:
+        # Усі відео вже були зареєстровані, нічого не поставлено в обробку
+        response.status_code = 200
+    remember_write(response, write_position)
+
+    return VideoBatchUploadResponse(videos=[_registration_response(registration) for registration in registrations])
+
+
 @router.get("/videos", response_model=VideoListResponse)
 async def list_videos(
         request: Request,
         skip: int = Query(0, ge=0, description="Number of records to skip (for pagination)"),
         limit: int = Query(20, ge=1, le=100, description="Maximum number of records to return"),
         status: str | None = Query(None, description="Filter by video status (ready, processing, error)"),
+        q: str | None = Query(None, min_length=1, max_length=200, description="Search in video titles"),
 ):
     """
-    Gets a list of videos with pagination and optional status filtering.
+    Gets a list of videos with pagination and optional status filtering and title search.
 
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Maximum number of records to return
     - **status**: Optional filter by video status
+    - **q**: Optional search query. Words match title words by prefix (full-text index),
+      and queries of 3 or more characters are also matched by trigram similarity, so small typos are tolerated.
+      At most 1000 matches are ranked by relevance and counted.
 
-    Returns a list of videos and the total record count.
+    Returns a list of videos and the total record count (capped at 1000 when searching).
     """
-    query = select(Video)
-    count_query = select(func.count(Video.id))
+    async with get_read_session(request)() as session:
+        videos, total = await fetch_video_page(session, skip=skip, limit=limit, status=status, q=q)
 
-    if status:
-        query = query.where(Video.status == status)
-        count_query = count_query.where(Video.status == status)
+    # Рядки вже мають форму VideoResponse, тому серіалізуємо їх напряму через orjson без повторної валідації
+    return ORJSONResponse({"videos": videos, "total": total})
 
-    query = query.order_by(Video.created_at.desc()).offset(skip).limit(limit)
-    async with request.app.state.db_session() as session:
-        result = await session.execute(query)
-        videos = result.scalars().all()
 
-        count_result = await session.execute(count_query)
-        total = count_result.scalar()
+@router.get("/videos/export")
+async def export_videos(
+        request: Request,
+        export_format: ExportFormat = Query("ndjson", alias="format", description="Export format: ndjson or csv"),
+        status: str | None = Query(None, description="Filter by video status (ready, processing, error)"),
+        q: str | None = Query(None, min_length=1, max_length=200, description="Search in video titles"),
+):
+    """
+    Streams the whole video catalog as NDJSON or CSV.
 
-    return VideoListResponse(
-        videos=videos,
-        total=total,
+    - **format**: `ndjson` (one JSON object per line) or `csv` (with a header row)
+    - **status**: Optional filter by video status
+    - **q**: Optional title search, same as in `GET /videos`
+
+    Rows are streamed from a server-side cursor, ordered by ID.
+    """
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        iter_video_export(get_read_session(request), export_format, status=status, q=q),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="videos.{export_format}"'},
     )
 
 
+@router.get("/videos/stats", response_model=VideoStatsResponse)
+async def get_video_stats(
+        request: Request,
+        days: int = Query(30, ge=1, le=366, description="Number of days of daily ingest to return"),
+):
+    """
+    Gets catalog statistics: totals, counts by status and content type, and daily ingest volume.
+
+    - **days**: Number of days of daily ingest to return
+
+    Served from a rollup table maintained together with the videos, so the cost does not depend
+    on the catalog size. Sizes are in bytes, durations in seconds, days are UTC.
+    """
+    async with get_read_session(request)() as session:
+        return await fetch_video_stats(session, days=days)
+
+
 @router.get("/videos/{video_id}/status", response_model=VideoProcessingStatus)
 async def get_video_processing_status(
         request: Request,
@@ -142,7 +305,8 @@ async def get_video_processing_status(
 
     - **video_id**: Video ID
 
-    Returns information about the video processing status.
+    Returns information about the video processing status. Always read from the primary: the status is
+    polled right after registration and while processing changes it, so replica lag would show stale data.
     """
     async with request.app.state.db_session() as session:
         video = await get_video_by_id(session, video_id)
@@ -180,6 +344,7 @@ async def delete_video(
 
     Returns no content in the response (204 No Content).
     """
+    response = Response(status_code=204)
     async with request.app.state.db_session() as session:
         video = await get_video_by_id(session, video_id)
         if not video:
@@ -190,12 +355,24 @@ async def delete_video(
 
         if video.file_path:
             await VercelBlobService.delete_file(video.file_path)
+            await drop_from_stream_cache(video.file_path)
 
         if video.thumbnail_path:
             await VercelBlobService.delete_file(video.thumbnail_path)
 
-        await session.delete(video)
+        if video.waveform_path:
+            await VercelBlobService.delete_file(video.waveform_path)
+
+        # Завдання на обробку видаляє каскад зовнішнього ключа
+        await adjust_video_stats(session, [video_id], -1)
+        await session.execute(delete(Video).where(Video.id == video_id))
         await session.commit()
+        remember_write(response, await current_write_position(session, request.app.state.db_replica_session))
+
+    # Інші процеси дізнаються про видалення через сповіщення video_changed
+    get_video_cache().invalidate(video_id)
+
+    return response
 
 
 
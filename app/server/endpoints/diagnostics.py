@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from server.metrics import REGISTRY
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(request: Request):
+    """Metrics of this worker process in the Prometheus text format"""
+    if request.app.state.loop_monitor is not None:
+        # Оновлює gauge з перцентилями затримки циклу
+        request.app.state.loop_monitor.snapshot()
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/diagnostics/loop")
+async def event_loop_lag(request: Request):
+    """
+    Event loop lag percentiles of this worker process.
+
+    Only available when `LOOP_MONITOR_ENABLED=true`.
+    """
+    monitor = request.app.state.loop_monitor
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="Loop monitor is disabled")
+    return monitor.snapshot()
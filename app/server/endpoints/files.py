@@ -0,0 +1,86 @@
+import mimetypes
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, HTTPException, Path, Request
+from fastapi.responses import Response
+
+from server.dependencies import get_settings, get_storage_backend
+from server.endpoints.responses import FileRangeResponse, multipart_range_response
+from server.storage_backends import BlobNotFoundError, LocalStorageBackend
+from server.streaming.base import (
+    RangeNotSatisfiableError,
+    http_date,
+    if_range_matches,
+    iter_file_range,
+    make_etag,
+    parse_range_header,
+)
+
+router = APIRouter()
+
+
+@router.get("/files/{pathname:path}")
+async def serve_local_file(
+        request: Request,
+        pathname: str = Path(..., description="Pathname of the blob in the local storage"),
+):
+    """
+    Serves a blob stored by the local filesystem backend.
+
+    Only available when `STORAGE_BACKEND=local`, responds 404 otherwise. Supports `Range` and `If-Range`
+    the same way as `/videos/{video_id}/stream`, with the same ETag for the blob.
+    """
+    backend = get_storage_backend()
+    if not isinstance(backend, LocalStorageBackend):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    try:
+        path = backend.path_for(pathname)
+    except BlobNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+
+    stat = path.stat()
+    size = stat.st_size
+    last_modified = datetime.fromtimestamp(int(stat.st_mtime), tz=UTC)
+    etag = make_etag(backend.url_for(pathname), size)
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": http_date(last_modified),
+    }
+
+    ranges = None
+    if if_range_matches(request.headers.get("if-range"), etag, last_modified):
+        try:
+            ranges = parse_range_header(request.headers.get("range"), size)
+        except RangeNotSatisfiableError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+
+    media_type, _ = mimetypes.guess_type(path.name)
+    media_type = media_type or "application/octet-stream"
+
+    if ranges is not None and len(ranges) > 1:
+        chunk_size = get_settings().stream_chunk_size
+
+        def read_range(start: int, end: int) -> AsyncIterator[bytes]:
+            return iter_file_range(path, start, end, chunk_size)
+
+        return multipart_range_response(request.method, read_range, ranges, size, headers, media_type)
+
+    if ranges is None:
+        return FileRangeResponse(path, headers=headers, media_type=media_type)
+
+    start, end = ranges[0]
+    headers["content-range"] = f"bytes {start}-{end}/{size}"
+    return FileRangeResponse(
+        path,
+        offset=start,
+        count=end - start + 1,
+        status_code=206,
+        headers=headers,
+        media_type=media_type,
+    )
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import uuid
+from collections.abc import AsyncIterator, Callable, Mapping
+from typing import TYPE_CHECKING
+
+import aiofiles
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from server.dependencies import get_settings
+
+if TYPE_CHECKING:
+    from server.streaming.base import Throttle
+
+# ASGI extension for zero-copy file transfer, see
+# https://asgi.readthedocs.io/en/latest/extensions.html#zero-copy-send
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class FileRangeResponse(Response):
+    """
+    Sends ``count`` bytes of a local file starting at ``offset``.
+
+    Under uvicorn this is a read loop: the file is read in ``chunk_size`` pieces through the aiofiles
+    thread pool and every piece is copied into the response. uvicorn does not implement the ASGI
+    zero-copy send extension; only servers that advertise it get the file descriptor for ``sendfile(2)``.
+    With a ``throttle`` the file is sent in ``chunk_size`` pieces so the rate limit can be applied between them.
+    ``chunk_size`` is ``STREAM_CHUNK_SIZE``.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        offset: int = 0,
+        count: int | None = None,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        media_type: str | None = None,
+        throttle: Throttle | None = None,
+    ) -> None:
+        self.path = pathlib.Path(path)
+        self.throttle = throttle
+        self.chunk_size = get_settings().stream_chunk_size
+        self.offset = offset
+        self.count = count if count is not None else self.path.stat().st_size - offset
+        self.status_code = status_code
+        self.media_type = media_type or "application/octet-stream"
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-length"] = str(self.count)
+        self.headers.setdefault("accept-ranges", "bytes")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if scope["method"] == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                if self.throttle is None:
+                    await send(
+                        {
+                            "type": ZEROCOPY_EXTENSION,
+                            "file": fd,
+                            "offset": self.offset,
+                            "count": self.count,
+                            "more_body": False,
+                        },
+                    )
+                    return
+
+                offset, remaining = self.offset, self.count
+                while remaining > 0:
+                    count = min(self.chunk_size, remaining)
+                    await self.throttle.consume(count)
+                    remaining -= count
+                    await send(
+                        {
+                            "type": ZEROCOPY_EXTENSION,
+                            "file": fd,
+                            "offset": offset,
+                            "count": count,
+                            "more_body": remaining > 0,
+                        },
+                    )
+                    offset += count
+            finally:
+                os.close(fd)
+            return
+
+        remaining = self.count
+        async with aiofiles.open(self.path, "rb") as in_file:
+            await in_file.seek(self.offset)
+            while remaining > 0:
+                chunk = await in_file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                if self.throttle is not None:
+                    await self.throttle.consume(len(chunk))
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+        if remaining > 0:
+            # File was truncated while being sent, close the body so the client sees a short read
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def _multipart(
+    read_range: Callable[[int, int], AsyncIterator[bytes]],
+    ranges: list[tuple[int, int]],
+    part_headers: list[bytes],
+    closing: bytes,
+) -> AsyncIterator[bytes]:
+    for (start, end), head in zip(ranges, part_headers, strict=True):
+        yield head
+        async for chunk in read_range(start, end):
+            yield chunk
+        yield b"\r\n"
+    yield closing
+
+
+def multipart_range_response(
+    method: str,
+    read_range: Callable[[int, int], AsyncIterator[bytes]],
+    ranges: list[tuple[int, int]],
+    size: int,
+    headers: dict[str, str],
+    media_type: str,
+) -> Response:
+    """
+    Builds a ``206 multipart/byteranges`` response for several byte ranges of one file (RFC 7233, appendix A).
+
+    Args:
+        method: Request method, a HEAD request gets the headers only
+        read_range: Returns the chunks of the inclusive range ``start``-``end``
+        ranges: Sorted, non-overlapping inclusive byte ranges
+        size: Full size of the file
+        headers: Response headers, ``content-length`` is added
+        media_type: Media type of the file, repeated in every part
+
+    Returns:
+        Streaming response with one part per range
+    """
+    boundary = uuid.uuid4().hex
+    part_headers = [
+        (
+            f"--{boundary}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode()
+        for start, end in ranges
+    ]
+    closing = f"--{boundary}--\r\n".encode()
+    content_length = (
+        sum(len(head) + (end - start + 1) + 2 for (start, end), head in zip(ranges, part_headers, strict=True))
+        + len(closing)
+    )
+    headers["content-length"] = str(content_length)
+    multipart_type = f"multipart/byteranges; boundary={boundary}"
+    if method == "HEAD":
+        return Response(status_code=206, headers=headers, media_type=multipart_type)
+    return StreamingResponse(
+        _multipart(read_range, ranges, part_headers, closing),
+        status_code=206,
+        headers=headers,
+        media_type=multipart_type,
+    )
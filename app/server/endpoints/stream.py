@@ -0,0 +1,167 @@
+import logging
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, HTTPException, Path, Request
+from fastapi.responses import Response, StreamingResponse
+
+from server.dependencies import get_read_session, get_settings, get_storage_backend
+from server.endpoints.responses import FileRangeResponse, multipart_range_response
+from server.storage_backends import BlobNotFoundError, CircuitOpenError, LocalStorageBackend, StorageError
+from server.streaming.base import (
+    RangeNotSatisfiableError,
+    Throttle,
+    blob_size,
+    cached_file,
+    create_throttle,
+    http_date,
+    if_range_matches,
+    iter_file_range,
+    make_etag,
+    parse_range_header,
+)
+from server.video.base import get_video_by_id
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+router = APIRouter()
+
+
+async def _throttled(chunks: AsyncIterator[bytes], throttle: Throttle | None) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        if throttle is not None:
+            await throttle.consume(len(chunk))
+        yield chunk
+
+
+async def _primed(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Pulls the first chunk before the response starts, so storage errors still map to a proper status code
+    """
+    try:
+        first = await anext(chunks)
+    except StopAsyncIteration:
+        first = b""
+    except BlobNotFoundError:
+        raise HTTPException(status_code=404, detail="Video file not found in storage")
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="Storage is temporarily unavailable")
+    except StorageError as e:
+        logger.error("Error streaming from storage: %s", str(e))
+        raise HTTPException(status_code=502, detail="Failed to read video from storage")
+
+    async def generator() -> AsyncIterator[bytes]:
+        if first:
+            yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return generator()
+
+
+@router.api_route("/videos/{video_id}/stream", methods=["GET", "HEAD"])
+async def stream_video(
+        request: Request,
+        video_id: int = Path(..., ge=1, description="Video ID"),
+):
+    """
+    Streams the video file through the server.
+
+    - **video_id**: Video ID
+
+    Supports `Range` (single and multiple byte ranges) and `If-Range` requests as described in RFC 7233,
+    so players can seek. Files present in the local stream cache (or in the local storage backend) are
+    read from disk in chunks, everything else is proxied from the storage backend in small fixed-size chunks.
+    """
+    read_session = get_read_session(request)
+    async with read_session() as session:
+        video = await get_video_by_id(session, video_id)
+    if not video and read_session is not request.app.state.db_session:
+        # Щойно зареєстроване відео могло ще не дійти до репліки
+        async with request.app.state.db_session() as session:
+            video = await get_video_by_id(session, video_id)
+    if not video:
+        raise HTTPException(
+            status_code=404,
+            detail="Video not found",
+        )
+
+    backend = get_storage_backend()
+    local_path = cached_file(video.file_path)
+    if local_path is None and isinstance(backend, LocalStorageBackend):
+        local_path = backend.local_path(video.file_path)
+
+    if local_path is not None:
+        size = local_path.stat().st_size
+    else:
+        # size_bytes приходить від клієнта під час реєстрації, тож довжину беремо від сховища
+        try:
+            size = await blob_size(backend, video.file_path)
+        except BlobNotFoundError:
+            raise HTTPException(status_code=404, detail="Video file not found in storage")
+        except CircuitOpenError:
+            raise HTTPException(status_code=503, detail="Storage is temporarily unavailable")
+        except StorageError as e:
+            logger.error("Error reading video metadata from storage: %s", str(e))
+            raise HTTPException(status_code=502, detail="Failed to read video from storage")
+
+    last_modified = video.updated_at or video.created_at
+    etag = make_etag(video.file_path, size)
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+    }
+    if last_modified is not None:
+        headers["last-modified"] = http_date(last_modified)
+
+    ranges = None
+    if if_range_matches(request.headers.get("if-range"), etag, last_modified):
+        try:
+            ranges = parse_range_header(request.headers.get("range"), size)
+        except RangeNotSatisfiableError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+
+    media_type = video.content_type or "application/octet-stream"
+    chunk_size = settings.stream_chunk_size
+    throttle = create_throttle()
+
+    def read_range(start: int, end: int) -> AsyncIterator[bytes]:
+        if local_path is not None:
+            chunks = iter_file_range(local_path, start, end, chunk_size)
+        elif start == 0 and end == size - 1:
+            chunks = backend.get_stream(video.file_path, chunk_size)
+        else:
+            chunks = backend.get_range(video.file_path, start, end, chunk_size)
+        return _throttled(chunks, throttle)
+
+    if ranges is not None and len(ranges) > 1:
+        return multipart_range_response(request.method, read_range, ranges, size, headers, media_type)
+
+    if ranges is None:
+        status_code, start, end = 200, 0, size - 1
+    else:
+        status_code, (start, end) = 206, ranges[0]
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+    count = max(end - start + 1, 0)
+    if local_path is not None:
+        return FileRangeResponse(
+            local_path,
+            offset=start,
+            count=count,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            throttle=throttle,
+        )
+
+    headers["content-length"] = str(count)
+    if request.method == "HEAD" or count == 0:
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+    return StreamingResponse(
+        await _primed(read_range(start, end)),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+    )
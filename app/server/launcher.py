@@ -0,0 +1,58 @@
+import importlib.util
+import logging
+import os
+
+import uvicorn
+
+from server.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def run_server(
+    settings: Settings,
+    workers: int | None = None,
+    host: str | None = None,
+    port: int | None = None,
+) -> None:
+    """
+    Runs the API under uvicorn with one process per worker.
+
+    The resolved worker count is exported as ``WEB_WORKERS`` before the workers are spawned,
+    so every worker sizes its DB pool to its share of ``DB_CONNECTION_BUDGET``.
+    """
+    workers = workers or settings.web_workers_count()
+    os.environ["WEB_WORKERS"] = str(workers)
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    settings = settings.model_copy(update={"web_workers": workers})
+    pool_size = settings.db_pool_size()
+    listeners = settings.db_listener_connections()
+    logger.info(
+        "Starting %s worker(s) on %s loop, DB pool of %s connection(s) per worker%s%s",
+        workers,
+        loop,
+        pool_size,
+        " plus a change listener connection" if listeners else "",
+        " (PgBouncer transaction pooling mode)" if settings.pgbouncer else "",
+    )
+    primary_connections = workers * (pool_size + listeners)
+    if primary_connections > settings.db_connection_budget:
+        logger.warning(
+            "%s worker(s) need at least %s connections to the primary, more than DB_CONNECTION_BUDGET=%s",
+            workers,
+            primary_connections,
+            settings.db_connection_budget,
+        )
+    if settings.psql_replica_host:
+        logger.info("Read replica pool of %s connection(s) per worker", settings.db_replica_pool_size())
+
+    uvicorn.run(
+        "server.app:app",
+        host=host or settings.web_host,
+        port=port or settings.web_port,
+        workers=workers,
+        loop=loop,
+        proxy_headers=True,
+        timeout_graceful_shutdown=settings.graceful_shutdown_timeout,
+    )
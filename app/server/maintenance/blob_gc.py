@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from server.storage_backends import BlobObject, StorageBackend, StorageError
+from server.storages import Video
+
+logger = logging.getLogger(__name__)
+
+# Колонки videos, що посилаються на блоби у сховищі
+BLOB_URL_COLUMNS = (Video.file_path, Video.thumbnail_path, Video.waveform_path)
+
+
+@dataclass
+class GcReport:
+    dry_run: bool
+    scanned: int = 0
+    referenced: int = 0
+    too_recent: int = 0
+    orphan_count: int = 0
+    orphan_bytes: int = 0
+    # Перелік сиріт зберігаємо лише для звіту в режимі dry-run
+    orphans: list[BlobObject] = field(default_factory=list)
+    deleted: int = 0
+    failed: int = 0
+
+    def summary(self) -> str:
+        action = "would delete" if self.dry_run else f"deleted {self.deleted}, failed {self.failed} of"
+        return (
+            f"scanned {self.scanned} blobs: {self.referenced} referenced, {self.too_recent} within grace period, "
+            f"{action} {self.orphan_count} orphans ({self.orphan_bytes / 1024**2:.1f} MiB)"
+        )
+
+
+async def find_referenced_urls(db: AsyncSession, urls: list[str]) -> set[str]:
+    """Returns the subset of ``urls`` referenced by any video, in a single query"""
+    if not urls:
+        return set()
+    query = union_all(*(select(column).where(column.in_(urls)) for column in BLOB_URL_COLUMNS))
+    result = await db.execute(query)
+    return set(result.scalars().all())
+
+
+class _RateLimiter:
+    def __init__(self, calls_per_second: float) -> None:
+        self.interval = 1 / calls_per_second if calls_per_second > 0 else 0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        if self._next > now:
+            await asyncio.sleep(self._next - now)
+        self._next = max(now, self._next) + self.interval
+
+
+async def collect_orphan_blobs(
+    db_session: async_sessionmaker[AsyncSession],
+    backend: StorageBackend,
+    grace_period: timedelta,
+    dry_run: bool = True,
+    prefix: str | None = None,
+    page_size: int = 1000,
+    batch_size: int = 100,
+    deletes_per_second: float = 2,
+) -> GcReport:
+    """
+    Deletes blobs that no video references.
+
+    Pages through the store listing; for every page one query finds which URLs are still referenced.
+    Blobs uploaded less than ``grace_period`` ago are kept, since they may belong to an upload that
+    has not been registered yet. Deletes are sent in batches of ``batch_size`` URLs, at most
+    ``deletes_per_second`` batches per second.
+    """
+    report = GcReport(dry_run=dry_run)
+    cutoff = datetime.now(UTC) - grace_period
+    limiter = _RateLimiter(deletes_per_second)
+    cursor = None
+
+    while True:
+        page = await backend.list_page(prefix=prefix, cursor=cursor, limit=page_size)
+        report.scanned += len(page.blobs)
+
+        async with db_session() as session:
+            referenced = await find_referenced_urls(session, [blob.url for blob in page.blobs])
+
+        page_orphans = []
+        for blob in page.blobs:
+            if blob.url in referenced:
+                report.referenced += 1
+            elif blob.uploaded_at is None or blob.uploaded_at > cutoff:
+                report.too_recent += 1
+            else:
+                page_orphans.append(blob)
+        report.orphan_count += len(page_orphans)
+        report.orphan_bytes += sum(blob.size for blob in page_orphans)
+
+        if dry_run:
+            report.orphans.extend(page_orphans)
+        else:
+            for offset in range(0, len(page_orphans), batch_size):
+                batch = [blob.url for blob in page_orphans[offset:offset + batch_size]]
+                await limiter.wait()
+                try:
+                    report.deleted += await backend.delete_many(batch)
+                except StorageError as e:
+                    logger.error("Failed to delete %s orphan blobs: %s", len(batch), e)
+                    report.failed += len(batch)
+
+        logger.info("GC progress: %s", report.summary())
+
+        cursor = page.cursor
+        if cursor is None:
+            return report
@@ -0,0 +1,108 @@
+import logging
+from dataclasses import dataclass, field
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from server.video.stats import adjust_video_stats
+
+logger = logging.getLogger(__name__)
+
+# Сюди переносяться видалені дублікати разом з історією завдань, щоб їх можна було переглянути або повернути
+ARCHIVE_TABLE = "archived_duplicate_videos"
+
+CREATE_ARCHIVE = text(
+    f"""
+    CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (
+        video_id integer PRIMARY KEY,
+        kept_video_id integer NOT NULL,
+        file_path varchar NOT NULL,
+        video jsonb NOT NULL,
+        processing_jobs jsonb NOT NULL,
+        archived_at timestamptz NOT NULL DEFAULT now()
+    )
+    """,
+)
+
+# Для кожного блоба лишаємо одне відео: готове, а серед однакових - найстаріше.
+# Сирий SQL, бо команда має працювати і на схемі до міграції f7a1d4e8b2c6
+FIND_DUPLICATES = text(
+    """
+    SELECT id, kept_id, file_path
+    FROM (
+        SELECT id, file_path,
+               first_value(id) OVER w AS kept_id,
+               row_number() OVER w AS position
+        FROM videos
+        WINDOW w AS (PARTITION BY file_path ORDER BY (status = 'ready') DESC, id)
+    ) ranked
+    WHERE position > 1
+    ORDER BY id
+    """,
+)
+
+ARCHIVE_DUPLICATES = text(
+    f"""
+    INSERT INTO {ARCHIVE_TABLE} (video_id, kept_video_id, file_path, video, processing_jobs)
+    SELECT v.id, d.kept_id, v.file_path, to_jsonb(v) - 'search_vector',
+           coalesce(
+               (SELECT jsonb_agg(to_jsonb(j) ORDER BY j.id) FROM video_processing_jobs j WHERE j.video_id = v.id),
+               '[]'::jsonb
+           )
+    FROM unnest(CAST(:video_ids AS integer[]), CAST(:kept_ids AS integer[])) AS d(id, kept_id)
+    JOIN videos v ON v.id = d.id
+    ON CONFLICT (video_id) DO NOTHING
+    """,
+)
+
+# Завдання дублікатів видаляє каскад, вони вже збережені в архіві
+DELETE_DUPLICATES = text("DELETE FROM videos WHERE id IN :video_ids").bindparams(
+    bindparam("video_ids", expanding=True),
+)
+
+
+@dataclass
+class DedupeReport:
+    dry_run: bool
+    # Пари (дублікат, відео, що лишається) для звіту
+    duplicates: list[tuple[int, int]] = field(default_factory=list)
+    blobs: set[str] = field(default_factory=set)
+
+    def summary(self) -> str:
+        action = "would archive" if self.dry_run else f"archived to {ARCHIVE_TABLE}"
+        return f"{action} {len(self.duplicates)} duplicate videos of {len(self.blobs)} blobs"
+
+
+async def dedupe_videos(db: AsyncSession, dry_run: bool = False) -> DedupeReport:
+    """
+    Archives and deletes videos registered more than once for the same blob.
+
+    One video per ``file_path`` is kept: a ready one, otherwise the oldest. Every other video is copied
+    with its processing jobs to ``archived_duplicate_videos`` and deleted in the same transaction,
+    and the statistics rollup is adjusted. Required before the unique index on ``file_path`` can be built.
+
+    Args:
+        db: Database session
+        dry_run: Only report the duplicates
+
+    Returns:
+        Report of the archived (or, in dry-run mode, found) duplicates
+    """
+    report = DedupeReport(dry_run=dry_run)
+    rows = (await db.execute(FIND_DUPLICATES)).all()
+    for row in rows:
+        report.duplicates.append((row.id, row.kept_id))
+        report.blobs.add(row.file_path)
+    if dry_run or not rows:
+        return report
+
+    video_ids = [video_id for video_id, _ in report.duplicates]
+    kept_ids = [kept_id for _, kept_id in report.duplicates]
+    await db.execute(CREATE_ARCHIVE)
+    await db.execute(ARCHIVE_DUPLICATES, {"video_ids": video_ids, "kept_ids": kept_ids})
+    await adjust_video_stats(db, video_ids, -1)
+    await db.execute(DELETE_DUPLICATES, {"video_ids": video_ids})
+    await db.commit()
+
+    logger.info("Archived %s duplicate videos to %s", len(video_ids), ARCHIVE_TABLE)
+    return report
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import logging
+import os
+import pathlib
+import time
+from collections.abc import Collection
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import Select, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from server.storages import Video
+from server.video.base import process_video
+
+logger = logging.getLogger(__name__)
+
+# Умови для --missing: відео, у яких результату етапу ще немає
+MISSING_CONDITIONS = {
+    "thumbnail": or_(Video.thumbnail_path.is_(None), Video.thumbnail_path == ""),
+    "duration": Video.duration.is_(None),
+    "waveform": Video.waveform_path.is_(None),
+}
+
+
+@dataclass
+class ReprocessFilter:
+    statuses: list[str] = field(default_factory=list)
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+    missing: list[str] = field(default_factory=list)
+
+    def apply(self, query: Select) -> Select:
+        if self.statuses:
+            query = query.where(Video.status.in_(self.statuses))
+        if self.created_after is not None:
+            query = query.where(Video.created_at >= self.created_after)
+        if self.created_before is not None:
+            query = query.where(Video.created_at < self.created_before)
+        if self.missing:
+            query = query.where(or_(*(MISSING_CONDITIONS[name] for name in self.missing)))
+        return query
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "statuses": sorted(self.statuses),
+            "created_after": self.created_after.isoformat() if self.created_after else None,
+            "created_before": self.created_before.isoformat() if self.created_before else None,
+            "missing": sorted(self.missing),
+        }
+
+
+@dataclass
+class Checkpoint:
+    """Progress of a reprocessing run, saved after every page so an interrupted run can resume"""
+
+    filters: dict[str, Any]
+    stages: list[str]
+    last_id: int = 0
+    processed: int = 0
+    failed: int = 0
+    failed_ids: list[int] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "Checkpoint | None":
+        if not path.exists():
+            return None
+        return cls(**json.loads(path.read_text()))
+
+    def save(self, path: pathlib.Path) -> None:
+        # Пишемо через тимчасовий файл, щоб перерваний запис не зіпсував чекпоінт
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(json.dumps(asdict(self), indent=2))
+        os.replace(tmp_path, path)
+
+
+def _format_progress(done: int, total: int, failed: int, elapsed: float) -> str:
+    rate = done / elapsed if elapsed > 0 else 0.0
+    eta = timedelta(seconds=round((total - done) / rate)) if rate > 0 else "unknown"
+    return f"{done}/{total} videos ({failed} failed), {rate:.2f} videos/s, ETA {eta}"
+
+
+async def count_videos(db: AsyncSession, filters: ReprocessFilter, after_id: int = 0) -> int:
+    query = filters.apply(select(func.count()).select_from(Video).where(Video.id > after_id))
+    return (await db.execute(query)).scalar_one()
+
+
+async def reprocess_videos(
+    db_session: async_sessionmaker[AsyncSession],
+    filters: ReprocessFilter,
+    stages: Collection[str],
+    checkpoint_path: pathlib.Path,
+    concurrency: int = 2,
+    page_size: int = 100,
+    restart: bool = False,
+) -> Checkpoint:
+    """
+    Runs the selected processing stages over every video matching ``filters``.
+
+    Videos are read in pages ordered by id (keyset pagination, ``id > last_id``), and each page is processed
+    with at most ``concurrency`` videos at once. After every page the last id is saved to ``checkpoint_path``;
+    a later run with the same filters and stages continues from there unless ``restart`` is set.
+    """
+    checkpoint = None if restart else Checkpoint.load(checkpoint_path)
+    if checkpoint is None:
+        checkpoint = Checkpoint(filters=filters.to_json(), stages=list(stages))
+    elif checkpoint.filters != filters.to_json() or checkpoint.stages != list(stages):
+        raise ValueError(
+            f"Checkpoint {checkpoint_path} was written for other filters or stages, use --restart to start over",
+        )
+    elif checkpoint.last_id:
+        logger.info("Resuming after video %s (%s already processed)", checkpoint.last_id, checkpoint.processed)
+
+    async with db_session() as session:
+        total = await count_videos(session, filters, checkpoint.last_id)
+    logger.info("Reprocessing %s videos, stages: %s", total, ", ".join(stages))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    done = failed = 0
+    started = time.monotonic()
+
+    async def process_one(video_id: int) -> bool:
+        async with semaphore, db_session() as session:
+            try:
+                await process_video(session, video_id, stages)
+            except HTTPException as e:
+                logger.error("Failed to reprocess video %s: %s", video_id, e.detail)
+                return False
+            except Exception:
+                # Помилка одного відео (база, сховище) не зупиняє пакет: воно потрапляє у failed_ids чекпоінту
+                logger.exception("Failed to reprocess video %s", video_id)
+                return False
+        return True
+
+    while True:
+        async with db_session() as session:
+            result = await session.execute(
+                filters.apply(select(Video.id).where(Video.id > checkpoint.last_id))
+                .order_by(Video.id)
+                .limit(page_size),
+            )
+            video_ids = list(result.scalars().all())
+        if not video_ids:
+            break
+
+        results = await asyncio.gather(*(process_one(video_id) for video_id in video_ids))
+
+        page_failed = [video_id for video_id, ok in zip(video_ids, results, strict=True) if not ok]
+        done += len(video_ids)
+        failed += len(page_failed)
+        checkpoint.last_id = video_ids[-1]
+        checkpoint.processed += len(video_ids) - len(page_failed)
+        checkpoint.failed += len(page_failed)
+        checkpoint.failed_ids.extend(page_failed)
+        checkpoint.save(checkpoint_path)
+
+        logger.info("Reprocess progress: %s", _format_progress(done, total, failed, time.monotonic() - started))
+
+    return checkpoint
@@ -0,0 +1,9 @@
+from .base import REGISTRY, Counter, Gauge, Registry
+
+
+__all__ = (
+    "REGISTRY",
+    "Counter",
+    "Gauge",
+    "Registry",
+)
@@ -1,3 +1,7 @@
+import os
+import uuid
+from typing import Any, Literal
+
 from pydantic import SecretStr, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -18,7 +22,67 @@ class Settings(BaseSettings):
     blob_store_id: str = Field(default="", alias="BLOB_STORE_ID")
     blob_api_url: str = Field(default="https://blob.vercel-storage.com")
     temp_dir: str = Field(default="./temp")
+    storage_backend: Literal["vercel", "local"] = Field(default="vercel")
+    local_storage_dir: str = Field(default="./storage")
+    local_storage_url: str = Field(default="http://localhost:8000/files")
+    blob_timeout: float = Field(default=30)  # seconds per blob operation (per chunk for downloads)
+    blob_retry_attempts: int = Field(default=3)
+    blob_retry_base_delay: float = Field(default=0.2)
+    blob_retry_max_delay: float = Field(default=5)
+    blob_hedge_delay: float = Field(default=0.5)  # start a second read after this many seconds, 0 = off
+    blob_circuit_failure_threshold: int = Field(default=5)
+    blob_circuit_reset_timeout: float = Field(default=30)
+    loop_monitor_enabled: bool = Field(default=False)
+    loop_monitor_interval: float = Field(default=0.05)  # seconds between lag samples
+    loop_block_threshold_ms: int = Field(default=100)
+    processing_concurrency: int = Field(default=2)  # videos processed at once by batch jobs
+    waveform_peaks_per_second: int = Field(default=100)  # 0 = do not generate waveforms
+    waveform_bits: Literal[8, 16] = Field(default=8)
+    stream_chunk_size: int = Field(default=64 * 1024)
+    stream_rate_limit: int = Field(default=0)  # bytes per second per connection, 0 = unlimited
+    stream_cache_dir: str = Field(default="")  # empty = local stream cache disabled
+    stream_cache_max_bytes: int = Field(default=10 * 1024**3)
     psql: PostgresSettings = PostgresSettings(_env_prefix="PSQL_")
+    web_host: str = Field(default="0.0.0.0")  # noqa: S104
+    web_port: int = Field(default=8000)
+    web_workers: int = Field(default=0)  # 0 = one worker per CPU
+    graceful_shutdown_timeout: int = Field(default=30)
+    db_connection_budget: int = Field(default=100)  # total connections across all workers
+    pgbouncer: bool = Field(default=False)  # PgBouncer in transaction pooling mode in front of Postgres
+    psql_replica_host: str = Field(default="")  # empty = no read replica, all reads go to the primary
+    psql_replica_port: int = Field(default=0)  # 0 = same port as the primary
+    db_replica_connection_budget: int = Field(default=0)  # total connections to the replica, 0 = DB_CONNECTION_BUDGET
+    replica_max_lag: float = Field(default=5)  # seconds; a replica further behind is not used for reads
+    replica_lag_check_interval: float = Field(default=2)
+    video_cache_size: int = Field(default=10_000)  # video records cached per worker, 0 = disabled
+    stats_reconcile_interval: float = Field(default=0)  # seconds between rollup reconciliations (full scan), 0 = off
+
+    def web_workers_count(self) -> int:
+        return self.web_workers or os.cpu_count() or 1
+
+    def db_listener_connections(self) -> int:
+        """Connections to the primary that every worker holds outside its pool (LISTEN of the video cache)"""
+        return 1 if self.video_cache_size > 0 and not self.pgbouncer else 0
+
+    def db_pool_size(self) -> int:
+        # Частка воркера в бюджеті включає і з'єднання слухача, тож пулу лишається на нього менше
+        return max(1, self.db_connection_budget // self.web_workers_count() - self.db_listener_connections())
+
+    def db_replica_pool_size(self) -> int:
+        # Репліка - окремий сервер зі своїм max_connections, тож ділимо її власний бюджет
+        budget = self.db_replica_connection_budget or self.db_connection_budget
+        return max(1, budget // self.web_workers_count())
+
+    def psql_connect_args(self) -> dict[str, Any]:
+        if not self.pgbouncer:
+            return {}
+        # Transaction pooling hands every transaction to an arbitrary server connection,
+        # so prepared statements must be neither cached nor reused by name
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
 
     def psql_dsn(self) -> URL:
         return URL.create(
@@ -30,3 +94,11 @@ class Settings(BaseSettings):
             database=self.psql.db,
         )
 
+    def psql_replica_dsn(self) -> URL | None:
+        if not self.psql_replica_host:
+            return None
+        # Репліка використовує ті самі облікові дані та базу, що й основний сервер
+        return self.psql_dsn().set(
+            host=self.psql_replica_host,
+            port=self.psql_replica_port or self.psql.port,
+        )
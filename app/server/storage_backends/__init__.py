@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .base import BlobNotFoundError, BlobObject, BlobPage, StorageBackend, StorageError
+from .local import LocalStorageBackend
+from .resilient import CircuitBreaker, CircuitOpenError, ResilientStorageBackend, RetryPolicy
+from .vercel import VercelStorageBackend
+
+if TYPE_CHECKING:
+    from server.settings import Settings
+
+
+def create_storage_backend(settings: Settings) -> StorageBackend:
+    if settings.storage_backend == "local":
+        return LocalStorageBackend(settings.local_storage_dir, settings.local_storage_url)
+    return ResilientStorageBackend(
+        VercelStorageBackend(token=settings.blob_read_write_token),
+        retry_policy=RetryPolicy(
+            attempts=settings.blob_retry_attempts,
+            base_delay=settings.blob_retry_base_delay,
+            max_delay=settings.blob_retry_max_delay,
+        ),
+        timeout=settings.blob_timeout,
+        hedge_delay=settings.blob_hedge_delay,
+        breaker=CircuitBreaker(
+            "vercel",
+            failure_threshold=settings.blob_circuit_failure_threshold,
+            reset_timeout=settings.blob_circuit_reset_timeout,
+        ),
+    )
+
+
+__all__ = (
+    "BlobNotFoundError",
+    "BlobObject",
+    "BlobPage",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "LocalStorageBackend",
+    "ResilientStorageBackend",
+    "RetryPolicy",
+    "StorageBackend",
+    "StorageError",
+    "VercelStorageBackend",
+    "create_storage_backend",
+)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import abc
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageError(Exception):
+    """
+    Raised by storage backends when an operation against the store fails.
+
+    ``retryable`` is False for failures that will not go away on retry (e.g. a 4xx response).
+    """
+
+    def __init__(self, message: str = "", retryable: bool = True) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class BlobNotFoundError(StorageError):
+    """Raised when the requested blob does not exist in the store"""
+
+    def __init__(self, message: str = "") -> None:
+        super().__init__(message, retryable=False)
+
+
+@dataclass(frozen=True, slots=True)
+class BlobObject:
+    url: str
+    pathname: str
+    size: int
+    uploaded_at: datetime | None = None
+    content_type: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class BlobPage:
+    blobs: list[BlobObject]
+    cursor: str | None = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.cursor is not None
+
+
+class StorageBackend(abc.ABC):
+    """
+    Interface of a blob store.
+
+    Blobs are addressed by the public URL returned from ``put_stream``; that URL is what
+    gets persisted in ``Video.file_path`` / ``Video.thumbnail_path``.
+    """
+
+    name: str = "abstract"
+
+    @abc.abstractmethod
+    async def put_stream(
+        self,
+        pathname: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+    ) -> dict[str, Any]:
+        """
+        Stores a blob under ``pathname``
+
+        Returns:
+            Dict with ``url``, ``pathname``, ``content_type`` and ``size_bytes`` keys
+
+        """
+
+    @abc.abstractmethod
+    def get_stream(self, url: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Yields the whole blob in chunks of at most ``chunk_size`` bytes"""
+
+    @abc.abstractmethod
+    def get_range(
+        self,
+        url: str,
+        start: int,
+        end: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """Yields bytes ``start..end`` (both inclusive) of the blob"""
+
+    @abc.abstractmethod
+    async def head(self, url: str) -> BlobObject:
+        """Returns blob metadata, raises ``BlobNotFoundError`` if it does not exist"""
+
+    @abc.abstractmethod
+    async def delete_many(self, urls: Iterable[str]) -> int:
+        """Deletes blobs by URL and returns the number of URLs submitted for deletion"""
+
+    @abc.abstractmethod
+    async def list_page(self, prefix: str | None = None, cursor: str | None = None, limit: int = 1000) -> BlobPage:
+        """Returns one page of the store listing, ``BlobPage.cursor`` is None on the last page"""
+
+    async def close(self) -> None:  # noqa: B027
+        """Releases pooled resources held by the backend"""
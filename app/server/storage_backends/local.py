@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import itertools
+import os
+import pathlib
+import uuid
+from collections.abc import AsyncIterator, Iterable, Iterator
+from datetime import UTC, datetime
+from typing import Any
+
+import aiofiles
+
+from server.storage_backends.base import (
+    DEFAULT_CHUNK_SIZE,
+    BlobNotFoundError,
+    BlobObject,
+    BlobPage,
+    StorageBackend,
+    StorageError,
+)
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Stores blobs on the local filesystem under ``root``.
+
+    Blob URLs are ``{base_url}/{pathname}``; the ``/files`` endpoint serves them from disk.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str, base_url: str) -> None:
+        self.root = pathlib.Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url.rstrip("/")
+        # Відсортовані вмісти каталогів для list_page: {каталог: (mtime_ns, імена)}
+        self._listings: dict[pathlib.Path, tuple[int, list[str]]] = {}
+
+    def url_for(self, pathname: str) -> str:
+        return f"{self.base_url}/{pathname}"
+
+    def path_for(self, pathname: str) -> pathlib.Path:
+        path = (self.root / pathname).resolve()
+        if not path.is_relative_to(self.root) or path == self.root:
+            raise BlobNotFoundError(pathname)
+        return path
+
+    def local_path(self, url: str) -> pathlib.Path | None:
+        """Returns the file backing ``url`` if the URL belongs to this backend and the file exists"""
+        prefix = f"{self.base_url}/"
+        if not url.startswith(prefix):
+            return None
+        try:
+            path = self.path_for(url.removeprefix(prefix))
+        except BlobNotFoundError:
+            return None
+        return path if path.is_file() else None
+
+    def _existing_path(self, url: str) -> pathlib.Path:
+        path = self.local_path(url)
+        if path is None:
+            raise BlobNotFoundError(url)
+        return path
+
+    async def put_stream(
+        self,
+        pathname: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+    ) -> dict[str, Any]:
+        path = self.path_for(pathname)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write into a sibling temp file so readers never see a partially written blob
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+        size = 0
+        try:
+            async with aiofiles.open(temp_path, "wb") as out_file:
+                async for chunk in chunks:
+                    await out_file.write(chunk)
+                    size += len(chunk)
+            await asyncio.to_thread(os.replace, temp_path, path)
+        except OSError as e:
+            temp_path.unlink(missing_ok=True)
+            raise StorageError(f"Failed to store {pathname}: {e!s}") from e
+
+        return {
+            "url": self.url_for(pathname),
+            "pathname": pathname,
+            "content_type": content_type,
+            "size_bytes": size,
+        }
+
+    async def get_stream(self, url: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        async with aiofiles.open(self._existing_path(url), "rb") as in_file:
+            while chunk := await in_file.read(chunk_size):
+                yield chunk
+
+    async def get_range(
+        self,
+        url: str,
+        start: int,
+        end: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        remaining = end - start + 1
+        async with aiofiles.open(self._existing_path(url), "rb") as in_file:
+            await in_file.seek(start)
+            while remaining > 0:
+                chunk = await in_file.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    async def head(self, url: str) -> BlobObject:
+        path = self._existing_path(url)
+        stat = await asyncio.to_thread(path.stat)
+        return BlobObject(
+            url=url,
+            pathname=path.relative_to(self.root).as_posix(),
+            size=stat.st_size,
+            uploaded_at=datetime.fromtimestamp(stat.st_mtime, tz=UTC),
+        )
+
+    async def delete_many(self, urls: Iterable[str]) -> int:
+        paths = [path for path in map(self.local_path, urls) if path is not None]
+        for path in paths:
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+        return len(paths)
+
+    def _sorted_entries(self, directory: pathlib.Path) -> list[str]:
+        """
+        Names in ``directory`` sorted so that a depth-first walk yields pathnames in lexicographic order.
+
+        Directories are keyed as ``name/``, which places their contents exactly where the full pathnames
+        sort. The listing is cached until the directory's mtime changes, so paging through an unchanged
+        directory does not read and sort it again for every page.
+        """
+        mtime = directory.stat().st_mtime_ns
+        cached = self._listings.get(directory)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with os.scandir(directory) as entries:
+            keys = sorted(
+                f"{entry.name}/" if entry.is_dir(follow_symlinks=False) else entry.name
+                for entry in entries
+                if not entry.name.endswith(".part")
+            )
+        self._listings[directory] = (mtime, keys)
+        return keys
+
+    def _iter_pathnames(self, directory: pathlib.Path, base: str, prefix: str, cursor: str) -> Iterator[str]:
+        """Yields pathnames under ``directory`` after ``cursor`` in lexicographic order, skipping other subtrees"""
+        try:
+            keys = self._sorted_entries(directory)
+        except FileNotFoundError:
+            return
+
+        # Переходимо одразу до курсора; каталог, у якому лежить курсор, сортується перед ним, тож крок назад
+        start = 0
+        if cursor.startswith(base):
+            start = bisect.bisect_left(keys, cursor[len(base):])
+            if start > 0 and keys[start - 1].endswith("/") and cursor[len(base):].startswith(keys[start - 1]):
+                start -= 1
+        elif cursor > base:
+            return
+
+        for key in itertools.islice(keys, start, None):
+            pathname = base + key
+            if not (pathname.startswith(prefix) or prefix.startswith(pathname)):
+                if pathname > prefix:
+                    return
+                continue
+            if key.endswith("/"):
+                yield from self._iter_pathnames(directory / key[:-1], pathname, prefix, cursor)
+            elif pathname > cursor and (directory / key).is_file():
+                yield pathname
+
+    def _list_sync(self, prefix: str | None, cursor: str | None, limit: int) -> BlobPage:
+        pathnames = list(itertools.islice(self._iter_pathnames(self.root, "", prefix or "", cursor or ""), limit + 1))
+
+        page = pathnames[:limit]
+        blobs = []
+        for pathname in page:
+            try:
+                stat = (self.root / pathname).stat()
+            except FileNotFoundError:
+                continue
+            blobs.append(
+                BlobObject(
+                    url=self.url_for(pathname),
+                    pathname=pathname,
+                    size=stat.st_size,
+                    uploaded_at=datetime.fromtimestamp(stat.st_mtime, tz=UTC),
+                ),
+            )
+
+        return BlobPage(blobs=blobs, cursor=page[-1] if len(pathnames) > limit else None)
+
+    async def list_page(self, prefix: str | None = None, cursor: str | None = None, limit: int = 1000) -> BlobPage:
+        return await asyncio.to_thread(self._list_sync, prefix, cursor, limit)
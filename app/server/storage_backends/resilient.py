@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import asyncio
+import enum
+import logging
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from server.metrics import Counter, Gauge
+from server.storage_backends.base import (
+    DEFAULT_CHUNK_SIZE,
+    BlobObject,
+    BlobPage,
+    StorageBackend,
+    StorageError,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STORAGE_CALLS = Counter(
+    "storage_calls_total",
+    "Storage backend calls by operation and outcome",
+    ["backend", "operation", "outcome"],
+)
+STORAGE_RETRIES = Counter("storage_retries_total", "Storage backend call retries", ["backend", "operation"])
+STORAGE_HEDGES = Counter("storage_hedged_requests_total", "Hedged storage reads started", ["backend", "operation"])
+CIRCUIT_STATE = Gauge("storage_circuit_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open", ["backend"])
+CIRCUIT_TRANSITIONS = Counter(
+    "storage_circuit_transitions_total",
+    "Circuit breaker state transitions",
+    ["backend", "state"],
+)
+
+
+class CircuitOpenError(StorageError):
+    """Raised without calling the store while the circuit breaker is open"""
+
+    def __init__(self, message: str = "") -> None:
+        super().__init__(message, retryable=False)
+
+
+class CircuitState(enum.IntEnum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 5.0
+
+    def delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given (zero based) attempt"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))  # noqa: S311
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and rejects calls for ``reset_timeout`` seconds,
+    then lets a single probe call through (half-open) to decide whether to close again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        CIRCUIT_STATE.set(self.state, backend=name)
+
+    def _transition(self, state: CircuitState) -> None:
+        if state == self.state:
+            return
+        logger.warning("Storage circuit breaker for %s: %s -> %s", self.name, self.state.name, state.name)
+        self.state = state
+        CIRCUIT_STATE.set(state, backend=self.name)
+        CIRCUIT_TRANSITIONS.inc(backend=self.name, state=state.name.lower())
+
+    def before_call(self) -> None:
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"Storage backend {self.name} is unavailable")
+            self._transition(CircuitState.HALF_OPEN)
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpenError(f"Storage backend {self.name} is unavailable")
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probe_in_flight = False
+        self._transition(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self.state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._transition(CircuitState.OPEN)
+
+    def record_cancelled(self) -> None:
+        """
+        Releases a call that was cancelled before the store answered.
+
+        A cancelled probe proves nothing about the store, so the breaker goes back to open and waits for the
+        next probe; in the closed state a cancellation (e.g. a client that went away) is not a failure.
+        """
+        if self.state == CircuitState.HALF_OPEN:
+            self.record_failure()
+
+
+async def _first_completed(tasks: list[asyncio.Task[T]]) -> T:
+    """Returns the result of the first task to succeed; raises the last error if all of them fail"""
+    pending = set(tasks)
+    error: BaseException | None = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                return task.result()
+            error = task.exception()
+    raise error  # type: ignore[misc]
+
+
+class ResilientStorageBackend(StorageBackend):
+    """
+    Wraps another backend with per-operation timeouts, retries, hedged reads and a circuit breaker.
+
+    - Idempotent operations (reads, listing, delete) are retried with jittered exponential backoff
+      when the failure is retryable. Uploads consume a one-shot stream, so they are never retried.
+    - Reads that have not answered within ``hedge_delay`` get a second, parallel request; the first
+      one to answer wins. For streams this covers the time to the first chunk.
+    - Every operation except uploads is bounded by ``timeout`` (for streams: the wait for each chunk).
+    - After repeated failures the circuit opens and calls fail fast with ``CircuitOpenError``.
+    """
+
+    def __init__(
+        self,
+        inner: StorageBackend,
+        retry_policy: RetryPolicy | None = None,
+        timeout: float = 30,
+        hedge_delay: float = 0,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.inner = inner
+        self.name = inner.name
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.breaker = breaker or CircuitBreaker(inner.name)
+
+    async def _attempt(
+        self,
+        operation: str,
+        call: Callable[[], Awaitable[T]],
+        hedged: bool,
+        timeout: float | None,
+    ) -> T:
+        if not hedged or self.hedge_delay <= 0:
+            async with asyncio.timeout(timeout):
+                return await call()
+
+        tasks = [asyncio.ensure_future(call())]
+        try:
+            async with asyncio.timeout(timeout):
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+                if not done:
+                    STORAGE_HEDGES.inc(backend=self.name, operation=operation)
+                    tasks.append(asyncio.ensure_future(call()))
+                return await _first_completed(tasks)
+        finally:
+            # Скасовуємо запит, що програв, і чекаємо, поки він звільнить з'єднання
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _call(
+        self,
+        operation: str,
+        call: Callable[[], Awaitable[T]],
+        idempotent: bool = True,
+        hedged: bool = False,
+        unbounded: bool = False,
+    ) -> T:
+        timeout = None if unbounded else self.timeout
+        attempts = self.retry_policy.attempts if idempotent else 1
+        for attempt in range(attempts):
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                STORAGE_CALLS.inc(backend=self.name, operation=operation, outcome="rejected")
+                raise
+            try:
+                result = await self._attempt(operation, call, hedged, timeout)
+            except TimeoutError:
+                error: StorageError = StorageError(f"{operation} timed out after {timeout}s")
+            except StorageError as e:
+                if not e.retryable:
+                    # Відповідь від сховища отримано (наприклад, 404), тож воно працює
+                    self.breaker.record_success()
+                    STORAGE_CALLS.inc(backend=self.name, operation=operation, outcome="error")
+                    raise
+                error = e
+            except asyncio.CancelledError:
+                # Інакше пробний виклик у half-open так і лишиться "в польоті" і запобіжник застрягне
+                self.breaker.record_cancelled()
+                STORAGE_CALLS.inc(backend=self.name, operation=operation, outcome="cancelled")
+                raise
+            except Exception:
+                self.breaker.record_failure()
+                STORAGE_CALLS.inc(backend=self.name, operation=operation, outcome="error")
+                raise
+            else:
+                self.breaker.record_success()
+                STORAGE_CALLS.inc(backend=self.name, operation=operation, outcome="ok")
+                return result
+
+            self.breaker.record_failure()
+            if attempt + 1 >= attempts:
+                STORAGE_CALLS.inc(backend=self.name, operation=operation, outcome="error")
+                raise error
+
+            delay = self.retry_policy.delay(attempt)
+            logger.warning("Storage %s failed (%s), retrying in %.2fs", operation, error, delay)
+            STORAGE_RETRIES.inc(backend=self.name, operation=operation)
+            await asyncio.sleep(delay)
+
+        raise AssertionError("unreachable")
+
+    async def _stream(self, operation: str, open_stream: Callable[[], AsyncIterator[bytes]]) -> AsyncIterator[bytes]:
+        """Retries and hedges opening the stream (up to the first chunk), then relays the rest"""
+        opened: list[AsyncIterator[bytes]] = []
+
+        async def first_chunk() -> tuple[AsyncIterator[bytes], bytes]:
+            chunks = open_stream()
+            opened.append(chunks)
+            try:
+                return chunks, await anext(chunks)
+            except StopAsyncIteration:
+                return chunks, b""
+
+        chunks, first = await self._call(operation, first_chunk, hedged=True)
+        try:
+            # Закриваємо потоки, що програли в хеджуванні або впали при повторах
+            for other in opened:
+                if other is not chunks:
+                    await other.aclose()  # type: ignore[attr-defined]
+
+            if first:
+                yield first
+            while True:
+                try:
+                    async with asyncio.timeout(self.timeout):
+                        chunk = await anext(chunks)
+                except StopAsyncIteration:
+                    return
+                except TimeoutError as e:
+                    raise StorageError(f"{operation} stalled for {self.timeout}s") from e
+                yield chunk
+        finally:
+            await chunks.aclose()  # type: ignore[attr-defined]
+
+    async def put_stream(
+        self,
+        pathname: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+    ) -> dict[str, Any]:
+        return await self._call(
+            "put",
+            lambda: self.inner.put_stream(pathname, chunks, content_type),
+            idempotent=False,
+            unbounded=True,  # завантаження великих відео може тривати довго
+        )
+
+    def get_stream(self, url: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        return self._stream("get", lambda: self.inner.get_stream(url, chunk_size))
+
+    def get_range(
+        self,
+        url: str,
+        start: int,
+        end: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        return self._stream("get_range", lambda: self.inner.get_range(url, start, end, chunk_size))
+
+    async def head(self, url: str) -> BlobObject:
+        return await self._call("head", lambda: self.inner.head(url), hedged=True)
+
+    async def delete_many(self, urls: Iterable[str]) -> int:
+        urls = list(urls)
+        return await self._call("delete", lambda: self.inner.delete_many(urls))
+
+    async def list_page(self, prefix: str | None = None, cursor: str | None = None, limit: int = 1000) -> BlobPage:
+        return await self._call("list", lambda: self.inner.list_page(prefix, cursor, limit))
+
+    async def close(self) -> None:
+        await self.inner.close()
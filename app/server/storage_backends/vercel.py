@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Iterable
+from datetime import datetime
+from typing import Any
+
+import aiohttp
+
+from server.storage_backends.base import (
+    DEFAULT_CHUNK_SIZE,
+    BlobNotFoundError,
+    BlobObject,
+    BlobPage,
+    StorageBackend,
+    StorageError,
+)
+
+try:
+    from vercel_blob import delete as delete_blob
+    from vercel_blob import head as head_blob
+    from vercel_blob import list as list_blobs
+    from vercel_blob import put
+    VERCEL_BLOB_AVAILABLE = True
+except ImportError:
+    VERCEL_BLOB_AVAILABLE = False
+    logging.exception("Vercel Blob package is not installed")
+
+logger = logging.getLogger(__name__)
+
+# Vercel Blob API accepts at most 1000 URLs per delete call
+DELETE_BATCH_SIZE = 1000
+
+# Статуси, після яких повторний запит має шанс на успіх
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def _parse_uploaded_at(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class VercelStorageBackend(StorageBackend):
+    """
+    Vercel Blob Storage backend.
+
+    Metadata calls go through the official SDK (which is synchronous, so they run in a thread),
+    downloads go through a pooled aiohttp client.
+    """
+
+    name = "vercel"
+
+    def __init__(self, token: str = "", pool_size: int = 100) -> None:
+        self._token = token
+        self._pool_size = pool_size
+        self._session: aiohttp.ClientSession | None = None
+
+    def _options(self, **options: Any) -> dict[str, Any]:
+        if self._token:
+            options["token"] = self._token
+        return options
+
+    @staticmethod
+    def _ensure_sdk() -> None:
+        if not VERCEL_BLOB_AVAILABLE:
+            raise StorageError("vercel_blob package is not installed")
+
+    def _http(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._pool_size, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60),
+            )
+        return self._session
+
+    async def put_stream(
+        self,
+        pathname: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+    ) -> dict[str, Any]:
+        self._ensure_sdk()
+
+        # The SDK uploads a single request body, so the stream has to be buffered here
+        buffer = bytearray()
+        async for chunk in chunks:
+            buffer.extend(chunk)
+
+        try:
+            result = await asyncio.to_thread(
+                put,
+                pathname,
+                bytes(buffer),
+                self._options(contentType=content_type, access="public"),
+            )
+        except Exception as e:
+            raise StorageError(f"Failed to upload {pathname}: {e!s}") from e
+
+        return {
+            "url": result["url"],
+            "pathname": result["pathname"],
+            "content_type": content_type,
+            "size_bytes": len(buffer),
+        }
+
+    async def get_stream(self, url: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        try:
+            async with self._http().get(url) as response:
+                if response.status == 404:  # noqa: PLR2004
+                    raise BlobNotFoundError(url)
+                if response.status != 200:  # noqa: PLR2004
+                    raise StorageError(
+                        f"Failed to download {url}: status {response.status}",
+                        retryable=response.status in RETRYABLE_STATUSES,
+                    )
+
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    yield chunk
+        except aiohttp.ClientError as e:
+            raise StorageError(f"Failed to download {url}: {e!s}") from e
+
+    async def get_range(
+        self,
+        url: str,
+        start: int,
+        end: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        headers = {"Range": f"bytes={start}-{end}"}
+        try:
+            async with self._http().get(url, headers=headers) as response:
+                if response.status == 404:  # noqa: PLR2004
+                    raise BlobNotFoundError(url)
+                if response.status != 206:  # noqa: PLR2004
+                    raise StorageError(
+                        f"Failed to download range {start}-{end} of {url}: status {response.status}",
+                        retryable=response.status in RETRYABLE_STATUSES,
+                    )
+
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    yield chunk
+        except aiohttp.ClientError as e:
+            raise StorageError(f"Failed to download range {start}-{end} of {url}: {e!s}") from e
+
+    async def head(self, url: str) -> BlobObject:
+        self._ensure_sdk()
+        try:
+            result = await asyncio.to_thread(head_blob, url, self._options())
+        except Exception as e:
+            raise StorageError(f"Failed to fetch metadata of {url}: {e!s}") from e
+
+        if not result or "size" not in result:
+            raise BlobNotFoundError(url)
+
+        return BlobObject(
+            url=result.get("url", url),
+            pathname=result.get("pathname", ""),
+            size=int(result["size"]),
+            uploaded_at=_parse_uploaded_at(result.get("uploadedAt")),
+            content_type=result.get("contentType"),
+        )
+
+    async def delete_many(self, urls: Iterable[str]) -> int:
+        self._ensure_sdk()
+        urls = list(urls)
+        deleted = 0
+        for offset in range(0, len(urls), DELETE_BATCH_SIZE):
+            batch = urls[offset:offset + DELETE_BATCH_SIZE]
+            try:
+                await asyncio.to_thread(delete_blob, batch, self._options())
+            except Exception as e:
+                raise StorageError(f"Failed to delete {len(batch)} blobs: {e!s}") from e
+            deleted += len(batch)
+
+        return deleted
+
+    async def list_page(self, prefix: str | None = None, cursor: str | None = None, limit: int = 1000) -> BlobPage:
+        self._ensure_sdk()
+        options = self._options(limit=str(limit))
+        if prefix:
+            options["prefix"] = prefix
+        if cursor:
+            options["cursor"] = cursor
+
+        try:
+            result = await asyncio.to_thread(list_blobs, options)
+        except Exception as e:
+            raise StorageError(f"Failed to list blobs: {e!s}") from e
+
+        blobs = [
+            BlobObject(
+                url=blob["url"],
+                pathname=blob.get("pathname", ""),
+                size=int(blob.get("size", 0)),
+                uploaded_at=_parse_uploaded_at(blob.get("uploadedAt")),
+            )
+            for blob in result.get("blobs", [])
+        ]
+        return BlobPage(blobs=blobs, cursor=result.get("cursor") if result.get("hasMore") else None)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
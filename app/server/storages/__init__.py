@@ -1,10 +1,11 @@
 from .base import Base, close_db, create_db_session_pool, init_db
-from .models import Video, VideoProcessingJob
+from .models import Video, VideoProcessingJob, VideoStat
 
 
 __all__ = (
     "Video",
     "VideoProcessingJob",
+    "VideoStat",
     "Base",
     "close_db",
     "create_db_session_pool",
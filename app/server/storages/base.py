@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import text
+from sqlalchemy import URL, text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -18,8 +18,20 @@ class Base(DeclarativeBase):
         return f"{self.__tablename__}({values})"
 
 
-async def create_db_session_pool(settings: Settings) -> tuple[AsyncEngine, async_sessionmaker[AsyncSession]]:
-    engine: AsyncEngine = create_async_engine(settings.psql_dsn(), echo=settings.dev, max_overflow=10, pool_size=100)
+async def create_db_session_pool(
+    settings: Settings,
+    dsn: URL | None = None,
+    pool_size: int | None = None,
+) -> tuple[AsyncEngine, async_sessionmaker[AsyncSession]]:
+    # dsn дозволяє створити пул до іншого сервера з тими ж налаштуваннями, наприклад до репліки
+    # Кожен воркер отримує свою частку загального бюджету з'єднань, щоб не вичерпати max_connections у Postgres
+    engine: AsyncEngine = create_async_engine(
+        dsn or settings.psql_dsn(),
+        echo=settings.dev,
+        pool_size=pool_size or settings.db_pool_size(),
+        max_overflow=0,
+        connect_args=settings.psql_connect_args(),
+    )
 
     return engine, async_sessionmaker(engine, expire_on_commit=False)
 
@@ -28,6 +40,7 @@ async def init_db(engine: AsyncEngine) -> None:
     async with engine.begin() as conn:
         stmt = text("CREATE EXTENSION IF NOT EXISTS citext;")
         await conn.execute(stmt)
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
 
         await conn.run_sync(Base.metadata.create_all)
 
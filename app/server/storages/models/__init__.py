@@ -1,4 +1,5 @@
 from .video import Video
 from .video_processing import VideoProcessingJob
+from .video_stats import VideoStat
 
-__all__ = ("Video", "VideoProcessingJob")
\ No newline at end of file
+__all__ = ("Video", "VideoProcessingJob", "VideoStat")
\ No newline at end of file
@@ -1,16 +1,22 @@
-from sqlalchemy import Column, Integer, String, BigInteger, Boolean, DateTime, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, BigInteger, Boolean, DateTime, Computed, Index, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from server.storages import Base
 
 
 class Video(Base):
     __tablename__ = "videos"
+    __table_args__ = (
+        Index("ix_videos_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_videos_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
-    file_path = Column(String, nullable=False)
-    thumbnail_path = Column(String, nullable=False)
+    file_path = Column(String, nullable=False, unique=True, index=True)
+    thumbnail_path = Column(String, nullable=False, index=True)
+    waveform_path = Column(String, nullable=True, index=True)  # Піки звукової хвилі у форматі audiowaveform .dat
     content_type = Column(String, nullable=False)
     size_bytes = Column(BigInteger, nullable=False)
     duration = Column(Integer, nullable=True)
@@ -23,4 +29,12 @@ class Video(Base):
     # Зв'язок з таблицею video_processing_jobs
     processing_jobs = relationship("VideoProcessingJob", back_populates="video", cascade="all, delete-orphan")
     video_uuid = Column(String(100), nullable=True)  # UUID видео для связи с хранилищем
-    parts_count = Column(Integer, default=0)
\ No newline at end of file
+    parts_count = Column(Integer, default=0)
+    # Ключ із заголовка Idempotency-Key, з яким відео зареєстрували
+    idempotency_key = Column(String, nullable=True, unique=True, index=True)
+    # SHA-256 запиту, з яким прийшов ключ: той самий ключ з іншим запитом - помилка клієнта, а не повтор
+    idempotency_fingerprint = Column(String(64), nullable=True)
+    # Повнотекстовий індекс назви, генерується самим Postgres. Відкладене завантаження, щоб ORM його не тягнув
+    search_vector = deferred(
+        Column(TSVECTOR, Computed("to_tsvector('simple', coalesce(title, ''))", persisted=True), nullable=True),
+    )
@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, String
+
+from server.storages import Base
+
+
+class VideoStat(Base):
+    """Агреговані показники каталогу: кількість, розмір і тривалість відео в розрізі одного виміру"""
+
+    __tablename__ = "video_stats"
+
+    # total (key = ""), status, content_type або day (key = дата створення в UTC, YYYY-MM-DD)
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+    size_bytes = Column(BigInteger, nullable=False, default=0)
+    duration = Column(BigInteger, nullable=False, default=0)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
 
@@ -18,6 +18,7 @@ class VideoResponse(BaseSchema):
     title: str
     thumbnail_path: str
     file_path: str
+    waveform_path: Optional[str] = None
     status: str
     duration: Optional[int] = None
     upload_completed: bool
@@ -43,4 +44,23 @@ class VideoProcessingStatus(BaseSchema):
 class VideoUploadResponse(BaseSchema):
     id: int
     title: str
-    message: str = "Video upload initiated successfully"
\ No newline at end of file
+    job_id: Optional[int] = None
+    message: str = "Video upload initiated successfully"
+
+
+class VideoStatsBucket(BaseSchema):
+    count: int
+    size_bytes: int
+    duration: int
+
+
+class VideoStatsResponse(BaseSchema):
+    total: VideoStatsBucket
+    by_status: Dict[str, VideoStatsBucket]
+    by_content_type: Dict[str, VideoStatsBucket]
+    daily: Dict[str, VideoStatsBucket]
+
+
+class VideoBatchUploadResponse(BaseSchema):
+    videos: List[VideoUploadResponse]
+    message: str = "Video batch registration successful"
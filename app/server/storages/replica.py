@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from starlette.responses import Response
+
+from server.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Позиція WAL основного сервера після запису клієнта. Сервер віддає її у відповідях на записи,
+# клієнт повертає її у запитах на читання, і поки репліка не застосувала цю позицію, читаємо з основного
+WRITE_POSITION_HEADER = "X-Write-Position"
+
+REPLICA_LAG = Gauge("db_replica_lag_seconds", "Replication lag of the read replica, NaN when it is unreachable")
+READ_ROUTING = Counter(
+    "db_read_routing_total",
+    "Read-only requests by the database they were routed to",
+    ["target", "reason"],
+)
+
+# На простої репліки pg_last_xact_replay_timestamp() не оновлюється, тому якщо вся отримана WAL вже
+# застосована, вважаємо що відставання немає. На основному сервері (не в recovery) відставання теж нуль
+LAG_QUERY = text(
+    """
+    SELECT
+        CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END AS lag,
+        CASE
+            WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn()
+            ELSE pg_current_wal_lsn()
+        END::text AS replayed
+    """,
+)
+WRITE_POSITION_QUERY = text("SELECT pg_current_wal_lsn()::text")
+
+
+def parse_lsn(value: str | None) -> int | None:
+    """Converts a ``pg_lsn`` in its text form (``16/B374D848``) to an integer, None if it is malformed"""
+    if not value:
+        return None
+    high, sep, low = value.strip().partition("/")
+    if not sep:
+        return None
+    try:
+        return (int(high, 16) << 32) | int(low, 16)
+    except ValueError:
+        return None
+
+
+class ReplicaLagMonitor:
+    """
+    Periodically measures how far the read replica is behind the primary.
+
+    The replica is ``healthy`` while the last check succeeded and the lag is within ``max_lag``.
+    Until the first check completes the replica is treated as unhealthy, so reads stay on the primary.
+    """
+
+    def __init__(self, engine: AsyncEngine, interval: float = 2, max_lag: float = 5) -> None:
+        self.engine = engine
+        self.interval = interval
+        self.max_lag = max_lag
+        self.lag: float | None = None
+        self.replayed: int | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag is not None and self.lag <= self.max_lag
+
+    def has_replayed(self, position: int) -> bool:
+        """Whether the replica had applied the WAL up to ``position`` at the last check"""
+        return self.replayed is not None and self.replayed >= position
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="replica-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def check(self) -> float | None:
+        try:
+            async with self.engine.connect() as conn:
+                row = (await conn.execute(LAG_QUERY)).one()
+        except Exception as e:
+            if self.lag is not None:
+                logger.warning("Read replica is unreachable, routing reads to the primary: %s", str(e))
+            self.lag = None
+            self.replayed = None
+            REPLICA_LAG.set(math.nan)
+            return None
+
+        lag = float(row.lag)
+        if lag > self.max_lag and (self.lag is None or self.lag <= self.max_lag):
+            logger.warning("Read replica lags %.1f s behind the primary, routing reads to the primary", lag)
+        self.lag = lag
+        self.replayed = parse_lsn(row.replayed)
+        REPLICA_LAG.set(lag)
+        return lag
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+
+async def current_write_position(
+    session: AsyncSession,
+    replica: async_sessionmaker[AsyncSession] | None,
+) -> str | None:
+    """
+    Returns the current WAL position of the primary, call it after committing a write.
+
+    Without a replica every read goes to the primary anyway, so the query is skipped and None is returned.
+    """
+    if replica is None:
+        return None
+    return await session.scalar(WRITE_POSITION_QUERY)
+
+
+def remember_write(response: Response, position: str | None) -> None:
+    """Hands the write position to the client, so its next reads wait for a replica that has applied it"""
+    if position is not None:
+        response.headers[WRITE_POSITION_HEADER] = position
+
+
+def choose_read_session(
+    primary: async_sessionmaker[AsyncSession],
+    replica: async_sessionmaker[AsyncSession] | None,
+    monitor: ReplicaLagMonitor | None,
+    write_position: str | None,
+) -> async_sessionmaker[AsyncSession]:
+    """
+    Picks the session factory for a read-only request.
+
+    Args:
+        primary: Session factory of the primary
+        replica: Session factory of the replica, None when no replica is configured
+        monitor: Lag monitor of the replica
+        write_position: Value of the client's ``X-Write-Position`` header, the position of its last write
+
+    Returns:
+        The replica's session factory, or the primary's when there is no usable replica
+        or the replica has not applied the client's last write yet
+    """
+    if replica is None:
+        return primary
+    if monitor is None or not monitor.healthy:
+        READ_ROUTING.inc(target="primary", reason="replica_unhealthy")
+        return primary
+    position = parse_lsn(write_position)
+    if position is not None and not monitor.has_replayed(position):
+        READ_ROUTING.inc(target="primary", reason="recent_write")
+        return primary
+    READ_ROUTING.inc(target="replica", reason="ok")
+    return replica
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import pathlib
+import shutil
+import stat as stat_module
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import TYPE_CHECKING
+
+import aiofiles
+
+from server.dependencies import get_settings
+
+if TYPE_CHECKING:
+    from server.storage_backends import StorageBackend
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Більше діапазонів в одному запиті не обслуговуємо, щоб не давати змогу розбивати файл на тисячі шматків
+MAX_RANGES = 16
+
+# Як часто оновлювати mtime файлу кешу при читанні, щоб не писати метадані на кожен запит
+STREAM_CACHE_TOUCH_INTERVAL = 60
+# До якої частки ліміту витісняти кеш, щоб наступний обхід каталогу був нескоро
+STREAM_CACHE_LOW_WATER = 0.9
+
+# Розміри блобів для потокової передачі, отримані від сховища
+BLOB_SIZE_CACHE_SIZE = 10_000
+_blob_sizes: OrderedDict[str, int] = OrderedDict()
+
+
+class RangeNotSatisfiableError(Exception):
+    """None of the requested byte ranges overlaps the representation"""
+
+
+def parse_range_header(header: str | None, size: int) -> list[tuple[int, int]] | None:
+    """
+    Parses an RFC 7233 ``Range`` header into a list of inclusive ``(start, end)`` byte ranges.
+
+    Returns None when the header is absent, malformed or uses an unknown unit, in which case the
+    full representation should be served. Overlapping and adjacent ranges are coalesced.
+
+    Raises:
+        RangeNotSatisfiableError: when the header is valid but no range overlaps ``size`` bytes
+
+    """
+    if not header:
+        return None
+
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+
+    ranges: list[tuple[int, int]] = []
+    for raw_spec in specs.split(","):
+        spec = raw_spec.strip()
+        if not spec:
+            continue
+        first, dash, last = spec.partition("-")
+        if not dash:
+            return None
+        first, last = first.strip(), last.strip()
+        try:
+            if not first:
+                # Suffix range: останні N байт
+                suffix_length = int(last)
+                if suffix_length < 0:
+                    return None
+                if suffix_length == 0 or size == 0:
+                    continue
+                ranges.append((max(size - suffix_length, 0), size - 1))
+                continue
+
+            start = int(first)
+            end = int(last) if last else None
+        except ValueError:
+            return None
+
+        if start < 0 or (end is not None and end < start):
+            return None
+        if start >= size:
+            continue
+        if end is None:
+            end = size - 1
+        ranges.append((start, min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiableError
+
+    ranges.sort()
+    coalesced = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = coalesced[-1]
+        if start <= last_end + 1:
+            coalesced[-1] = (last_start, max(last_end, end))
+        else:
+            coalesced.append((start, end))
+
+    if len(coalesced) > MAX_RANGES:
+        return None
+
+    return coalesced
+
+
+def make_etag(file_path: str, size: int) -> str:
+    """
+    Strong validator for a video representation.
+
+    Built from the blob URL and its size only: the bytes behind a blob URL never change, while
+    ``updated_at`` moves on every status or processing update and would break ``If-Range`` resumes.
+    """
+    digest = hashlib.sha256(file_path.encode()).hexdigest()[:32]
+    return f'"{digest}-{size}"'
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value, usegmt=True)
+
+
+def if_range_matches(if_range: str | None, etag: str, last_modified: datetime | None) -> bool:
+    """
+    Evaluates an ``If-Range`` precondition (RFC 7233, section 3.2).
+
+    Entity tags are compared with the strong comparison function, so weak tags never match.
+    Dates match only when equal to ``Last-Modified`` at one second resolution.
+    """
+    if if_range is None:
+        return True
+
+    value = if_range.strip()
+    if value.startswith(('"', "W/")):
+        return not value.startswith("W/") and value == etag
+
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return False
+    return int(since.timestamp()) == int(last_modified.timestamp())
+
+
+class Throttle:
+    """Token bucket limiting throughput of a single connection to ``rate`` bytes per second"""
+
+    def __init__(self, rate: int, burst: int | None = None) -> None:
+        self.rate = rate
+        self.capacity = burst or rate
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    async def consume(self, amount: int) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= amount
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+def create_throttle() -> Throttle | None:
+    if settings.stream_rate_limit <= 0:
+        return None
+    return Throttle(settings.stream_rate_limit, burst=max(settings.stream_rate_limit, settings.stream_chunk_size))
+
+
+def stream_cache_path(url: str) -> pathlib.Path | None:
+    """Location of ``url`` in the local stream cache, None when the cache is disabled"""
+    if not settings.stream_cache_dir:
+        return None
+    digest = hashlib.sha256(url.encode()).hexdigest()
+    suffix = pathlib.PurePosixPath(url.split("?", 1)[0]).suffix[:10]
+    return pathlib.Path(settings.stream_cache_dir) / digest[:2] / f"{digest}{suffix}"
+
+
+def cached_file(url: str) -> pathlib.Path | None:
+    """Location of ``url`` in the stream cache if it is cached there, marking the file as recently read"""
+    path = stream_cache_path(url)
+    if path is None:
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    # atime на більшості систем не оновлюється (noatime/relatime), тож читання позначаємо через mtime
+    if time.time() - stat.st_mtime > STREAM_CACHE_TOUCH_INTERVAL:
+        with contextlib.suppress(OSError):
+            os.utime(path)
+    return path
+
+
+class StreamCacheUsage:
+    """
+    Size of the stream cache, tracked from the files this process stores and removes.
+
+    The directory is scanned only to initialise the total and when it grows past the limit. Eviction removes
+    the files read least recently (by mtime, see ``cached_file``) until the cache is at ``STREAM_CACHE_LOW_WATER``
+    of the limit, so the next scan happens only after that much new data. Other workers write to the same
+    directory, so between scans the total is approximate; every scan corrects it.
+    """
+
+    def __init__(self) -> None:
+        self.total_bytes: int | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _scan(root: pathlib.Path) -> list[tuple[float, int, pathlib.Path]]:
+        files = []
+        for path in root.rglob("*"):
+            with contextlib.suppress(OSError):
+                stat = path.stat()
+                if stat_module.S_ISREG(stat.st_mode):
+                    files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def added(self, root: pathlib.Path, size: int, max_bytes: int) -> None:
+        """Accounts for a file of ``size`` bytes stored under ``root`` and evicts if the limit is exceeded"""
+        with self._lock:
+            if self.total_bytes is None:
+                # Перший запис після старту: новий файл уже лежить у каталозі й потрапить у підрахунок
+                self.total_bytes = sum(file_size for _, file_size, _ in self._scan(root))
+            else:
+                self.total_bytes += size
+            if self.total_bytes > max_bytes:
+                self._evict(root, int(max_bytes * STREAM_CACHE_LOW_WATER))
+
+    def removed(self, size: int) -> None:
+        with self._lock:
+            if self.total_bytes is not None:
+                self.total_bytes = max(self.total_bytes - size, 0)
+
+    def _evict(self, root: pathlib.Path, target_bytes: int) -> None:
+        files = self._scan(root)
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= target_bytes:
+                break
+            with contextlib.suppress(OSError):
+                path.unlink()
+                total -= size
+                evicted += 1
+        self.total_bytes = total
+        logger.info("Evicted %s files from the stream cache, %s bytes left", evicted, total)
+
+
+stream_cache_usage = StreamCacheUsage()
+
+
+def _store_in_stream_cache(url: str, local_file: str) -> None:
+    path = stream_cache_path(url)
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Унікальне тимчасове ім'я: той самий блоб можуть кешувати одночасно кілька воркерів
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix=".part", delete=False) as temp:
+        try:
+            with open(local_file, "rb") as source:
+                shutil.copyfileobj(source, temp)
+        except BaseException:
+            pathlib.Path(temp.name).unlink(missing_ok=True)
+            raise
+    size = os.stat(temp.name).st_size
+    os.replace(temp.name, path)
+    stream_cache_usage.added(pathlib.Path(settings.stream_cache_dir), size, settings.stream_cache_max_bytes)
+
+
+async def store_in_stream_cache(url: str, local_file: str) -> None:
+    """Copies an already downloaded blob into the stream cache, evicting least recently read files"""
+    try:
+        await asyncio.to_thread(_store_in_stream_cache, url, local_file)
+    except OSError as e:
+        logger.warning("Failed to cache %s for streaming: %s", url, e)
+
+
+def _drop_from_stream_cache(path: pathlib.Path) -> None:
+    try:
+        size = path.stat().st_size
+        path.unlink()
+    except FileNotFoundError:
+        return
+    stream_cache_usage.removed(size)
+
+
+async def drop_from_stream_cache(url: str) -> None:
+    path = stream_cache_path(url)
+    if path is not None:
+        await asyncio.to_thread(_drop_from_stream_cache, path)
+
+
+async def blob_size(backend: StorageBackend, url: str) -> int:
+    """
+    Size of a blob as reported by the storage backend.
+
+    Blob pathnames are unique and blobs are never rewritten, so sizes are cached per process without
+    invalidation (up to ``BLOB_SIZE_CACHE_SIZE`` of them, least recently used first out).
+    """
+    size = _blob_sizes.get(url)
+    if size is not None:
+        _blob_sizes.move_to_end(url)
+        return size
+    size = (await backend.head(url)).size
+    _blob_sizes[url] = size
+    while len(_blob_sizes) > BLOB_SIZE_CACHE_SIZE:
+        _blob_sizes.popitem(last=False)
+    return size
+
+
+async def iter_file_range(
+    path: pathlib.Path,
+    start: int,
+    end: int,
+    chunk_size: int,
+) -> AsyncIterator[bytes]:
+    """Yields bytes ``start..end`` (both inclusive) of a local file"""
+    remaining = end - start + 1
+    async with aiofiles.open(path, "rb") as in_file:
+        await in_file.seek(start)
+        while remaining > 0:
+            chunk = await in_file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
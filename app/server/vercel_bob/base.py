@@ -1,39 +1,48 @@
-import asyncio
-import base64
-import hashlib
-import hmac
-import json
 import logging
-import math
-import os
 import pathlib
-import shutil
-import tempfile
-import time
 import uuid
-from typing import Any, Optional, Dict
+from collections.abc import AsyncIterator
+from typing import Any
 
+import aiofiles
 from fastapi import UploadFile, HTTPException
 
-try:
-    from vercel_blob import put, delete as delete_blob, list as list_blobs
-    VERCEL_BLOB_AVAILABLE = True
-except ImportError:
-    VERCEL_BLOB_AVAILABLE = False
-    logging.exception("Vercel Blob package is not installed")
-
-from server.dependencies import get_settings
+from server.dependencies import get_settings, get_storage_backend
+from server.storage_backends import CircuitOpenError, StorageError
+from server.storage_backends.base import DEFAULT_CHUNK_SIZE
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+
+def _error_status(error: Exception) -> int:
+    # Поки сховище недоступне, відповідаємо 503, щоб клієнт міг повторити пізніше
+    return 503 if isinstance(error, CircuitOpenError) else 500
+
+
+async def _iter_upload_file(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(DEFAULT_CHUNK_SIZE):
+        yield chunk
+
+
+async def _iter_local_file(file_path: str) -> AsyncIterator[bytes]:
+    async with aiofiles.open(file_path, "rb") as in_file:
+        while chunk := await in_file.read(DEFAULT_CHUNK_SIZE):
+            yield chunk
+
+
 class VercelBlobService:
-    """Сервіс для роботи з Vercel Blob Storage з використанням офіційного SDK"""
+    """
+    Сервіс для роботи зі сховищем файлів.
+
+    Historically talked to Vercel Blob directly, now delegates to the ``StorageBackend``
+    selected by ``Settings.storage_backend`` (Vercel Blob by default).
+    """
 
     @staticmethod
     async def upload_file(file: UploadFile, folder: str = "videos") -> dict[str, Any]:
         """
-        Uploads a file to Vercel Blob Storage using @vercel/blob
+        Uploads a file to the storage backend
 
         Args:
             file: File to upload
@@ -43,55 +52,33 @@ class VercelBlobService:
             Dict with information about the uploaded file
 
         """
-        logger.info("Starting file upload to Vercel Blob Storage. File: %s, type: %s", file.filename, file.content_type)
-
-        if not VERCEL_BLOB_AVAILABLE:
-            logger.error("vercel_blob package is not installed")
-            raise HTTPException(
-                status_code=500,
-                detail="vercel_blob package is not installed",
-            )
+        backend = get_storage_backend()
+        logger.info(
+            "Starting file upload to %s storage. File: %s, type: %s", backend.name, file.filename, file.content_type,
+        )
 
         try:
             file_extension = pathlib.Path(file.filename).suffix.lower()
             unique_filename = f"{folder}/{uuid.uuid4()}{file_extension}"
             logger.info("Generated unique filename: %s", unique_filename)
 
-            logger.info("Reading file content...")
-            file_content = await file.read()
-            logger.info("Read %s bytes from file", len(file_content))
-
-
-            logger.info("Uploading file using @vercel/blob SDK...")
-            result = put(
-                unique_filename,
-                file_content,
-                options={
-                    "contentType": file.content_type,
-                    "access": "public",
-                },
-            )
+            result = await backend.put_stream(unique_filename, _iter_upload_file(file), file.content_type)
 
             logger.info("File successfully uploaded: %s", result)
 
-            return {
-                "url": result["url"],
-                "pathname": result["pathname"],
-                "content_type": file.content_type,
-                "size_bytes": len(file_content),
-            }
+            return result
 
-        except Exception as e:
-            logger.error("Error uploading file to Vercel Blob Storage: %s", str(e))
+        except StorageError as e:
+            logger.error("Error uploading file to storage: %s", str(e))
             raise HTTPException(
-                status_code=500,
+                status_code=_error_status(e),
                 detail=f"Failed to upload to Blob storage: {e!s}",
             )
 
     @staticmethod
     async def upload_thumbnail(file_path: str, video_id: int) -> str:
         """
-        Uploads a thumbnail to Vercel Blob Storage
+        Uploads a thumbnail to the storage backend
 
         Args:
             file_path: Path to the thumbnail file
@@ -103,13 +90,6 @@ class VercelBlobService:
         """
         logger.info("Uploading thumbnail. Path: %s, video ID: %s", file_path, video_id)
 
-        if not VERCEL_BLOB_AVAILABLE:
-            logger.error("vercel_blob package is not installed")
-            raise HTTPException(
-                status_code=500,
-                detail="vercel_blob package is not installed",
-            )
-
         try:
             file_path_obj = pathlib.Path(file_path)
             file_extension = file_path_obj.suffix.lower()
@@ -117,73 +97,87 @@ class VercelBlobService:
 
             unique_filename = f"thumbnails/{video_id}_{uuid.uuid4()}{file_extension}"
 
-            with open(file_path, "rb") as f:
-                file_content = f.read()
-
-
-            result = put(
+            result = await get_storage_backend().put_stream(
                 unique_filename,
-                file_content,
-                options={
-                    "contentType": content_type,
-                    "access": "public",
-                },
+                _iter_local_file(file_path),
+                content_type,
             )
 
             logger.info("Thumbnail successfully uploaded: %s", result)
 
             return result["url"]
 
-        except Exception as e:
+        except (StorageError, OSError) as e:
             logger.error("Error uploading thumbnail: %s", str(e))
             raise HTTPException(
-                status_code=500,
+                status_code=_error_status(e),
                 detail=f"Failed to upload thumbnail: {e!s}",
             )
 
     @staticmethod
-    async def delete_file(url: str) -> bool:
+    async def upload_waveform(data: bytes, video_id: int) -> str:
         """
-        Deletes a file from Vercel Blob Storage
+        Uploads waveform peaks to the storage backend
 
         Args:
-            url: URL of the file to delete
+            data: Waveform in the audiowaveform ``.dat`` format
+            video_id: Video ID
 
         Returns:
-            True if the file was successfully deleted
+            URL of the uploaded waveform
+
         """
-        logger.info("Deleting file: %s", url)
+        logger.info("Uploading waveform. Size: %s bytes, video ID: %s", len(data), video_id)
 
-        if not VERCEL_BLOB_AVAILABLE:
-            logger.error("vercel_blob package is not installed")
+        async def chunks() -> AsyncIterator[bytes]:
+            yield data
+
+        try:
+            result = await get_storage_backend().put_stream(
+                f"waveforms/{video_id}_{uuid.uuid4()}.dat",
+                chunks(),
+                "application/octet-stream",
+            )
+        except StorageError as e:
+            logger.error("Error uploading waveform: %s", str(e))
             raise HTTPException(
-                status_code=500,
-                detail="vercel_blob package is not installed",
+                status_code=_error_status(e),
+                detail=f"Failed to upload waveform: {e!s}",
             )
 
-        try:
-            from vercel_blob import delete
+        logger.info("Waveform successfully uploaded: %s", result)
 
-            response = delete(url)
+        return result["url"]
 
-            logger.info("File deletion result: %s", response)
+    @staticmethod
+    async def delete_file(url: str) -> bool:
+        """
+        Deletes a file from the storage backend
 
-            if response and isinstance(response, dict):
-                logger.info("File successfully deleted: %s", url)
-                return True
-            logger.warning("Unexpected file deletion result: %s", response)
-            return False
+        Args:
+            url: URL of the file to delete
+
+        Returns:
+            True if the file was successfully deleted
+        """
+        logger.info("Deleting file: %s", url)
 
-        except Exception as e:
-            import traceback
+        try:
+            deleted = await get_storage_backend().delete_many([url])
+        except StorageError as e:
             logger.error("Error deleting file: %s", str(e))
-            logger.error("Error stack: %s", traceback.format_exc())
             return False
 
+        if deleted:
+            logger.info("File successfully deleted: %s", url)
+            return True
+        logger.warning("File was not deleted: %s", url)
+        return False
+
     @staticmethod
     async def download_file(url: str) -> bytes:
         """
-        Downloads a file from Vercel Blob Storage
+        Downloads a file from the storage backend
 
         Args:
             url: URL of the file to download
@@ -193,20 +187,13 @@ class VercelBlobService:
         """
         logger.info("Downloading file: %s", url)
 
+        content = bytearray()
         try:
-            import aiohttp
-
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        logger.error("Error downloading file: status %s", response.status)
-                        return b""
-
-                    content = await response.read()
-                    logger.info("File successfully downloaded, size: %s bytes", len(content))
-                    return content
-
-        except Exception as e:
+            async for chunk in get_storage_backend().get_stream(url):
+                content.extend(chunk)
+        except StorageError as e:
             logger.error("Error downloading file: %s", str(e))
             return b""
 
+        logger.info("File successfully downloaded, size: %s bytes", len(content))
+        return bytes(content)
@@ -1,22 +1,31 @@
 import uuid
-import tempfile
 import pathlib
 import aiofiles
-import aiohttp
+import aiofiles.tempfile
 from fastapi import UploadFile, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.future import select
-from sqlalchemy import update
+from sqlalchemy import insert, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime
 import asyncio
+import logging
+from collections.abc import Collection
+from dataclasses import dataclass
 from typing import Any
 
-from server.dependencies import get_settings
+from server.dependencies import get_settings, get_storage_backend, get_video_cache
+from server.diagnostics.base import current_activity
 from server.storages import Video, VideoProcessingJob
 from server.storages.pydantic_models import VideoCreate
+from server.streaming.base import store_in_stream_cache
 from server.vercel_bob.base import VercelBlobService
+from server.video.cache import VIDEO_RECORD_COLUMNS, VideoRecord
+from server.video.stats import adjust_video_stats, apply_video_stats_change, snapshot_video_stats
+from server.video.waveform import generate_waveform
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # Створюємо тимчасову директорію, якщо вона не існує
 temp_dir = pathlib.Path(settings.temp_dir)
@@ -108,122 +117,414 @@ async def get_video_duration(video_path: str) -> int:
 
 
 async def upload_video_to_storage(upload_file: UploadFile) -> dict[str, Any]:
-    """Завантажує відео до Vercel Blob Storage"""
+    """Завантажує відео до сховища файлів"""
     return await VercelBlobService.upload_file(upload_file, folder="videos")
 
 
-async def create_video(db: AsyncSession, video_data: VideoCreate, file_info: dict[str, Any]) -> Video:
-    """Створює запис про відео в базі даних"""
-    # Створюємо новий запис про відео
-    new_video = Video(
-        title=video_data.title,
-        file_path=file_info["url"],  # URL від Vercel Blob Storage
-        thumbnail_path="",  # Тимчасово порожній, оновимо пізніше
-        content_type=file_info["content_type"],
-        size_bytes=file_info["size_bytes"],
-        upload_completed=True,
+@dataclass(frozen=True, slots=True)
+class VideoRegistration:
+    id: int
+    title: str
+    job_id: int | None
+    # False, якщо відео вже було зареєстроване раніше і нову обробку не створено
+    created: bool
+
+
+def _video_values(
+    video_data: VideoCreate,
+    file_info: dict[str, Any],
+    idempotency_key: str | None,
+    request_fingerprint: str | None,
+) -> dict[str, Any]:
+    return {
+        "title": video_data.title,
+        "file_path": file_info["url"],  # URL файлу у сховищі
+        "thumbnail_path": "",  # Тимчасово порожній, оновимо пізніше
+        "content_type": file_info["content_type"],
+        "size_bytes": file_info["size_bytes"],
+        "upload_completed": True,
+        "idempotency_key": idempotency_key,
+        "idempotency_fingerprint": request_fingerprint if idempotency_key else None,
+    }
+
+
+def _check_idempotency_fingerprint(existing: Any, request_fingerprint: str | None) -> None:
+    """Rejects a key that was first used with another request; rows registered without a fingerprint are accepted"""
+    stored = existing.idempotency_fingerprint
+    if stored and request_fingerprint and stored != request_fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+
+
+async def _latest_job_ids(db: AsyncSession, video_ids: list[int]) -> dict[int, int]:
+    """Повертає id останнього завдання на обробку для кожного відео"""
+    if not video_ids:
+        return {}
+    result = await db.execute(
+        select(VideoProcessingJob.video_id, VideoProcessingJob.id)
+        .where(VideoProcessingJob.video_id.in_(video_ids))
+        .distinct(VideoProcessingJob.video_id)
+        .order_by(VideoProcessingJob.video_id, VideoProcessingJob.id.desc()),
+    )
+    return {row.video_id: row.id for row in result}
+
+
+async def create_video(
+    db: AsyncSession,
+    video_data: VideoCreate,
+    file_info: dict[str, Any],
+    idempotency_key: str | None = None,
+    request_fingerprint: str | None = None,
+) -> VideoRegistration:
+    """
+    Створює запис про відео та завдання на його обробку в одній транзакції.
+
+    Registration is idempotent: if a video with the same blob URL or idempotency key already exists,
+    nothing is inserted and that video is returned with its latest processing job and ``created=False``.
+    A key is stored with ``request_fingerprint``; reusing it for a different request raises HTTPException 422.
+    """
+    result = await db.execute(
+        pg_insert(Video)
+        .values(**_video_values(video_data, file_info, idempotency_key, request_fingerprint))
+        .on_conflict_do_nothing()
+        .returning(Video.id, Video.title),
     )
+    row = result.first()
 
-    db.add(new_video)
-    await db.commit()
-    await db.refresh(new_video)
+    if row is None:
+        condition = Video.file_path == file_info["url"]
+        if idempotency_key is not None:
+            condition = or_(condition, Video.idempotency_key == idempotency_key)
+        existing_rows = (
+            await db.execute(
+                select(Video.id, Video.title, Video.idempotency_key, Video.idempotency_fingerprint).where(condition),
+            )
+        ).all()
+        if not existing_rows:
+            raise RuntimeError(f"Video {file_info['url']} conflicts with a registration that no longer exists")
+        # Ключ ідемпотентності важливіший за URL: клієнт повторює саме той запит
+        by_key = [row for row in existing_rows if idempotency_key and row.idempotency_key == idempotency_key]
+        if by_key:
+            _check_idempotency_fingerprint(by_key[0], request_fingerprint)
+        existing = by_key[0] if by_key else existing_rows[0]
+        job_ids = await _latest_job_ids(db, [existing.id])
+        await db.commit()
+        return VideoRegistration(id=existing.id, title=existing.title, job_id=job_ids.get(existing.id), created=False)
 
     # Створюємо завдання на обробку
-    processing_job = VideoProcessingJob(
-        video_id=new_video.id,
-        job_status="pending",
-        started_at=datetime.now(),
+    job_id = (
+        await db.execute(
+            insert(VideoProcessingJob)
+            .values(video_id=row.id, job_status="pending", started_at=datetime.now())
+            .returning(VideoProcessingJob.id),
+        )
+    ).scalar_one()
+    await adjust_video_stats(db, [row.id], 1)
+    await db.commit()
+
+    return VideoRegistration(id=row.id, title=row.title, job_id=job_id, created=True)
+
+
+async def create_videos(
+    db: AsyncSession,
+    videos: list[tuple[VideoCreate, dict[str, Any]]],
+    idempotency_key: str | None = None,
+    request_fingerprint: str | None = None,
+) -> list[VideoRegistration]:
+    """
+    Створює записи про відео та завдання на обробку пакетом.
+
+    Both tables are filled with multi-row ``INSERT ... RETURNING`` statements in a single transaction.
+    Videos whose blob URL is already registered (or whose key ``{idempotency_key}:{index}`` was used before)
+    are not inserted again; they are returned with their latest job and ``created=False``. Every key is
+    stored with the fingerprint of the whole batch, so a retry with a changed batch raises HTTPException 422.
+
+    Returns:
+        Registrations in input order
+
+    """
+    if not videos:
+        return []
+
+    values = [
+        _video_values(
+            video_data,
+            file_info,
+            f"{idempotency_key}:{index}" if idempotency_key else None,
+            request_fingerprint,
+        )
+        for index, (video_data, file_info) in enumerate(videos)
+    ]
+    result = await db.execute(
+        pg_insert(Video).values(values).on_conflict_do_nothing().returning(Video.id, Video.title, Video.file_path),
     )
+    inserted = {row.file_path: row for row in result.all()}
+
+    existing_by_url: dict[str, Any] = {}
+    existing_by_key: dict[str, Any] = {}
+    skipped = [value for value in values if value["file_path"] not in inserted]
+    if skipped:
+        condition = Video.file_path.in_([value["file_path"] for value in skipped])
+        keys = [value["idempotency_key"] for value in skipped if value["idempotency_key"]]
+        if keys:
+            condition = or_(condition, Video.idempotency_key.in_(keys))
+        existing_rows = await db.execute(
+            select(
+                Video.id,
+                Video.title,
+                Video.file_path,
+                Video.idempotency_key,
+                Video.idempotency_fingerprint,
+            ).where(condition),
+        )
+        for row in existing_rows:
+            existing_by_url[row.file_path] = row
+            if row.idempotency_key:
+                existing_by_key[row.idempotency_key] = row
+        for row in existing_by_key.values():
+            if row.idempotency_key in keys:
+                _check_idempotency_fingerprint(row, request_fingerprint)
+
+    inserted_ids = {row.id for row in inserted.values()}
+    job_ids: dict[int, int] = {}
+    if inserted_ids:
+        started_at = datetime.now()
+        jobs = await db.execute(
+            insert(VideoProcessingJob)
+            .values(
+                [
+                    {"video_id": video_id, "job_status": "pending", "started_at": started_at}
+                    for video_id in sorted(inserted_ids)
+                ],
+            )
+            .returning(VideoProcessingJob.video_id, VideoProcessingJob.id),
+        )
+        job_ids = {row.video_id: row.id for row in jobs}
+        await adjust_video_stats(db, inserted_ids, 1)
+
+    rows = []
+    for value in values:
+        row = (
+            existing_by_key.get(value["idempotency_key"])
+            or inserted.get(value["file_path"])
+            or existing_by_url.get(value["file_path"])
+        )
+        if row is None:
+            raise RuntimeError(f"Video {value['file_path']} conflicts with a registration that no longer exists")
+        rows.append(row)
 
-    db.add(processing_job)
+    job_ids.update(await _latest_job_ids(db, [row.id for row in rows if row.id not in job_ids]))
     await db.commit()
 
-    return new_video
+    registrations = []
+    reported: set[int] = set()
+    for row in rows:
+        # Відео, вставлене в цьому запиті, вважається створеним лише для першого елемента з таким URL
+        created = row.id in inserted_ids and row.id not in reported
+        reported.add(row.id)
+        registrations.append(VideoRegistration(id=row.id, title=row.title, job_id=job_ids.get(row.id), created=created))
 
+    return registrations
 
-async def process_video(db: AsyncSession, video_id: int) -> None:
-    """Обробляє відео: створює мініатюру та оновлює інформацію"""
-    # Отримуємо відео з бази
-    result = await db.execute(select(Video).where(Video.id == video_id))
-    video = result.scalars().first()
 
-    if not video:
-        raise HTTPException(status_code=404, detail="Video not found")
+# Етапи обробки у порядку виконання. Повторна обробка може запускати лише частину з них
+PROCESSING_STAGES = ("thumbnail", "duration", "waveform", "stream_cache")
 
-    try:
-        # Оновлюємо статус завдання
+
+def has_required_results(video: Video) -> bool:
+    """Whether the video has the results it can not be shown without: a thumbnail and a duration"""
+    return bool(video.thumbnail_path) and video.duration is not None
+
+
+async def download_video_temp(url: str) -> str:
+    """Завантажує відео зі сховища у тимчасовий файл і повертає шлях до нього"""
+    # Запис іде через пул потоків aiofiles, щоб великі файли не блокували цикл подій
+    async with aiofiles.tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as temp_video:
+        try:
+            async for chunk in get_storage_backend().get_stream(url):
+                await temp_video.write(chunk)
+        except BaseException:
+            pathlib.Path(temp_video.name).unlink(missing_ok=True)
+            raise
+    return temp_video.name
+
+
+async def run_processing_stages(video: Video, video_path: str, stages: Collection[str]) -> dict[str, Any]:
+    """
+    Runs the selected processing stages on a downloaded video.
+
+    Args:
+        video: Video being processed
+        video_path: Path to the downloaded video file
+        stages: Names from ``PROCESSING_STAGES`` to run
+
+    Returns:
+        Values of the ``Video`` columns produced by the stages
+    """
+    values: dict[str, Any] = {}
+
+    if "thumbnail" in stages:
+        # Створюємо мініатюру та завантажуємо її у сховище
+        thumbnail_path = await create_thumbnail(video_path, video.id)
+        try:
+            values["thumbnail_path"] = await VercelBlobService.upload_thumbnail(thumbnail_path, video.id)
+        finally:
+            pathlib.Path(thumbnail_path).unlink(missing_ok=True)
+
+    if "duration" in stages:
+        # Отримуємо тривалість відео
+        values["duration"] = await get_video_duration(video_path)
+
+    if "waveform" in stages and settings.waveform_peaks_per_second > 0:
+        # Рахуємо піки звукової хвилі, щоб плеєру не доводилось декодувати весь файл
+        waveform = await generate_waveform(video_path, settings.waveform_peaks_per_second, settings.waveform_bits)
+        values["waveform_path"] = (
+            await VercelBlobService.upload_waveform(waveform, video.id) if waveform is not None else None
+        )
+
+    if "stream_cache" in stages:
+        # Зберігаємо відео в локальному кеші для стрімінгу, якщо він увімкнений
+        await store_in_stream_cache(video.file_path, video_path)
+
+    return values
+
+
+async def _start_processing_job(db: AsyncSession, video_id: int) -> int:
+    """
+    Позначає завдання цього запуску обробки як активне і повертає його id.
+
+    Перший запуск бере завдання, створене під час реєстрації, кожен наступний отримує новий рядок,
+    тож статуси попередніх запусків лишаються в історії
+    """
+    pending = (
+        select(VideoProcessingJob.id)
+        .where(VideoProcessingJob.video_id == video_id, VideoProcessingJob.job_status == "pending")
+        .order_by(VideoProcessingJob.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    # Повторна умова на статус: паралельний запуск, що вже забрав завдання, не дасть забрати його вдруге
+    job_id = (
         await db.execute(
             update(VideoProcessingJob)
-            .where(VideoProcessingJob.video_id == video_id)
-            .values(job_status="processing"),
+            .where(VideoProcessingJob.id == pending, VideoProcessingJob.job_status == "pending")
+            .values(job_status="processing", started_at=datetime.now())
+            .returning(VideoProcessingJob.id),
         )
-        await db.commit()
-
-        # Створюємо тимчасовий файл для відео
-        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as temp_video:
-            temp_video_path = temp_video.name
+    ).scalar_one_or_none()
+    if job_id is None:
+        job_id = (
+            await db.execute(
+                insert(VideoProcessingJob)
+                .values(video_id=video_id, job_status="processing", started_at=datetime.now())
+                .returning(VideoProcessingJob.id),
+            )
+        ).scalar_one()
+    await db.commit()
+    return job_id
 
-            # Завантажуємо відео з Vercel Blob Storage
-            async with aiohttp.ClientSession() as session:
-                async with session.get(video.file_path) as response:
-                    if response.status != 200:
-                        raise HTTPException(status_code=500, detail="Failed to download video from storage")
 
-                    # Записуємо вміст у тимчасовий файл
-                    temp_video.write(await response.read())
+async def process_video(db: AsyncSession, video_id: int, stages: Collection[str] = PROCESSING_STAGES) -> None:
+    """
+    Обробляє відео: виконує етапи обробки (мініатюра, тривалість, хвиля, кеш) та оновлює інформацію.
 
-            # Створюємо мініатюру
-            thumbnail_path = await create_thumbnail(temp_video_path, video.id)
+    Кожен запуск веде власне завдання на обробку, завдання попередніх запусків не змінюються
+    """
+    current_activity.set(f"job process_video video_id={video_id}")
 
-            # Отримуємо тривалість відео
-            duration = await get_video_duration(temp_video_path)
+    # Отримуємо відео з бази
+    result = await db.execute(select(Video).where(Video.id == video_id))
+    video = result.scalars().first()
 
-            # Завантажуємо мініатюру в Vercel Blob Storage
-            thumbnail_url = await VercelBlobService.upload_thumbnail(thumbnail_path, video.id)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
 
-            # Видаляємо тимчасові файли
+    job_id = None
+    try:
+        job_id = await _start_processing_job(db, video_id)
+
+        # Завантажуємо відео зі сховища у тимчасовий файл
+        temp_video_path = await download_video_temp(video.file_path)
+        try:
+            values = await run_processing_stages(video, temp_video_path, stages)
+        finally:
+            # Видаляємо тимчасовий файл
             pathlib.Path(temp_video_path).unlink(missing_ok=True)
-            pathlib.Path(thumbnail_path).unlink(missing_ok=True)
 
-            # Оновлюємо інформацію про відео
-            video.thumbnail_path = thumbnail_url
-            video.duration = duration
+        # Блоби, які замінила повторна обробка, більше ніхто не використовує
+        replaced_urls = [
+            getattr(video, column)
+            for column in ("thumbnail_path", "waveform_path")
+            if column in values and getattr(video, column) and getattr(video, column) != values[column]
+        ]
+
+        # Оновлюємо інформацію про відео, разом зі статистикою каталогу (статус і тривалість змінюються)
+        stats_before = await snapshot_video_stats(db, [video.id])
+        for column, value in values.items():
+            setattr(video, column, value)
+        # Етапи могли запускатися не всі (повторна обробка), тож готовим відео робимо лише з мініатюрою і тривалістю
+        if has_required_results(video):
             video.status = "ready"
             video.processing_completed = True
+        else:
+            logger.warning("Video %s still lacks a thumbnail or duration, keeping status %s", video.id, video.status)
+        await db.flush()
+        await apply_video_stats_change(db, [video.id], stats_before)
 
-            await db.commit()
-
-            # Завершуємо завдання на обробку
-            await db.execute(
-                update(VideoProcessingJob)
-                .where(VideoProcessingJob.video_id == video_id)
-                .values(
-                    job_status="completed",
-                    completed_at=datetime.now(),
-                ),
-            )
-            await db.commit()
+        await db.commit()
 
-    except Exception as e:
-        # У випадку помилки, оновлюємо статус
+        # Завершуємо завдання на обробку
         await db.execute(
             update(VideoProcessingJob)
-            .where(VideoProcessingJob.video_id == video_id)
+            .where(VideoProcessingJob.id == job_id)
             .values(
-                job_status="failed",
-                error_message=str(e),
+                job_status="completed",
                 completed_at=datetime.now(),
             ),
         )
         await db.commit()
 
-        # Оновлюємо статус відео
-        video.status = "error"
-        await db.commit()
+        for url in replaced_urls:
+            await VercelBlobService.delete_file(url)
+
+    except Exception as e:
+        # У випадку помилки, оновлюємо статус
+        if job_id is not None:
+            await db.execute(
+                update(VideoProcessingJob)
+                .where(VideoProcessingJob.id == job_id)
+                .values(
+                    job_status="failed",
+                    error_message=str(e),
+                    completed_at=datetime.now(),
+                ),
+            )
+            await db.commit()
+
+        # Оновлюємо статус відео. Готове відео лишається доступним, якщо не вдалася повторна обробка
+        if video.status != "ready":
+            stats_before = await snapshot_video_stats(db, [video.id])
+            video.status = "error"
+            await db.flush()
+            await apply_video_stats_change(db, [video.id], stats_before)
+            await db.commit()
 
         raise HTTPException(status_code=500, detail=f"Error processing video: {e!s}")
 
 
+async def process_videos(db_session: async_sessionmaker[AsyncSession], video_ids: list[int]) -> None:
+    """Обробляє пакет відео, не більше ``processing_concurrency`` одночасно"""
+    semaphore = asyncio.Semaphore(settings.processing_concurrency)
+
+    async def process_one(video_id: int) -> None:
+        async with semaphore, db_session() as session:
+            try:
+                await process_video(session, video_id)
+            except HTTPException as e:
+                logger.error("Failed to process video %s: %s", video_id, e.detail)
+
+    await asyncio.gather(*(process_one(video_id) for video_id in video_ids))
+
+
 async def get_all_videos(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[Video]:
     """Отримує список всіх відео з пагінацією"""
     result = await db.execute(
@@ -236,7 +537,19 @@ async def get_all_videos(db: AsyncSession, skip: int = 0, limit: int = 100) -> l
     return result.scalars().all()
 
 
-async def get_video_by_id(db: AsyncSession, video_id: int) -> Video | None:
-    """Отримує відео за ідентифікатором"""
-    result = await db.execute(select(Video).where(Video.id == video_id))
-    return result.scalars().first()
+async def get_video_by_id(db: AsyncSession, video_id: int) -> VideoRecord | None:
+    """Отримує відео за ідентифікатором, спершу шукаючи його в кеші записів"""
+    cache = get_video_cache()
+    record = cache.get(video_id)
+    if record is not None:
+        return record
+
+    read_started = cache.begin_read()
+    result = await db.execute(select(*VIDEO_RECORD_COLUMNS).where(Video.id == video_id))
+    row = result.first()
+    if row is None:
+        return None
+
+    record = VideoRecord.from_row(row)
+    cache.put(record, read_started)
+    return record
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+import asyncpg
+
+from server.metrics import Counter, Gauge
+from server.storages import Video
+
+if TYPE_CHECKING:
+    from server.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Канал, у який тригер videos_notify_changed надсилає id зміненого або видаленого відео
+VIDEO_CHANGED_CHANNEL = "video_changed"
+
+# Скільки пам'ятати про інвалідацію після вікна застарілості, щоб не заповнити кеш даними читання, що почалося раніше
+INVALIDATION_MEMORY = 300
+# Як часто перевіряти, що з'єднання слухача живе (обрив мережі без закриття сокета інакше не помітити)
+KEEPALIVE_INTERVAL = 30
+
+CACHE_HITS = Counter("video_cache_hits_total", "Video lookups served from the in-process cache")
+CACHE_MISSES = Counter("video_cache_misses_total", "Video lookups that went to the database")
+CACHE_EVICTIONS = Counter("video_cache_evictions_total", "Video records evicted to keep the cache within its size")
+CACHE_INVALIDATIONS = Counter("video_cache_invalidations_total", "Video records invalidated by change notifications")
+CACHE_SIZE = Gauge("video_cache_size", "Video records currently cached")
+
+
+@dataclass(frozen=True, slots=True)
+class VideoRecord:
+    """Immutable snapshot of a ``videos`` row, cheap to keep in memory and safe to share between requests"""
+
+    id: int
+    title: str
+    file_path: str
+    thumbnail_path: str
+    waveform_path: str | None
+    content_type: str
+    size_bytes: int
+    duration: int | None
+    status: str
+    upload_completed: bool
+    processing_completed: bool
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_row(cls, row: Any) -> VideoRecord:
+        return cls(**row._mapping)
+
+
+VIDEO_RECORD_COLUMNS = tuple(getattr(Video, record_field.name) for record_field in fields(VideoRecord))
+
+
+class VideoCache:
+    """
+    Bounded LRU cache of ``VideoRecord`` by video id.
+
+    The cache is only ``active`` while a ``VideoChangeListener`` receives change notifications; otherwise
+    nothing is cached, since stale records could not be invalidated. A record loaded by a read that started
+    before the latest invalidation of that video (minus ``stale_window`` seconds, the tolerated replica lag)
+    is not stored, so a slow read can not bring back data that was already invalidated.
+    """
+
+    def __init__(self, max_size: int = 10_000, stale_window: float = 0.0) -> None:
+        self.max_size = max_size
+        self.stale_window = stale_window
+        self.active = False
+        self._records: OrderedDict[int, VideoRecord] = OrderedDict()
+        self._invalidated: OrderedDict[int, float] = OrderedDict()
+        self._cleared_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, video_id: int) -> VideoRecord | None:
+        if not self.active:
+            return None
+        record = self._records.get(video_id)
+        if record is None:
+            CACHE_MISSES.inc()
+            return None
+        self._records.move_to_end(video_id)
+        CACHE_HITS.inc()
+        return record
+
+    @staticmethod
+    def begin_read() -> float:
+        """Returns the token to pass to ``put`` for a record read from the database after this call"""
+        return time.monotonic()
+
+    def put(self, record: VideoRecord, read_started: float) -> None:
+        if not self.active or self.max_size <= 0:
+            return
+        # Запис міг змінитися після початку читання (або репліка ще не встигла отримати зміну)
+        oldest_valid_read = max(self._cleared_at, self._invalidated.get(record.id, 0.0)) + self.stale_window
+        if read_started <= oldest_valid_read:
+            return
+
+        self._records[record.id] = record
+        self._records.move_to_end(record.id)
+        while len(self._records) > self.max_size:
+            self._records.popitem(last=False)
+            CACHE_EVICTIONS.inc()
+        CACHE_SIZE.set(len(self._records))
+
+    def invalidate(self, video_id: int) -> None:
+        now = time.monotonic()
+        self._records.pop(video_id, None)
+        self._invalidated[video_id] = now
+        self._invalidated.move_to_end(video_id)
+        CACHE_INVALIDATIONS.inc()
+        CACHE_SIZE.set(len(self._records))
+
+        # Старі мітки вже не можуть відкинути жодного читання
+        horizon = now - self.stale_window - INVALIDATION_MEMORY
+        while self._invalidated and next(iter(self._invalidated.values())) < horizon:
+            self._invalidated.popitem(last=False)
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._invalidated.clear()
+        self._cleared_at = time.monotonic()
+        CACHE_SIZE.set(0)
+
+
+class VideoChangeListener:
+    """
+    Keeps a dedicated asyncpg connection that LISTENs on ``video_changed`` and invalidates ``cache`` entries.
+
+    The cache is activated only while the connection is up. When it drops the cache is cleared and
+    deactivated, and the listener reconnects with exponential backoff.
+    """
+
+    def __init__(self, settings: Settings, cache: VideoCache, max_backoff: float = 30) -> None:
+        self.settings = settings
+        self.cache = cache
+        self.max_backoff = max_backoff
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="video-change-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self.cache.active = False
+        self.cache.clear()
+
+    def _on_notification(self, _connection: Any, _pid: int, _channel: str, payload: str) -> None:
+        try:
+            self.cache.invalidate(int(payload))
+        except ValueError:
+            logger.warning("Unexpected %s payload: %r", VIDEO_CHANGED_CHANNEL, payload)
+
+    async def _connect(self) -> asyncpg.Connection:
+        psql = self.settings.psql
+        return await asyncpg.connect(
+            host=psql.host,
+            port=psql.port,
+            user=psql.user,
+            password=psql.password.get_secret_value(),
+            database=psql.db,
+        )
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            connection = None
+            try:
+                connection = await self._connect()
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _connection, event=lost: event.set())
+                await connection.add_listener(VIDEO_CHANGED_CHANNEL, self._on_notification)
+
+                # Поки з'єднання не було, зміни могли пройти непоміченими
+                self.cache.clear()
+                self.cache.active = True
+                backoff = 1.0
+                logger.info("Listening for video changes, video cache enabled")
+
+                while not lost.is_set():
+                    with contextlib.suppress(TimeoutError):
+                        await asyncio.wait_for(lost.wait(), timeout=KEEPALIVE_INTERVAL)
+                    if not lost.is_set():
+                        await connection.execute("SELECT 1", timeout=KEEPALIVE_INTERVAL)
+                logger.warning("Video change listener connection lost, video cache disabled")
+            except (OSError, TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning("Video change listener connection failed, video cache disabled: %s", str(e))
+            finally:
+                self.cache.active = False
+                self.cache.clear()
+                if connection is not None and not connection.is_closed():
+                    with contextlib.suppress(Exception):
+                        await connection.close(timeout=5)
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
@@ -0,0 +1,178 @@
+import csv
+import io
+import re
+from collections.abc import AsyncIterator
+from typing import Any, Literal
+
+import orjson
+
+from sqlalchemy import ColumnElement, Select, false, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from server.storages import Video
+
+# Колонки, з яких складається VideoResponse. Вибираємо лише їх, без гідрації ORM-об'єктів
+VIDEO_RESPONSE_COLUMNS = (
+    Video.id,
+    Video.title,
+    Video.thumbnail_path,
+    Video.file_path,
+    Video.waveform_path,
+    Video.status,
+    Video.duration,
+    Video.upload_completed,
+    Video.processing_completed,
+    Video.created_at,
+    Video.updated_at,
+)
+
+# Для експорту додаємо ще кілька колонок, корисних для аналітики
+VIDEO_EXPORT_COLUMNS = (
+    *VIDEO_RESPONSE_COLUMNS,
+    Video.content_type,
+    Video.size_bytes,
+)
+
+ExportFormat = Literal["ndjson", "csv"]
+
+
+# Не більше стількох слів з пошукового запиту потрапляє в tsquery
+MAX_SEARCH_TERMS = 8
+# Коротші запити шукаємо лише за префіксами слів: з одного-двох символів майже немає триграм,
+# і нечіткий пошук за ними збігається з великою частиною каталогу
+MIN_FUZZY_QUERY_LENGTH = 3
+# Скільки збігів пошуку ранжуємо й рахуємо. Широкий запит інакше змушує ранжувати весь каталог
+SEARCH_CANDIDATE_LIMIT = 1000
+_SEARCH_TERM = re.compile(r"\w+")
+
+
+def _prefix_tsquery(q: str) -> ColumnElement[Any] | None:
+    """``to_tsquery('simple', 'word1:* & word2:*')``, so every word also matches as a prefix"""
+    terms = _SEARCH_TERM.findall(q.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    return func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+
+
+def _search_condition(q: str) -> ColumnElement[bool]:
+    tsquery = _prefix_tsquery(q)
+    prefix = Video.search_vector.op("@@")(tsquery) if tsquery is not None else None
+    if len(q.strip()) < MIN_FUZZY_QUERY_LENGTH:
+        return prefix if prefix is not None else false()
+    # `<%` is pg_trgm word similarity: tolerates typos in a prefix of the title and uses ix_videos_title_trgm
+    fuzzy = literal(q).op("<%")(Video.title)
+    if prefix is None:
+        return fuzzy
+    return or_(prefix, fuzzy)
+
+
+def _search_rank(q: str) -> ColumnElement[float]:
+    rank = func.word_similarity(q, Video.title)
+    tsquery = _prefix_tsquery(q)
+    if tsquery is not None:
+        rank = rank + func.ts_rank_cd(Video.search_vector, tsquery)
+    return rank
+
+
+def apply_video_filters(query: Select[Any], status: str | None = None, q: str | None = None) -> Select[Any]:
+    """Applies the list endpoint filters to a query over ``videos``"""
+    if status:
+        query = query.where(Video.status == status)
+    if q:
+        query = query.where(_search_condition(q))
+    return query
+
+
+def apply_video_ordering(query: Select[Any], q: str | None = None) -> Select[Any]:
+    """Newest first, or by search relevance when searching"""
+    if q:
+        return query.order_by(_search_rank(q).desc(), Video.created_at.desc(), Video.id.desc())
+    return query.order_by(Video.created_at.desc())
+
+
+async def fetch_video_page(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 20,
+    status: str | None = None,
+    q: str | None = None,
+) -> tuple[list[dict[str, Any]], int]:
+    """
+    Returns one page of videos as plain dicts shaped like ``VideoResponse`` plus the total count.
+
+    Rows come straight from the selected columns, so the result can be serialized without
+    building ORM entities or re-validating it through pydantic.
+
+    A search ranks and counts at most ``SEARCH_CANDIDATE_LIMIT`` matches, the first ones the indexes
+    return. For a broad query ``total`` is capped at that limit and only those candidates are ordered
+    by relevance; narrowing the query brings the rest into view.
+    """
+    if q:
+        # Без ORDER BY сканування індексу зупиняється на ліміті; сортування змусило б прочитати всі збіги
+        candidates = apply_video_filters(select(Video.id), status, q).limit(SEARCH_CANDIDATE_LIMIT).subquery()
+        query = apply_video_ordering(
+            select(*VIDEO_RESPONSE_COLUMNS).where(Video.id.in_(select(candidates.c.id))),
+            q,
+        )
+        count_query = select(func.count()).select_from(candidates)
+    else:
+        query = apply_video_ordering(apply_video_filters(select(*VIDEO_RESPONSE_COLUMNS), status))
+        count_query = apply_video_filters(select(func.count(Video.id)), status)
+    query = query.offset(skip).limit(limit)
+
+    result = await db.execute(query)
+    keys = tuple(result.keys())
+    videos = [dict(zip(keys, row, strict=True)) for row in result.all()]
+
+    total = (await db.execute(count_query)).scalar_one()
+
+    return videos, total
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+async def iter_video_export(
+    db_session: async_sessionmaker[AsyncSession],
+    export_format: ExportFormat,
+    status: str | None = None,
+    q: str | None = None,
+    chunk_rows: int = 1000,
+) -> AsyncIterator[bytes]:
+    """
+    Yields the filtered catalog as NDJSON or CSV, one encoded chunk per ``chunk_rows`` rows.
+
+    Rows are read through a server-side cursor (``yield_per``), so memory use does not depend on
+    the catalog size. Rows are ordered by id, which Postgres can stream from the primary key
+    without sorting the whole result.
+    """
+    query = (
+        apply_video_filters(select(*VIDEO_EXPORT_COLUMNS), status, q)
+        .order_by(Video.id)
+        .execution_options(yield_per=chunk_rows)
+    )
+
+    async with db_session() as session:
+        result = await session.stream(query)
+        keys = tuple(result.keys())
+
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(keys)
+            async for rows in result.partitions():
+                writer.writerows([_csv_value(value) for value in row] for row in rows)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+            return
+
+        async for rows in result.partitions():
+            yield b"".join(orjson.dumps(dict(zip(keys, row, strict=True))) + b"\n" for row in rows)
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import bindparam, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from server.storages import VideoStat
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock, щоб звірку одночасно виконував лише один воркер
+RECONCILE_LOCK_ID = 7_041_001
+
+# Розкладає рядок videos на рядки video_stats, до яких він входить
+_DIMENSIONS = """
+    CROSS JOIN LATERAL (VALUES
+        ('total', ''),
+        ('status', coalesce(v.status, '')),
+        ('content_type', v.content_type),
+        ('day', to_char(v.created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD'))
+    ) AS d(dimension, key)
+"""
+_CONTRIBUTION = "count(*) AS count, sum(v.size_bytes) AS size_bytes, sum(coalesce(v.duration, 0)) AS duration"
+
+# Рядки відео блокуються раніше за рядки статистики. Кожна транзакція змінює статистику одним запитом,
+# який блокує її рядки в порядку ключа, тож конкурентні транзакції не можуть заблокувати одна одну по колу
+_LOCKED_VIDEOS = f"""
+    FROM (
+        SELECT id, status, content_type, created_at, size_bytes, duration
+        FROM videos
+        WHERE id IN :video_ids
+        ORDER BY id
+        FOR UPDATE
+    ) AS v
+    {_DIMENSIONS}
+"""
+
+_ADD_TO_STATS = """
+    ON CONFLICT (dimension, key) DO UPDATE SET
+        count = video_stats.count + excluded.count,
+        size_bytes = video_stats.size_bytes + excluded.size_bytes,
+        duration = video_stats.duration + excluded.duration
+"""
+
+ADJUST_STATS = text(
+    f"""
+    INSERT INTO video_stats (dimension, key, count, size_bytes, duration)
+    SELECT d.dimension, d.key, :sign * count(*), :sign * sum(v.size_bytes), :sign * sum(coalesce(v.duration, 0))
+    {_LOCKED_VIDEOS}
+    GROUP BY d.dimension, d.key
+    ORDER BY d.dimension, d.key
+    {_ADD_TO_STATS}
+    """,
+).bindparams(bindparam("video_ids", expanding=True))
+
+SNAPSHOT_STATS = text(
+    f"""
+    SELECT d.dimension, d.key, {_CONTRIBUTION}
+    {_LOCKED_VIDEOS}
+    GROUP BY d.dimension, d.key
+    """,
+).bindparams(bindparam("video_ids", expanding=True))
+
+# Новий внесок рядків мінус знімок старого, одним запитом: зміна статусу не блокує старий і новий ключі окремо
+CHANGE_STATS = text(
+    f"""
+    INSERT INTO video_stats (dimension, key, count, size_bytes, duration)
+    SELECT dimension, key, sum(count), sum(size_bytes), sum(duration)
+    FROM (
+        SELECT d.dimension, d.key, {_CONTRIBUTION}
+        {_LOCKED_VIDEOS}
+        GROUP BY d.dimension, d.key
+        UNION ALL
+        SELECT * FROM unnest(
+            CAST(:dimensions AS text[]),
+            CAST(:keys AS text[]),
+            CAST(:counts AS bigint[]),
+            CAST(:sizes AS bigint[]),
+            CAST(:durations AS bigint[])
+        )
+    ) AS delta (dimension, key, count, size_bytes, duration)
+    GROUP BY dimension, key
+    HAVING sum(count) <> 0 OR sum(size_bytes) <> 0 OR sum(duration) <> 0
+    ORDER BY dimension, key
+    {_ADD_TO_STATS}
+    """,
+).bindparams(bindparam("video_ids", expanding=True))
+
+# Свіжий підрахунок і rollup читаються з одного знімка запиту, а в них зміни відео і статистики комітяться разом,
+# тож різниця між ними - це саме дрейф. Вона додається як дельта, тому зміни, закомічені після знімка, не губляться
+RECONCILE_STATS = text(
+    f"""
+    WITH fresh AS (
+        SELECT d.dimension, d.key, {_CONTRIBUTION}
+        FROM videos v
+        {_DIMENSIONS}
+        GROUP BY d.dimension, d.key
+    ),
+    drift AS (
+        SELECT
+            coalesce(f.dimension, s.dimension) AS dimension,
+            coalesce(f.key, s.key) AS key,
+            coalesce(f.count, 0) - coalesce(s.count, 0) AS count,
+            coalesce(f.size_bytes, 0) - coalesce(s.size_bytes, 0) AS size_bytes,
+            coalesce(f.duration, 0) - coalesce(s.duration, 0) AS duration
+        FROM fresh f
+        FULL JOIN video_stats s ON s.dimension = f.dimension AND s.key = f.key
+    ),
+    corrected AS (
+        INSERT INTO video_stats (dimension, key, count, size_bytes, duration)
+        SELECT dimension, key, count, size_bytes, duration
+        FROM drift
+        WHERE count <> 0 OR size_bytes <> 0 OR duration <> 0
+        ORDER BY dimension, key
+        {_ADD_TO_STATS}
+        RETURNING 1
+    )
+    SELECT count(*) FROM corrected
+    """,
+)
+DELETE_EMPTY_STATS = text("DELETE FROM video_stats WHERE count = 0 AND size_bytes = 0 AND duration = 0")
+
+VideoStatsSnapshot = list[tuple[str, str, int, int, int]]
+
+
+async def adjust_video_stats(db: AsyncSession, video_ids: Iterable[int], sign: int) -> None:
+    """
+    Adds (``sign=1``) or subtracts (``sign=-1``) the current rows of ``video_ids`` to the rollup.
+
+    Runs in the caller's transaction: subtract before deleting videos, add after inserting them,
+    so the rollup changes atomically with the rows. For videos that are updated use
+    ``snapshot_video_stats`` and ``apply_video_stats_change``.
+    """
+    video_ids = list(video_ids)
+    if video_ids:
+        await db.execute(ADJUST_STATS, {"sign": sign, "video_ids": video_ids})
+
+
+async def snapshot_video_stats(db: AsyncSession, video_ids: Iterable[int]) -> VideoStatsSnapshot:
+    """
+    Locks the rows of ``video_ids`` and reads what they contribute to the rollup.
+
+    Take it in the transaction that updates the rows, before changing them, and pass it to
+    ``apply_video_stats_change`` after the change is flushed.
+    """
+    video_ids = list(video_ids)
+    if not video_ids:
+        return []
+    result = await db.execute(SNAPSHOT_STATS, {"video_ids": video_ids})
+    return [(row.dimension, row.key, row.count, int(row.size_bytes), int(row.duration)) for row in result]
+
+
+async def apply_video_stats_change(db: AsyncSession, video_ids: Iterable[int], before: VideoStatsSnapshot) -> None:
+    """Replaces the contribution ``before`` of ``video_ids`` with that of their current rows in one statement"""
+    video_ids = list(video_ids)
+    if not video_ids:
+        return
+    await db.execute(
+        CHANGE_STATS,
+        {
+            "video_ids": video_ids,
+            "dimensions": [dimension for dimension, _, _, _, _ in before],
+            "keys": [key for _, key, _, _, _ in before],
+            "counts": [-count for _, _, count, _, _ in before],
+            "sizes": [-size for _, _, _, size, _ in before],
+            "durations": [-duration for _, _, _, _, duration in before],
+        },
+    )
+
+
+async def reconcile_video_stats(db: AsyncSession) -> int:
+    """
+    Recomputes the rollup from ``videos`` and fixes rows that drifted
+
+    The recount reads the whole ``videos`` table, but takes no table locks: writers are only held up
+    on the rollup rows that actually drifted. Reconciliations are serialized with an advisory lock.
+
+    Returns:
+        Number of corrected rollup rows
+    """
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": RECONCILE_LOCK_ID})
+    corrected = (await db.execute(RECONCILE_STATS)).scalar_one()
+    await db.commit()
+
+    # Порожні рядки (наприклад, статус, якого більше немає) прибираємо окремою транзакцією
+    await db.execute(DELETE_EMPTY_STATS)
+    await db.commit()
+    return corrected
+
+
+async def fetch_video_stats(db: AsyncSession, days: int = 30) -> dict[str, Any]:
+    """Reads the rollup: totals, breakdowns by status and content type, and ingest for the last ``days`` days"""
+    since = (datetime.now(UTC) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    result = await db.execute(
+        select(VideoStat.dimension, VideoStat.key, VideoStat.count, VideoStat.size_bytes, VideoStat.duration)
+        .where(
+            or_(
+                VideoStat.dimension.in_(("total", "status", "content_type")),
+                (VideoStat.dimension == "day") & (VideoStat.key >= since),
+            ),
+            VideoStat.count != 0,
+        ),
+    )
+
+    stats: dict[str, Any] = {
+        "total": {"count": 0, "size_bytes": 0, "duration": 0},
+        "by_status": {},
+        "by_content_type": {},
+        "daily": {},
+    }
+    sections = {"status": "by_status", "content_type": "by_content_type", "day": "daily"}
+    for row in result.all():
+        bucket = {"count": row.count, "size_bytes": row.size_bytes, "duration": row.duration}
+        if row.dimension == "total":
+            stats["total"] = bucket
+        else:
+            stats[sections[row.dimension]][row.key] = bucket
+    stats["daily"] = dict(sorted(stats["daily"].items()))
+    return stats
+
+
+async def run_stats_reconciliation(db_session: async_sessionmaker[AsyncSession], interval: float) -> None:
+    """Periodically reconciles the rollup; with several workers only the one holding the advisory lock does it"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with db_session() as session:
+                locked = (
+                    await session.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": RECONCILE_LOCK_ID})
+                ).scalar_one()
+                if not locked:
+                    continue
+                corrected = await reconcile_video_stats(session)
+            if corrected:
+                logger.warning("Video stats drifted, corrected %s rollup rows", corrected)
+        except Exception as e:
+            logger.error("Video stats reconciliation failed: %s", str(e))
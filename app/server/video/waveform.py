@@ -0,0 +1,146 @@
+import asyncio
+import contextlib
+import logging
+import struct
+from collections.abc import AsyncIterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Частота, до якої ffmpeg передискретизує звук. Для малювання хвилі вищої не потрібно
+WAVEFORM_SAMPLE_RATE = 8000
+READ_SIZE = 64 * 1024
+
+# Заголовок формату audiowaveform .dat версії 1:
+# version, flags (0 = 16-bit, 1 = 8-bit), sample_rate, samples_per_pixel, length (кількість пар min/max)
+DAT_HEADER = struct.Struct("<iIiiI")
+DAT_VERSION = 1
+DAT_FLAG_8_BIT = 1
+
+
+class WaveformPeaks:
+    """
+    Reduces a stream of signed 16-bit mono samples to min/max pairs, one per ``samples_per_peak`` samples.
+
+    Complete bins are reduced with a single vectorized reshape per chunk. Samples that do not fill a bin
+    are kept until the next chunk, and the last partial bin is reduced in ``finish``.
+    """
+
+    def __init__(self, samples_per_peak: int) -> None:
+        self.samples_per_peak = samples_per_peak
+        self._pending = b""
+        self._mins: list[np.ndarray] = []
+        self._maxs: list[np.ndarray] = []
+
+    def feed(self, data: bytes) -> None:
+        data = self._pending + data
+        bin_bytes = self.samples_per_peak * 2
+        complete = len(data) - len(data) % bin_bytes
+        self._pending = data[complete:]
+        if complete:
+            bins = np.frombuffer(data, dtype="<i2", count=complete // 2).reshape(-1, self.samples_per_peak)
+            self._mins.append(bins.min(axis=1))
+            self._maxs.append(bins.max(axis=1))
+
+    def finish(self) -> tuple[np.ndarray, np.ndarray]:
+        tail = np.frombuffer(self._pending, dtype="<i2", count=len(self._pending) // 2)
+        if tail.size:
+            self._mins.append(tail.min(keepdims=True))
+            self._maxs.append(tail.max(keepdims=True))
+        self._pending = b""
+        if not self._mins:
+            empty = np.empty(0, dtype=np.int16)
+            return empty, empty
+        return np.concatenate(self._mins), np.concatenate(self._maxs)
+
+
+def encode_waveform_dat(mins: np.ndarray, maxs: np.ndarray, samples_per_peak: int, bits: int = 8) -> bytes:
+    """
+    Encodes peaks in the audiowaveform binary ``.dat`` format (version 1).
+
+    Args:
+        mins: Minimum of every bin as int16
+        maxs: Maximum of every bin as int16
+        samples_per_peak: Number of samples reduced into one pair
+        bits: 8 for one signed byte per value, 16 for two
+
+    Returns:
+        Header followed by interleaved min/max pairs, little-endian
+    """
+    pairs = np.empty(mins.size * 2, dtype=np.int16)
+    pairs[0::2] = mins
+    pairs[1::2] = maxs
+    if bits == 8:
+        # Зсув на 8 біт переводить діапазон int16 у int8 без переповнення
+        body = (pairs >> 8).astype(np.int8).tobytes()
+        flags = DAT_FLAG_8_BIT
+    else:
+        body = pairs.astype("<i2").tobytes()
+        flags = 0
+    header = DAT_HEADER.pack(DAT_VERSION, flags, WAVEFORM_SAMPLE_RATE, samples_per_peak, mins.size)
+    return header + body
+
+
+async def _iter_pcm(process: asyncio.subprocess.Process) -> AsyncIterator[bytes]:
+    while chunk := await process.stdout.read(READ_SIZE):
+        yield chunk
+
+
+async def generate_waveform(video_path: str, peaks_per_second: int, bits: int = 8) -> bytes | None:
+    """
+    Generates waveform peaks for the audio track of a video
+
+    Args:
+        video_path: Path to the local video file
+        peaks_per_second: Number of min/max pairs per second of audio
+        bits: Resolution of the stored peaks, 8 or 16
+
+    Returns:
+        Waveform in the audiowaveform ``.dat`` format, or None if the video has no audio track
+    """
+    samples_per_peak = max(1, WAVEFORM_SAMPLE_RATE // peaks_per_second)
+
+    # Один прохід ffmpeg: декодуємо лише звук у моно 16-bit PCM і читаємо його зі stdout потоком
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-i", video_path,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(WAVEFORM_SAMPLE_RATE),
+        "-f", "s16le",
+        "-acodec", "pcm_s16le",
+        "pipe:1",
+    ]
+
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    # stderr читаємо паралельно, щоб ffmpeg не заблокувався на заповненому каналі
+    stderr_task = asyncio.create_task(process.stderr.read())
+
+    peaks = WaveformPeaks(samples_per_peak)
+    try:
+        async for chunk in _iter_pcm(process):
+            peaks.feed(chunk)
+    except BaseException:
+        with contextlib.suppress(ProcessLookupError):
+            process.kill()
+        raise
+    finally:
+        stderr = await stderr_task
+        await process.wait()
+
+    mins, maxs = peaks.finish()
+    if not mins.size:
+        # Немає звукової доріжки (або її не вдалося декодувати) - відео обробляємо без хвилі
+        logger.info("No audio decoded from %s, skipping waveform: %s", video_path, stderr.decode().strip())
+        return None
+    if process.returncode != 0:
+        # Хвиля лише допоміжна, тож через пошкоджений звук не позначаємо все відео помилковим
+        logger.warning("Failed to decode audio of %s, skipping waveform: %s", video_path, stderr.decode().strip())
+        return None
+
+    return encode_waveform_dat(mins, maxs, samples_per_peak, bits)
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import pathlib
+import tempfile
+import uuid
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+# Тести з базою беруть PSQL_* з оточення (база з накатаними міграціями); файли пишуться в локальне сховище.
+# Чи є база, визначаємо до підстановки заглушок нижче
+DB_CONFIGURED = bool(os.environ.get("PSQL_HOST"))
+
+# server.settings читає PSQL_* під час імпорту, тож без бази підставляємо заглушки, щоб модулі імпортувалися
+os.environ.setdefault("PSQL_HOST", "db-not-configured.invalid")
+os.environ.setdefault("PSQL_PORT", "5432")
+os.environ.setdefault("PSQL_USER", "tests")
+os.environ.setdefault("PSQL_PASSWORD", "tests")
+os.environ.setdefault("PSQL_DB", "tests")
+
+_TEST_DIR = tempfile.mkdtemp(prefix="video-storage-tests-")
+os.environ.setdefault("STORAGE_BACKEND", "local")
+os.environ.setdefault("LOCAL_STORAGE_DIR", os.path.join(_TEST_DIR, "storage"))
+os.environ.setdefault("TEMP_DIR", os.path.join(_TEST_DIR, "temp"))
+os.environ.setdefault("STREAM_CACHE_DIR", "")
+
+requires_db = pytest.mark.skipif(not DB_CONFIGURED, reason="PSQL_* settings are not configured")
+
+DbScenario = Callable[..., Awaitable[None]]
+
+
+@pytest.fixture
+def run_db() -> Callable[[DbScenario], None]:
+    """Runs ``scenario(db_session)`` in a fresh event loop with its own connection pool"""
+    if not DB_CONFIGURED:
+        pytest.skip("PSQL_* settings are not configured")
+
+    from server.dependencies import get_settings
+    from server.storages import close_db, create_db_session_pool
+
+    def run(scenario: DbScenario) -> None:
+        async def main() -> None:
+            engine, db_session = await create_db_session_pool(get_settings())
+            try:
+                await scenario(db_session)
+            finally:
+                await close_db(engine)
+
+        asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture
+def stored_video() -> Callable[..., dict]:
+    """Factory that puts a file of ``size`` zero bytes into the local storage backend and returns its file info"""
+    from server.dependencies import get_settings
+
+    settings = get_settings()
+
+    def store(size: int = 16, content_type: str = "video/mp4") -> dict:
+        pathname = f"videos/{uuid.uuid4().hex}.mp4"
+        path = pathlib.Path(settings.local_storage_dir) / pathname
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"\0" * size)
+        return {
+            "url": f"{settings.local_storage_url.rstrip('/')}/{pathname}",
+            "pathname": pathname,
+            "content_type": content_type,
+            "size_bytes": size,
+        }
+
+    return store
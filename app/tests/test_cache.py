@@ -0,0 +1,130 @@
+import asyncio
+from datetime import UTC, datetime
+
+from server.video.cache import VideoCache, VideoChangeListener, VideoRecord
+
+NOW = datetime(2025, 4, 1, tzinfo=UTC)
+
+
+def record(video_id: int, title: str = "video") -> VideoRecord:
+    return VideoRecord(
+        id=video_id,
+        title=title,
+        file_path=f"https://blob.test/videos/{video_id}.mp4",
+        thumbnail_path="",
+        waveform_path=None,
+        content_type="video/mp4",
+        size_bytes=10,
+        duration=None,
+        status="processing",
+        upload_completed=True,
+        processing_completed=False,
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+def active_cache(**kwargs: float) -> VideoCache:
+    cache = VideoCache(**kwargs)
+    cache.active = True
+    return cache
+
+
+def test_inactive_cache_stores_nothing() -> None:
+    cache = VideoCache()
+    cache.put(record(1), cache.begin_read())
+
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_record_is_evicted() -> None:
+    cache = active_cache(max_size=2)
+    for video_id in (1, 2):
+        cache.put(record(video_id), cache.begin_read())
+    assert cache.get(1) is not None
+
+    cache.put(record(3), cache.begin_read())
+
+    assert [video_id for video_id in (1, 2, 3) if cache.get(video_id)] == [1, 3]
+
+
+def test_invalidation_rejects_reads_that_started_before_it() -> None:
+    cache = active_cache()
+    slow_read = cache.begin_read()
+    cache.put(record(1, "old"), cache.begin_read())
+
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+    # Читання почалося до зміни, тож могло повернути старі дані
+    cache.put(record(1, "old"), slow_read)
+    assert cache.get(1) is None
+
+    cache.put(record(1, "new"), cache.begin_read())
+    assert cache.get(1).title == "new"
+
+
+def test_stale_window_covers_replica_lag() -> None:
+    cache = active_cache(stale_window=60)
+    cache.invalidate(1)
+
+    # Репліка ще могла не отримати зміну: запис не кешуємо, доки не мине вікно
+    cache.put(record(1), cache.begin_read())
+    assert cache.get(1) is None
+
+    cache.put(record(2), cache.begin_read())
+    assert cache.get(2) is not None
+
+
+def test_clear_rejects_reads_that_started_before_it() -> None:
+    cache = active_cache()
+    slow_read = cache.begin_read()
+    cache.put(record(1), cache.begin_read())
+
+    cache.clear()
+    cache.put(record(2), slow_read)
+
+    assert len(cache) == 0
+
+
+def test_notifications_invalidate_records(run_db, stored_video) -> None:  # noqa: ANN001
+    from sqlalchemy import delete, update
+
+    from server.dependencies import get_settings
+    from server.storages import Video
+    from server.storages.pydantic_models import VideoCreate
+    from server.video.base import create_video
+    from server.video.stats import adjust_video_stats
+
+    async def wait_for(condition, timeout: float = 5) -> None:  # noqa: ANN001
+        async with asyncio.timeout(timeout):
+            while not condition():
+                await asyncio.sleep(0.05)
+
+    async def scenario(db_session) -> None:  # noqa: ANN001
+        async with db_session() as db:
+            video_id = (await create_video(db, VideoCreate(title="cache test"), stored_video())).id
+
+        cache = VideoCache()
+        listener = VideoChangeListener(get_settings(), cache)
+        listener.start()
+        try:
+            await wait_for(lambda: cache.active)
+            cache.put(record(video_id), cache.begin_read())
+            assert cache.get(video_id) is not None
+
+            async with db_session() as db:
+                await db.execute(update(Video).where(Video.id == video_id).values(title="cache test, renamed"))
+                await db.commit()
+
+            await wait_for(lambda: cache.get(video_id) is None)
+        finally:
+            await listener.stop()
+            async with db_session() as db:
+                await adjust_video_stats(db, [video_id], -1)
+                await db.execute(delete(Video).where(Video.id == video_id))
+                await db.commit()
+        assert not cache.active
+
+    run_db(scenario)
@@ -0,0 +1,52 @@
+import uuid
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql
+
+from server.storages import Video
+from server.storages.pydantic_models import VideoCreate
+from server.video import catalog
+from server.video.base import create_video
+from server.video.catalog import MIN_FUZZY_QUERY_LENGTH, _search_condition
+from server.video.stats import adjust_video_stats
+
+
+def _sql(q: str) -> str:
+    return str(_search_condition(q).compile(dialect=postgresql.dialect()))
+
+
+def test_short_queries_skip_trigram_matching() -> None:
+    short = "d" * (MIN_FUZZY_QUERY_LENGTH - 1)
+
+    assert "<%" not in _sql(short)
+    assert "@@" in _sql(short)
+    assert "<%" in _sql("dogs")
+    # Без слів і коротше порогу запит нічого не знаходить, а не сканує весь каталог
+    assert _sql("!!") == "false"
+
+
+def test_search_total_is_capped(run_db, stored_video, monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setattr(catalog, "SEARCH_CANDIDATE_LIMIT", 2)
+    # Слово, якого немає в жодній іншій назві, щоб збігалися лише відео цього тесту
+    token = f"captest{uuid.uuid4().hex[:12]}"
+
+    async def scenario(db_session) -> None:  # noqa: ANN001
+        video_ids = []
+        try:
+            for number in range(3):
+                async with db_session() as db:
+                    registration = await create_video(db, VideoCreate(title=f"{token} {number}"), stored_video())
+                    video_ids.append(registration.id)
+
+            async with db_session() as db:
+                videos, total = await catalog.fetch_video_page(db, limit=5, q=token)
+            assert total == 2
+            assert len(videos) == 2
+            assert all(video["id"] in video_ids and token in video["title"] for video in videos)
+        finally:
+            async with db_session() as db:
+                await adjust_video_stats(db, video_ids, -1)
+                await db.execute(delete(Video).where(Video.id.in_(video_ids)))
+                await db.commit()
+
+    run_db(scenario)
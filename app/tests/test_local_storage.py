@@ -0,0 +1,113 @@
+import asyncio
+import pathlib
+import uuid
+
+import pytest
+
+from server.storage_backends.local import LocalStorageBackend
+
+PATHNAMES = [
+    "a.txt",
+    "a/b.mp4",
+    "a/c/d.mp4",
+    "a-b/e.mp4",
+    "thumbnails/1.jpg",
+    "videos/1.mp4",
+    "videos/10.mp4",
+    "videos/2.mp4",
+    "videos/sub/3.mp4",
+    "videos0.mp4",
+]
+
+
+@pytest.fixture
+def backend(tmp_path: pathlib.Path) -> LocalStorageBackend:
+    for pathname in PATHNAMES:
+        path = tmp_path / pathname
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+    # Недописане завантаження не є блобом
+    (tmp_path / "videos" / ".3.mp4.abc.part").write_bytes(b"x")
+    return LocalStorageBackend(str(tmp_path), "http://files.test")
+
+
+def list_all(backend: LocalStorageBackend, prefix: str | None, limit: int) -> list[str]:
+    async def scenario() -> list[str]:
+        pathnames, cursor = [], None
+        while True:
+            page = await backend.list_page(prefix=prefix, cursor=cursor, limit=limit)
+            pathnames += [blob.pathname for blob in page.blobs]
+            assert len(page.blobs) <= limit
+            if not page.has_more:
+                return pathnames
+            cursor = page.cursor
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("prefix", [None, "a", "a/", "videos/", "videos/1", "missing/"])
+@pytest.mark.parametrize("limit", [1, 2, 3, 100])
+def test_pages_follow_sorted_pathnames(backend: LocalStorageBackend, prefix: str | None, limit: int) -> None:
+    expected = sorted(pathname for pathname in PATHNAMES if pathname.startswith(prefix or ""))
+
+    assert list_all(backend, prefix, limit) == expected
+
+
+def test_listing_sees_new_files(backend: LocalStorageBackend) -> None:
+    assert list_all(backend, "videos/", 100) == ["videos/1.mp4", "videos/10.mp4", "videos/2.mp4", "videos/sub/3.mp4"]
+
+    (backend.root / "videos" / "15.mp4").write_bytes(b"x")
+    (backend.root / "videos" / "1.mp4").unlink()
+
+    assert list_all(backend, "videos/", 100) == ["videos/10.mp4", "videos/15.mp4", "videos/2.mp4", "videos/sub/3.mp4"]
+
+
+def test_files_endpoint_serves_ranges() -> None:
+    from fastapi.testclient import TestClient
+
+    from server.app import app
+    from server.dependencies import get_storage_backend
+
+    body = bytes(range(256)) * 4
+    pathname = f"videos/{uuid.uuid4().hex}.mp4"
+    path = get_storage_backend().path_for(pathname)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
+    url = f"/files/{pathname}"
+
+    # Без lifespan: роздача локальних файлів не потребує бази
+    client = TestClient(app, raise_server_exceptions=False)
+    full = client.get(url)
+    assert full.status_code == 200
+    assert full.content == body
+    assert full.headers["content-type"] == "video/mp4"
+
+    partial = client.get(url, headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == "bytes 10-19/1024"
+    assert partial.content == body[10:20]
+
+    multipart = client.get(url, headers={"Range": "bytes=0-1,100-101"})
+    assert multipart.status_code == 206
+    assert multipart.headers["content-type"].startswith("multipart/byteranges")
+    assert int(multipart.headers["content-length"]) == len(multipart.content)
+    assert b"Content-Range: bytes 100-101/1024\r\n\r\n" + body[100:102] in multipart.content
+
+    unsatisfiable = client.get(url, headers={"Range": "bytes=5000-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == "bytes */1024"
+
+    etag = full.headers["etag"]
+    assert client.get(url, headers={"Range": "bytes=0-0", "If-Range": etag}).status_code == 206
+    assert client.get(url, headers={"Range": "bytes=0-0", "If-Range": '"0-0"'}).content == body
+
+
+def test_file_response_reads_configured_chunks(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from server.dependencies import get_settings
+    from server.endpoints.responses import FileRangeResponse
+
+    monkeypatch.setattr(get_settings(), "stream_chunk_size", 10)
+    path = tmp_path / "a.mp4"
+    path.write_bytes(b"x" * 25)
+
+    assert FileRangeResponse(path).chunk_size == 10
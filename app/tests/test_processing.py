@@ -0,0 +1,122 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+
+from server.storages import Video, VideoProcessingJob
+from server.storages.pydantic_models import VideoCreate
+from server.video.base import create_video, process_video
+from server.video.stats import adjust_video_stats, apply_video_stats_change, snapshot_video_stats
+
+
+def test_status_is_kept_until_required_results_exist(run_db, stored_video) -> None:  # noqa: ANN001
+    async def scenario(db_session) -> None:  # noqa: ANN001
+        async with db_session() as session:
+            registration = await create_video(session, VideoCreate(title="processing test"), stored_video())
+            initial_status = await session.scalar(select(Video.status).where(Video.id == registration.id))
+
+        # Повторна обробка без мініатюри і тривалості не робить відео готовим
+        async with db_session() as session:
+            await process_video(session, registration.id, stages=("stream_cache",))
+        async with db_session() as session:
+            video = (await session.execute(select(Video).where(Video.id == registration.id))).scalar_one()
+            assert (video.status, video.processing_completed) == (initial_status, False)
+
+            snapshot = await snapshot_video_stats(session, [video.id])
+            await session.execute(update(Video).where(Video.id == video.id).values(thumbnail_path="thumb", duration=3))
+            await apply_video_stats_change(session, [video.id], snapshot)
+            await session.commit()
+
+        # Результати з попереднього запуску теж рахуються
+        async with db_session() as session:
+            await process_video(session, registration.id, stages=("stream_cache",))
+        async with db_session() as session:
+            video = (await session.execute(select(Video).where(Video.id == registration.id))).scalar_one()
+            assert (video.status, video.processing_completed) == ("ready", True)
+
+    run_db(scenario)
+
+
+async def remove_videos(db_session, video_ids: list[int]) -> None:  # noqa: ANN001
+    async with db_session() as session:
+        await adjust_video_stats(session, video_ids, -1)
+        await session.execute(delete(Video).where(Video.id.in_(video_ids)))
+        await session.commit()
+
+
+def test_every_run_keeps_its_own_job(run_db, stored_video, monkeypatch) -> None:  # noqa: ANN001
+    from server.video import base
+
+    async def broken_stages(*_args: object) -> None:
+        raise RuntimeError("stage failed")
+
+    async def scenario(db_session) -> None:  # noqa: ANN001
+        async with db_session() as session:
+            registration = await create_video(session, VideoCreate(title="job history test"), stored_video())
+
+        try:
+            for _ in range(2):
+                async with db_session() as session:
+                    await process_video(session, registration.id, stages=("stream_cache",))
+
+            monkeypatch.setattr(base, "run_processing_stages", broken_stages)
+            async with db_session() as session:
+                with pytest.raises(HTTPException):
+                    await process_video(session, registration.id, stages=("stream_cache",))
+
+            async with db_session() as session:
+                jobs = (
+                    await session.execute(
+                        select(VideoProcessingJob)
+                        .where(VideoProcessingJob.video_id == registration.id)
+                        .order_by(VideoProcessingJob.id),
+                    )
+                ).scalars().all()
+
+            # Перший запуск бере завдання з реєстрації, а невдалий не переписує попередні
+            assert jobs[0].id == registration.job_id
+            assert [job.job_status for job in jobs] == ["completed", "completed", "failed"]
+            assert [job.error_message for job in jobs] == [None, None, "stage failed"]
+        finally:
+            await remove_videos(db_session, [registration.id])
+
+    run_db(scenario)
+
+
+def test_reprocess_continues_after_unexpected_errors(run_db, stored_video, monkeypatch, tmp_path) -> None:  # noqa: ANN001
+    from server.maintenance import reprocess
+
+    async def scenario(db_session) -> None:  # noqa: ANN001
+        video_ids = []
+        processed = []
+
+        async def flaky_process_video(_session, video_id: int, _stages) -> None:  # noqa: ANN001
+            if video_id == video_ids[1]:
+                raise ConnectionResetError("storage went away")
+            processed.append(video_id)
+
+        try:
+            for number in range(3):
+                async with db_session() as session:
+                    registration = await create_video(session, VideoCreate(title=f"reprocess {number}"), stored_video())
+                    video_ids.append(registration.id)
+            async with db_session() as session:
+                created_after = await session.scalar(select(Video.created_at).where(Video.id == video_ids[0]))
+
+            monkeypatch.setattr(reprocess, "process_video", flaky_process_video)
+            checkpoint = await reprocess.reprocess_videos(
+                db_session,
+                reprocess.ReprocessFilter(created_after=created_after),
+                ["stream_cache"],
+                tmp_path / "checkpoint.json",
+            )
+
+            # Несподівана помилка одного відео не зупиняє пакет і потрапляє в чекпоінт
+            assert video_ids[0] in processed
+            assert video_ids[2] in processed
+            assert checkpoint.failed_ids == [video_ids[1]]
+            assert checkpoint.last_id >= video_ids[2]
+            assert reprocess.Checkpoint.load(tmp_path / "checkpoint.json") == checkpoint
+        finally:
+            await remove_videos(db_session, video_ids)
+
+    run_db(scenario)
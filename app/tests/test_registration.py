@@ -0,0 +1,140 @@
+import hashlib
+import json
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from server.app import app
+from tests.conftest import requires_db
+
+pytestmark = requires_db
+
+
+@pytest.fixture(scope="module")
+def client() -> TestClient:
+    # Фонова обробка тестових "відео" падає, але на відповіді реєстрації це не впливає
+    with TestClient(app, raise_server_exceptions=False) as test_client:
+        yield test_client
+
+
+def blob(**fields: object) -> dict:
+    name = uuid.uuid4().hex
+    return {
+        "blobUrl": f"https://blob.test/videos/{name}.mp4",
+        "blobSize": 10,
+        "blobPathname": f"videos/{name}.mp4",
+        **fields,
+    }
+
+
+def test_repeated_registration_returns_the_same_video(client: TestClient) -> None:
+    payload = blob(title="idempotent")
+
+    first = client.post("/videos/register", json=payload)
+    assert first.status_code == 202
+    assert first.json()["message"] == "Video registration successful"
+
+    again = client.post("/videos/register", json=payload)
+    assert again.status_code == 200
+    assert again.json()["id"] == first.json()["id"]
+    assert again.json()["job_id"] == first.json()["job_id"]
+    assert again.json()["message"] == "Video already registered"
+
+
+def test_idempotency_key_returns_the_original_registration(client: TestClient) -> None:
+    key = uuid.uuid4().hex
+    payload = blob()
+
+    first = client.post("/videos/register", json=payload, headers={"Idempotency-Key": key})
+    again = client.post("/videos/register", json=payload, headers={"Idempotency-Key": key})
+
+    assert (first.status_code, again.status_code) == (202, 200)
+    assert again.json()["id"] == first.json()["id"]
+
+
+def test_batch_status_codes(client: TestClient) -> None:
+    videos = [blob(), blob()]
+
+    first = client.post("/videos/register/batch", json={"videos": videos})
+    assert first.status_code == 202
+    first_ids = [video["id"] for video in first.json()["videos"]]
+    assert len(set(first_ids)) == 2
+
+    # Частина нова - 202, повтор тих самих - 200
+    mixed = client.post("/videos/register/batch", json={"videos": [*videos, blob()]})
+    assert mixed.status_code == 202
+    assert [video["id"] for video in mixed.json()["videos"]][:2] == first_ids
+
+    again = client.post("/videos/register/batch", json={"videos": videos})
+    assert again.status_code == 200
+    assert [video["id"] for video in again.json()["videos"]] == first_ids
+    assert all(video["message"] == "Video already registered" for video in again.json()["videos"])
+
+
+def test_duplicate_urls_in_one_batch_create_one_video(client: TestClient) -> None:
+    payload = blob()
+
+    response = client.post("/videos/register/batch", json={"videos": [payload, payload]})
+
+    assert response.status_code == 202
+    first, second = response.json()["videos"]
+    assert first["id"] == second["id"]
+    assert (first["message"], second["message"]) == ("Video registration successful", "Video already registered")
+
+
+def test_idempotency_key_reused_for_another_blob_is_rejected(client: TestClient) -> None:
+    key = uuid.uuid4().hex
+    first = client.post("/videos/register", json=blob(), headers={"Idempotency-Key": key})
+    assert first.status_code == 202
+
+    other = blob()
+    reused = client.post("/videos/register", json=other, headers={"Idempotency-Key": key})
+    assert reused.status_code == 422
+
+    # Інше відео не зареєстроване: без ключа воно створюється як нове
+    assert client.post("/videos/register", json=other).status_code == 202
+
+
+def test_batch_idempotency_key_reused_for_another_batch_is_rejected(client: TestClient) -> None:
+    key = uuid.uuid4().hex
+    videos = [blob(), blob()]
+    first = client.post("/videos/register/batch", json={"videos": videos}, headers={"Idempotency-Key": key})
+    assert first.status_code == 202
+
+    added = blob()
+    changed = client.post(
+        "/videos/register/batch",
+        json={"videos": [*videos, added]},
+        headers={"Idempotency-Key": key},
+    )
+    assert changed.status_code == 422
+
+    # Нове відео зі зміненого пакета не лишилося в базі
+    assert client.post("/videos/register", json=added).status_code == 202
+
+
+def registration_key(payload: dict) -> str:
+    """Same key as the blob bridge sends: blob pathname plus a hash of the exact request body"""
+    return f"{payload['blobPathname']}:{hashlib.sha256(json.dumps(payload).encode()).hexdigest()}"
+
+
+def test_repeat_through_the_other_bridge_path_returns_the_video(client: TestClient) -> None:
+    # onUploadCompleted і /upload реєструють той самий блоб з різними тілами запиту
+    notification = blob(tokenPayload='{"pathname": "videos/x.mp4"}')
+    upload = {key: value for key, value in notification.items() if key != "tokenPayload"} | {"title": "Holiday"}
+
+    first = client.post(
+        "/videos/register",
+        json=notification,
+        headers={"Idempotency-Key": registration_key(notification)},
+    )
+    again = client.post("/videos/register", json=upload, headers={"Idempotency-Key": registration_key(upload)})
+    retried = client.post(
+        "/videos/register",
+        json=notification,
+        headers={"Idempotency-Key": registration_key(notification)},
+    )
+
+    assert (first.status_code, again.status_code, retried.status_code) == (202, 200, 200)
+    assert first.json()["id"] == again.json()["id"] == retried.json()["id"]
@@ -0,0 +1,75 @@
+import asyncio
+
+from starlette.responses import Response
+
+from server.storages.replica import (
+    WRITE_POSITION_HEADER,
+    ReplicaLagMonitor,
+    choose_read_session,
+    current_write_position,
+    parse_lsn,
+    remember_write,
+)
+
+PRIMARY = object()
+REPLICA = object()
+
+
+def make_monitor(lag: float | None, replayed: str | None) -> ReplicaLagMonitor:
+    monitor = ReplicaLagMonitor(engine=None, max_lag=5)  # type: ignore[arg-type]
+    monitor.lag = lag
+    monitor.replayed = parse_lsn(replayed)
+    return monitor
+
+
+def test_parse_lsn() -> None:
+    assert parse_lsn("0/1B0CD240") == 0x1B0CD240
+    assert parse_lsn("16/B374D848") == (0x16 << 32) | 0xB374D848
+    assert parse_lsn("16/B374D848") > parse_lsn("15/FFFFFFFF")
+    for malformed in (None, "", "junk", "1/xyz", "12"):
+        assert parse_lsn(malformed) is None
+
+
+def test_reads_go_to_primary_without_replica() -> None:
+    assert choose_read_session(PRIMARY, None, None, None) is PRIMARY
+
+
+def test_reads_go_to_healthy_replica() -> None:
+    monitor = make_monitor(lag=0.5, replayed="1/0")
+    assert choose_read_session(PRIMARY, REPLICA, monitor, None) is REPLICA
+    assert choose_read_session(PRIMARY, REPLICA, monitor, "junk") is REPLICA
+
+
+def test_reads_avoid_lagging_or_unreachable_replica() -> None:
+    assert choose_read_session(PRIMARY, REPLICA, make_monitor(lag=6, replayed="1/0"), None) is PRIMARY
+    assert choose_read_session(PRIMARY, REPLICA, make_monitor(lag=None, replayed=None), None) is PRIMARY
+
+
+def test_reads_wait_for_replica_to_apply_client_write() -> None:
+    monitor = make_monitor(lag=0.5, replayed="1/100")
+    assert choose_read_session(PRIMARY, REPLICA, monitor, "1/200") is PRIMARY
+    assert choose_read_session(PRIMARY, REPLICA, monitor, "1/100") is REPLICA
+    assert choose_read_session(PRIMARY, REPLICA, monitor, "0/FFFFFFFF") is REPLICA
+
+
+class Session:
+    def __init__(self) -> None:
+        self.queries = 0
+
+    async def scalar(self, statement) -> str:  # noqa: ANN001
+        self.queries += 1
+        return "1/200"
+
+
+def test_write_position_is_only_sent_with_a_replica() -> None:
+    session = Session()
+    response = Response()
+    remember_write(response, asyncio.run(current_write_position(session, None)))  # type: ignore[arg-type]
+
+    # Без репліки всі читання і так йдуть на основний сервер: ні запиту, ні заголовка
+    assert session.queries == 0
+    assert WRITE_POSITION_HEADER not in response.headers
+
+    remember_write(response, asyncio.run(current_write_position(session, REPLICA)))  # type: ignore[arg-type]
+    assert session.queries == 1
+    assert response.headers[WRITE_POSITION_HEADER] == "1/200"
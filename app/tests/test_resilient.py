@@ -0,0 +1,218 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+
+import pytest
+
+from server.storage_backends.base import BlobNotFoundError, BlobObject, BlobPage, StorageBackend, StorageError
+from server.storage_backends.resilient import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    ResilientStorageBackend,
+    RetryPolicy,
+)
+
+
+class FakeBackend(StorageBackend):
+    """Answers ``head`` with whatever the test puts into ``handler``"""
+
+    name = "fake"
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.handler: Callable[[], Awaitable[BlobObject]] = self.ok
+
+    @staticmethod
+    async def ok() -> BlobObject:
+        return BlobObject(url="u", pathname="p", size=1)
+
+    async def head(self, url: str) -> BlobObject:
+        self.calls += 1
+        return await self.handler()
+
+    async def put_stream(self, pathname, chunks, content_type):  # noqa: ANN001, ANN201
+        raise NotImplementedError
+
+    def get_stream(self, url, chunk_size=0):  # noqa: ANN001, ANN201
+        raise NotImplementedError
+
+    def get_range(self, url, start, end, chunk_size=0):  # noqa: ANN001, ANN201
+        raise NotImplementedError
+
+    async def delete_many(self, urls: Iterable[str]) -> int:
+        raise NotImplementedError
+
+    async def list_page(self, prefix=None, cursor=None, limit=1000) -> BlobPage:  # noqa: ANN001
+        raise NotImplementedError
+
+
+async def failing() -> BlobObject:
+    raise StorageError("boom")
+
+
+def make_backend(failure_threshold: int = 2) -> tuple[FakeBackend, ResilientStorageBackend]:
+    inner = FakeBackend()
+    backend = ResilientStorageBackend(
+        inner,
+        retry_policy=RetryPolicy(attempts=1),
+        timeout=1,
+        breaker=CircuitBreaker("fake", failure_threshold=failure_threshold, reset_timeout=0.05),
+    )
+    return inner, backend
+
+
+async def open_breaker(inner: FakeBackend, backend: ResilientStorageBackend) -> None:
+    inner.handler = failing
+    for _ in range(backend.breaker.failure_threshold):
+        with pytest.raises(StorageError):
+            await backend.head("u")
+    assert backend.breaker.state == CircuitState.OPEN
+
+
+def test_breaker_opens_after_consecutive_failures_and_rejects_calls() -> None:
+    async def scenario() -> None:
+        inner, backend = make_backend()
+        await open_breaker(inner, backend)
+
+        calls = inner.calls
+        with pytest.raises(CircuitOpenError):
+            await backend.head("u")
+        assert inner.calls == calls
+
+    asyncio.run(scenario())
+
+
+def test_successful_probe_closes_breaker() -> None:
+    async def scenario() -> None:
+        inner, backend = make_backend()
+        await open_breaker(inner, backend)
+
+        await asyncio.sleep(0.06)
+        inner.handler = inner.ok
+        await backend.head("u")
+        assert backend.breaker.state == CircuitState.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_failed_probe_reopens_breaker() -> None:
+    async def scenario() -> None:
+        inner, backend = make_backend()
+        await open_breaker(inner, backend)
+
+        await asyncio.sleep(0.06)
+        with pytest.raises(StorageError):
+            await backend.head("u")
+        assert backend.breaker.state == CircuitState.OPEN
+
+    asyncio.run(scenario())
+
+
+def test_not_found_counts_as_success() -> None:
+    async def scenario() -> None:
+        inner, backend = make_backend(failure_threshold=1)
+
+        async def not_found() -> BlobObject:
+            raise BlobNotFoundError("u")
+
+        inner.handler = not_found
+        for _ in range(3):
+            with pytest.raises(BlobNotFoundError):
+                await backend.head("u")
+        assert backend.breaker.state == CircuitState.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_only_one_probe_in_flight() -> None:
+    async def scenario() -> None:
+        inner, backend = make_backend()
+        await open_breaker(inner, backend)
+        await asyncio.sleep(0.06)
+
+        release = asyncio.Event()
+
+        async def slow() -> BlobObject:
+            await release.wait()
+            return await inner.ok()
+
+        inner.handler = slow
+        probe = asyncio.create_task(backend.head("u"))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await backend.head("u")
+
+        release.set()
+        await probe
+        assert backend.breaker.state == CircuitState.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_probe_releases_slot_and_reopens() -> None:
+    async def scenario() -> None:
+        inner, backend = make_backend()
+        await open_breaker(inner, backend)
+        await asyncio.sleep(0.06)
+
+        async def hang() -> BlobObject:
+            await asyncio.Event().wait()
+            raise AssertionError("unreachable")
+
+        inner.handler = hang
+        probe = asyncio.create_task(backend.head("u"))
+        await asyncio.sleep(0)
+        assert backend.breaker.state == CircuitState.HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert backend.breaker.state == CircuitState.OPEN
+
+        # Після reset_timeout новий пробний виклик знову дозволено
+        await asyncio.sleep(0.06)
+        inner.handler = inner.ok
+        await backend.head("u")
+        assert backend.breaker.state == CircuitState.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_unexpected_probe_error_releases_slot() -> None:
+    async def scenario() -> None:
+        inner, backend = make_backend()
+        await open_breaker(inner, backend)
+        await asyncio.sleep(0.06)
+
+        async def broken() -> BlobObject:
+            raise RuntimeError("bug")
+
+        inner.handler = broken
+        with pytest.raises(RuntimeError):
+            await backend.head("u")
+        assert backend.breaker.state == CircuitState.OPEN
+
+        await asyncio.sleep(0.06)
+        inner.handler = inner.ok
+        await backend.head("u")
+        assert backend.breaker.state == CircuitState.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_cancellation_while_closed_is_not_a_failure() -> None:
+    async def scenario() -> None:
+        inner, backend = make_backend(failure_threshold=1)
+
+        async def hang() -> BlobObject:
+            await asyncio.Event().wait()
+            raise AssertionError("unreachable")
+
+        inner.handler = hang
+        call = asyncio.create_task(backend.head("u"))
+        await asyncio.sleep(0)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        assert backend.breaker.state == CircuitState.CLOSED
+
+    asyncio.run(scenario())
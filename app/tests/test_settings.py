@@ -0,0 +1,19 @@
+from server.settings import Settings
+
+
+def test_connection_budget_covers_the_change_listener() -> None:
+    settings = Settings(web_workers=4, db_connection_budget=100, video_cache_size=10)
+
+    assert settings.db_listener_connections() == 1
+    assert settings.web_workers * (settings.db_pool_size() + settings.db_listener_connections()) <= 100
+
+
+def test_no_listener_without_video_cache_or_through_pgbouncer() -> None:
+    assert Settings(web_workers=4, video_cache_size=0).db_listener_connections() == 0
+    assert Settings(web_workers=4, pgbouncer=True).db_listener_connections() == 0
+    assert Settings(web_workers=4, db_connection_budget=100, video_cache_size=0).db_pool_size() == 25
+
+
+def test_replica_pool_uses_its_own_budget() -> None:
+    assert Settings(web_workers=4, db_connection_budget=100).db_replica_pool_size() == 25
+    assert Settings(web_workers=4, db_replica_connection_budget=40).db_replica_pool_size() == 10
@@ -0,0 +1,144 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text, update
+
+from server.app import app
+from server.storages import Video
+from server.storages.pydantic_models import VideoCreate
+from server.video.base import create_video, process_video
+from server.video.stats import (
+    apply_video_stats_change,
+    reconcile_video_stats,
+    snapshot_video_stats,
+)
+
+
+def unique_content_type() -> str:
+    # Унікальний тип, щоб рядок статистики належав лише цьому тесту
+    return f"video/x-test-{uuid.uuid4().hex[:8]}"
+
+
+async def read_stats(session, content_type: str) -> dict[tuple[str, str], tuple[int, int, int]]:  # noqa: ANN001
+    rows = await session.execute(
+        text(
+            """
+            SELECT dimension, key, count, size_bytes, duration FROM video_stats
+            WHERE dimension IN ('total', 'status') OR (dimension = 'content_type' AND key = :content_type)
+            """,
+        ),
+        {"content_type": content_type},
+    )
+    return {(row.dimension, row.key): (row.count, row.size_bytes, row.duration) for row in rows}
+
+
+def delta(before: dict, after: dict) -> dict:
+    keys = before.keys() | after.keys()
+    changes = {}
+    for key in keys:
+        old, new = before.get(key, (0, 0, 0)), after.get(key, (0, 0, 0))
+        diff = tuple(n - o for n, o in zip(new, old, strict=True))
+        if any(diff):
+            changes[key] = diff
+    return changes
+
+
+def test_rollup_follows_registration_processing_and_delete(run_db, stored_video) -> None:  # noqa: ANN001
+    file_info = stored_video(size=1000, content_type=unique_content_type())
+    content_type = file_info["content_type"]
+    state: dict = {}
+
+    async def register_and_process(db_session) -> None:  # noqa: ANN001
+        async with db_session() as session:
+            state["initial"] = await read_stats(session, content_type)
+            registration = await create_video(session, VideoCreate(title="stats test"), file_info)
+            state["id"] = registration.id
+            state["registered"] = await read_stats(session, content_type)
+            initial_status = await session.scalar(select(Video.status).where(Video.id == registration.id))
+            state["initial_status"] = initial_status
+
+            # Результати обов'язкових етапів уже є, тож обробка без етапів робить відео готовим
+            snapshot = await snapshot_video_stats(session, [registration.id])
+            await session.execute(
+                update(Video).where(Video.id == registration.id).values(thumbnail_path="thumb", duration=7),
+            )
+            await apply_video_stats_change(session, [registration.id], snapshot)
+            await session.commit()
+
+        async with db_session() as session:
+            before = await read_stats(session, content_type)
+            await process_video(session, state["id"], stages=())
+            state["before_processing"] = before
+            state["processed"] = await read_stats(session, content_type)
+
+    run_db(register_and_process)
+
+    assert delta(state["initial"], state["registered"]) == {
+        ("total", ""): (1, 1000, 0),
+        ("status", state["initial_status"]): (1, 1000, 0),
+        ("content_type", content_type): (1, 1000, 0),
+    }
+    assert delta(state["before_processing"], state["processed"]) == {
+        ("status", state["initial_status"]): (-1, -1000, -7),
+        ("status", "ready"): (1, 1000, 7),
+    }
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        assert client.delete(f"/videos/{state['id']}").status_code == 204
+
+    async def check_deleted(db_session) -> None:  # noqa: ANN001
+        async with db_session() as session:
+            state["deleted"] = await read_stats(session, content_type)
+            state["drift"] = await reconcile_video_stats(session)
+
+    run_db(check_deleted)
+
+    assert delta(state["processed"], state["deleted"]) == {
+        ("total", ""): (-1, -1000, -7),
+        ("status", "ready"): (-1, -1000, -7),
+        ("content_type", content_type): (-1, -1000, -7),
+    }
+    assert state["drift"] == 0
+
+
+def test_status_change_is_a_single_net_delta(run_db, stored_video) -> None:  # noqa: ANN001
+    file_info = stored_video(size=10, content_type=unique_content_type())
+    content_type = file_info["content_type"]
+
+    async def scenario(db_session) -> None:  # noqa: ANN001
+        async with db_session() as session:
+            registration = await create_video(session, VideoCreate(title="stats test"), file_info)
+
+        async with db_session() as session:
+            before = await read_stats(session, content_type)
+            snapshot = await snapshot_video_stats(session, [registration.id])
+            await session.execute(update(Video).where(Video.id == registration.id).values(status="error"))
+            await apply_video_stats_change(session, [registration.id], snapshot)
+            await session.commit()
+            after = await read_stats(session, content_type)
+
+            status = next(key for (dimension, key) in snapshot_keys(snapshot) if dimension == "status")
+            assert delta(before, after) == {("status", status): (-1, -10, 0), ("status", "error"): (1, 10, 0)}
+            assert await reconcile_video_stats(session) == 0
+
+    run_db(scenario)
+
+
+def snapshot_keys(snapshot: list) -> list[tuple[str, str]]:
+    return [(dimension, key) for dimension, key, *_ in snapshot]
+
+
+def test_reconcile_corrects_drift(run_db) -> None:  # noqa: ANN001
+    async def scenario(db_session) -> None:  # noqa: ANN001
+        async with db_session() as session:
+            assert await reconcile_video_stats(session) == 0
+            await session.execute(text("UPDATE video_stats SET count = count + 5 WHERE dimension = 'total'"))
+            await session.execute(text("INSERT INTO video_stats VALUES ('status', 'no-such-status', 3, 0, 0)"))
+            await session.commit()
+
+            assert await reconcile_video_stats(session) == 2
+            leftover = await session.scalar(text("SELECT count(*) FROM video_stats WHERE key = 'no-such-status'"))
+            assert leftover == 0
+            assert await reconcile_video_stats(session) == 0
+
+    run_db(scenario)
@@ -0,0 +1,202 @@
+import asyncio
+import os
+import pathlib
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from server.storage_backends.base import BlobObject
+from server.streaming import base as streaming
+from server.streaming.base import (
+    MAX_RANGES,
+    RangeNotSatisfiableError,
+    StreamCacheUsage,
+    blob_size,
+    cached_file,
+    if_range_matches,
+    make_etag,
+    parse_range_header,
+    store_in_stream_cache,
+)
+from tests.conftest import requires_db
+
+MODIFIED = datetime(2025, 4, 1, 12, 0, 0, tzinfo=UTC)
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (None, None),
+        ("bytes=0-99", [(0, 99)]),
+        ("bytes=100-", [(100, 999)]),
+        ("bytes=-100", [(900, 999)]),
+        ("bytes=-5000", [(0, 999)]),
+        ("bytes=900-5000", [(900, 999)]),
+        ("bytes=0-9, 5-19, 20-29", [(0, 29)]),
+        ("bytes=500-599,0-99", [(0, 99), (500, 599)]),
+        ("bytes=0-9,2000-3000", [(0, 9)]),
+        # Невідома одиниця або синтаксична помилка - віддаємо весь файл
+        ("items=0-9", None),
+        ("bytes=abc-1", None),
+        ("bytes=9-1", None),
+        ("bytes=5", None),
+    ],
+)
+def test_parse_range_header(header: str | None, expected: list[tuple[int, int]] | None) -> None:
+    assert parse_range_header(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5000-6000", "bytes=-0", "bytes=1000-1001,2000-"])
+def test_unsatisfiable_ranges(header: str) -> None:
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range_header(header, 1000)
+
+
+def test_too_many_ranges_serve_the_whole_file() -> None:
+    header = "bytes=" + ",".join(f"{i * 10}-{i * 10 + 1}" for i in range(MAX_RANGES + 1))
+    assert parse_range_header(header, 1000) is None
+
+
+def test_if_range() -> None:
+    etag = make_etag("https://blob.test/videos/a.mp4", 1000)
+
+    assert if_range_matches(None, etag, MODIFIED)
+    assert if_range_matches(etag, etag, MODIFIED)
+    assert not if_range_matches(make_etag("https://blob.test/videos/b.mp4", 1000), etag, MODIFIED)
+    assert not if_range_matches(make_etag("https://blob.test/videos/a.mp4", 999), etag, MODIFIED)
+    assert not if_range_matches(f"W/{etag}", etag, MODIFIED)
+    assert if_range_matches("Tue, 01 Apr 2025 12:00:00 GMT", etag, MODIFIED)
+    assert not if_range_matches("Tue, 01 Apr 2025 11:59:59 GMT", etag, MODIFIED)
+    assert not if_range_matches("not a date", etag, MODIFIED)
+    assert not if_range_matches("Tue, 01 Apr 2025 12:00:00 GMT", etag, None)
+
+
+@pytest.fixture
+def stream_cache(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> pathlib.Path:
+    cache_dir = tmp_path / "stream-cache"
+    monkeypatch.setattr(streaming.settings, "stream_cache_dir", str(cache_dir))
+    monkeypatch.setattr(streaming.settings, "stream_cache_max_bytes", 1000)
+    monkeypatch.setattr(streaming, "stream_cache_usage", StreamCacheUsage())
+    return cache_dir
+
+
+def _source(tmp_path: pathlib.Path, size: int) -> str:
+    path = tmp_path / f"{uuid.uuid4().hex}.mp4"
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_stream_cache_stores_and_tracks_usage(stream_cache: pathlib.Path, tmp_path: pathlib.Path) -> None:
+    asyncio.run(store_in_stream_cache("https://blob.test/a.mp4", _source(tmp_path, 300)))
+    asyncio.run(store_in_stream_cache("https://blob.test/b.mp4", _source(tmp_path, 300)))
+
+    assert cached_file("https://blob.test/a.mp4").read_bytes() == b"x" * 300
+    assert cached_file("https://blob.test/missing.mp4") is None
+    assert streaming.stream_cache_usage.total_bytes == 600
+    # Тимчасових файлів після копіювання не лишається
+    assert not [path for path in stream_cache.rglob("*.part")]
+
+    asyncio.run(streaming.drop_from_stream_cache("https://blob.test/a.mp4"))
+    assert cached_file("https://blob.test/a.mp4") is None
+    assert streaming.stream_cache_usage.total_bytes == 300
+
+
+def test_stream_cache_evicts_least_recently_read(stream_cache: pathlib.Path, tmp_path: pathlib.Path) -> None:
+    urls = [f"https://blob.test/{name}.mp4" for name in "abc"]
+    for url in urls:
+        asyncio.run(store_in_stream_cache(url, _source(tmp_path, 300)))
+    # Старі файли, а на "a" щойно звернулися - її mtime оновлюється
+    old = time.time() - 3600
+    for age, url in enumerate(urls):
+        os.utime(streaming.stream_cache_path(url), (old + age, old + age))
+    assert cached_file(urls[0]) is not None
+
+    asyncio.run(store_in_stream_cache("https://blob.test/d.mp4", _source(tmp_path, 300)))
+
+    # Витіснення до 90% ліміту прибирає лише "b": найстаріший "a" щойно прочитали
+    remaining = [url for url in [*urls, "https://blob.test/d.mp4"] if cached_file(url) is not None]
+    assert remaining == [urls[0], urls[2], "https://blob.test/d.mp4"]
+    assert streaming.stream_cache_usage.total_bytes == 900
+
+
+def test_blob_size_is_read_from_the_backend_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(streaming, "_blob_sizes", streaming.OrderedDict())
+    calls = []
+
+    class Backend:
+        async def head(self, url: str) -> BlobObject:
+            calls.append(url)
+            return BlobObject(url=url, pathname="videos/a.mp4", size=1234)
+
+    async def scenario() -> list[int]:
+        return [await blob_size(Backend(), "https://blob.test/a.mp4") for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [1234, 1234, 1234]
+    assert calls == ["https://blob.test/a.mp4"]
+
+
+@requires_db
+def test_stream_ranges() -> None:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, update
+
+    from server.app import app
+    from server.dependencies import get_settings, get_storage_backend
+    from server.storages import Video, close_db, create_db_session_pool
+
+    async def upload() -> dict:
+        async def chunks():  # noqa: ANN202
+            yield bytes(range(256)) * 4
+
+        return await get_storage_backend().put_stream(f"videos/{uuid.uuid4().hex}.mp4", chunks(), "video/mp4")
+
+    blob = asyncio.run(upload())
+    body = bytes(range(256)) * 4
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        # Заявлений клієнтом розмір не впливає на довжину потоку
+        registered = client.post(
+            "/videos/register",
+            json={"blobUrl": blob["url"], "blobSize": 5, "blobPathname": blob["pathname"]},
+        )
+        stream_url = f"/videos/{registered.json()['id']}/stream"
+
+        full = client.get(stream_url)
+        assert full.status_code == 200
+        assert full.content == body
+
+        partial = client.get(stream_url, headers={"Range": "bytes=10-19"})
+        assert partial.status_code == 206
+        assert partial.headers["content-range"] == "bytes 10-19/1024"
+        assert partial.content == body[10:20]
+
+        unsatisfiable = client.get(stream_url, headers={"Range": "bytes=5000-"})
+        assert unsatisfiable.status_code == 416
+        assert unsatisfiable.headers["content-range"] == "bytes */1024"
+
+        etag = full.headers["etag"]
+        assert client.get(stream_url, headers={"Range": "bytes=0-0", "If-Range": etag}).status_code == 206
+
+        # Оновлення запису (статус, мініатюра, повторна обробка) не змінює байти, тож докачка триває
+        async def touch() -> None:
+            engine, db_session = await create_db_session_pool(get_settings())
+            try:
+                async with db_session() as db:
+                    await db.execute(
+                        update(Video)
+                        .where(Video.id == registered.json()["id"])
+                        .values(updated_at=func.now() + timedelta(hours=1)),
+                    )
+                    await db.commit()
+            finally:
+                await close_db(engine)
+
+        asyncio.run(touch())
+        resumed = client.get(stream_url, headers={"Range": "bytes=0-0", "If-Range": etag})
+        assert resumed.status_code == 206
+        assert resumed.headers["etag"] == etag
+        stale = client.get(stream_url, headers={"Range": "bytes=0-0", "If-Range": '"0-0-0"'})
+        assert stale.status_code == 200
+        assert stale.content == body
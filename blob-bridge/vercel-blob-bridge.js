@@ -8,6 +8,7 @@ const path = require('path');
 const os = require('os');
 const multer = require('multer');
 const stream = require('stream');
+const crypto = require('crypto');
 
 // Setting up temporary folder for storing files
 const tempDir = path.join(os.tmpdir(), 'vercel-blob-bridge');
@@ -57,6 +58,14 @@ if (!process.env.BLOB_READ_WRITE_TOKEN) {
 
 log(`FastAPI URL: ${FASTAPI_URL}`);
 
+// Idempotency key of a registration request: the blob pathname plus a hash of the exact body sent.
+// A retry of the same request reuses the key, while the other registration path for the same blob
+// (which sends a different body) gets its own key and is deduplicated by the unique blob URL instead
+function registrationKey(pathname, body) {
+    const digest = crypto.createHash('sha256').update(JSON.stringify(body)).digest('hex');
+    return `${pathname}:${digest}`;
+}
+
 // Middleware
 app.use(cors());
 app.use(express.json());
@@ -100,11 +109,15 @@ app.post('/api/blob-upload', async (req, res) => {
                     log(`Upload completed: ${blob.url}`);
 
                     log('Notifying FastAPI about upload');
-                    await axios.post(`${FASTAPI_URL}/video-uploaded`, {
+                    // Registration is idempotent per blob, so a repeated notification does not start processing twice
+                    const requestData = {
                         blobUrl: blob.url,
                         blobSize: blob.size,
                         blobPathname: blob.pathname,
                         tokenPayload
+                    };
+                    await axios.post(`${FASTAPI_URL}/videos/register`, requestData, {
+                        headers: { 'Idempotency-Key': registrationKey(blob.pathname, requestData) }
                     });
 
                     log('FastAPI notification successful');
@@ -194,8 +207,13 @@ app.post('/upload', upload.single('file'), async (req, res) => {
             };
             log(`Sending data to FastAPI: ${JSON.stringify(requestData)}`);
 
+            let writePosition = null;
             try {
-                await axios.post(`${FASTAPI_URL}/videos/register`, requestData);
+                const registration = await axios.post(`${FASTAPI_URL}/videos/register`, requestData, {
+                    headers: { 'Idempotency-Key': registrationKey(requestData.blobPathname, requestData) }
+                });
+                // The front-end sends it back so its next reads see this video even with a lagging replica
+                writePosition = registration.headers['x-write-position'] || null;
                 log('FastAPI notification successful');
             } catch (error) {
                 log(`Failed to notify FastAPI: ${error.message}`);
@@ -210,7 +228,8 @@ app.post('/upload', upload.single('file'), async (req, res) => {
                 size: blob.size || file.size,
                 pathname: blob.pathname || uniqueFilename,
                 title: title,
-                id: Date.now().toString() // Temporary ID
+                id: Date.now().toString(), // Temporary ID
+                writePosition
             });
         } catch (error) {
             cleanupTempFile(filePath);
@@ -5,6 +5,8 @@ const ITEMS_PER_PAGE = 12;
 let currentPage = 0;
 let currentVideoId = null;
 let videoData = [];
+// Позиція останнього запису в базі; з нею сервер не читає з репліки, що ще не бачить наших змін
+let writePosition = null;
 
 let uploadForm, uploadButton, videoFileInput, selectedFileName, uploadDropzone;
 let uploadProgressContainer, uploadProgressBar, uploadStatus;
@@ -13,6 +15,22 @@ let deleteVideoBtn, featuredVideoPlayer, featuredVideoTitle, featuredVideoInfo;
 let featuredVideoMetadata, featuredVideoDuration, featuredVideoDate;
 let carouselPrevBtn, carouselNextBtn;
 
+function rememberWritePosition(position) {
+    if (position) {
+        writePosition = position;
+    }
+}
+
+async function apiFetch(path, options = {}) {
+    const headers = new Headers(options.headers || {});
+    if (writePosition) {
+        headers.set('X-Write-Position', writePosition);
+    }
+    const response = await fetch(`${API_BASE_URL}${path}`, { ...options, headers });
+    rememberWritePosition(response.headers.get('X-Write-Position'));
+    return response;
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     console.log('DOM fully loaded');
 
@@ -219,6 +237,7 @@ async function handleUpload(e) {
         xhr.send(formData);
 
         const data = await uploadPromise;
+        rememberWritePosition(data.writePosition);
 
         uploadProgressBar.style.width = '100%';
         uploadStatus.textContent = 'Upload complete! Processing video...';
@@ -253,7 +272,7 @@ async function pollProcessingStatus(videoId) {
 
     const checkStatus = async () => {
         try {
-            const response = await fetch(`${API_BASE_URL}/videos/${videoId}/status`);
+            const response = await apiFetch(`/videos/${videoId}/status`);
 
             if (!response.ok) {
                 throw new Error('Failed to get processing status');
@@ -295,12 +314,12 @@ async function loadVideos() {
         const status = statusFilter ? statusFilter.value : '';
         const skip = currentPage * ITEMS_PER_PAGE;
 
-        let url = `${API_BASE_URL}/videos?skip=${skip}&limit=${ITEMS_PER_PAGE}`;
+        let url = `/videos?skip=${skip}&limit=${ITEMS_PER_PAGE}`;
         if (status) {
             url += `&status=${status}`;
         }
 
-        const response = await fetch(url);
+        const response = await apiFetch(url);
 
         if (!response.ok) {
             throw new Error('Failed to load videos');
@@ -501,7 +520,7 @@ async function deleteVideo(videoId) {
     }
 
     try {
-        const response = await fetch(`${API_BASE_URL}/videos/${videoId}`, {
+        const response = await apiFetch(`/videos/${videoId}`, {
             method: 'DELETE'
         });
 